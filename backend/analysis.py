@@ -1,18 +1,80 @@
 """Analytics and recommendation engines."""
 from __future__ import annotations
 
+import bisect
+import functools
+import hashlib
+import heapq
 import itertools
 import json
 import math
+import operator
 import random
+import threading
+import time
 from collections import defaultdict
-from dataclasses import asdict, dataclass
-from typing import Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable, Sequence
 
-from . import db
-from .models import Player, Projection, SimulationResult, TradeProposal, WaiverCandidate
+from . import db, metrics
+from .cache import SingleFlight, VersionedLRUCache
+from .config import get_settings
+from .distribution import ScoreDistribution
+from .ros import ROS_INDEX
+from .schedule import SCHEDULE_INDEX
+from .models import (
+    Matchup,
+    Player,
+    PlayoffOdds,
+    Projection,
+    RosterSpot,
+    SimulationResult,
+    Team,
+    TradeProposal,
+    WaiverCandidate,
+)
 
-CURRENT_WEEK = 8
+CURRENT_WEEK = get_settings().current_week
+SEASON_FINAL_WEEK = get_settings().season_final_week
+PLAYOFF_START_WEEK = get_settings().playoff_start_week
+
+SOURCE_WEIGHTS = {
+    "fantasycalc": 0.6,
+    "nfldata": 0.3,
+    "mock-blend": 0.1,
+}
+DEFAULT_SOURCE_WEIGHT = 0.2
+# Monte Carlo runs drawn between progress callbacks.
+SIMULATION_BATCH_RUNS = 1000
+# Batch size for adaptive simulations, which check their stopping rule per batch.
+ADAPTIVE_BATCH_RUNS = 250
+# z for the 95% Wilson interval on simulated win probabilities.
+WILSON_Z = 1.96
+# Part of every simulation's content hash; bump whenever run_simulation's
+# output for the same inputs changes, so stored results are not reused.
+SIMULATION_MODEL_VERSION = 2
+
+# Blended projections keyed by (player_id, week), invalidated by any projection write.
+PROJECTION_CACHE = VersionedLRUCache("projections", max_size=get_settings().projection_cache_size)
+# Unrostered players per league, invalidated by any player or roster write.
+FREE_AGENT_INDEX = VersionedLRUCache("free-agents", max_size=256)
+# Decoded simulation distributions by input hash; content-addressed, so the
+# version stamp is constant.
+DISTRIBUTION_CACHE = VersionedLRUCache("distributions", max_size=256)
+# Identical simulations / waiver scans running at the same moment (e.g. a whole
+# league opening the dashboard at kickoff) share one computation.
+SIMULATION_FLIGHTS = SingleFlight("simulations")
+WAIVER_FLIGHTS = SingleFlight("waivers")
+# Tables whose writes change simulation and waiver inputs; part of flight keys.
+ANALYSIS_INPUT_TABLES = (
+    "players",
+    "rosters",
+    "roster_spots",
+    "projections",
+    "blended_projections",
+    "schedule_strength",
+)
 
 
 @dataclass(slots=True)
@@ -21,15 +83,28 @@ class OptimizedLineup:
     total_projection: float
     delta: float
     rationale: str
+    open_slots: list[str] = field(default_factory=list)
 
 
-POSITION_REPLACEMENT = {
-    "QB": 18.0,
-    "RB": 12.0,
-    "WR": 11.0,
-    "TE": 8.0,
-    "FLEX": 10.5,
+# Starting slots per league unless ``leagues.lineup_slots`` overrides them;
+# "IR" counts injured-reserve spots, everything else not started is bench.
+DEFAULT_LINEUP_SLOTS = {"QB": 1, "RB": 2, "WR": 2, "TE": 1, "FLEX": 1, "IR": 1}
+# Positions each starting slot accepts.
+SLOT_ELIGIBILITY = {
+    "QB": frozenset({"QB"}),
+    "RB": frozenset({"RB"}),
+    "WR": frozenset({"WR"}),
+    "TE": frozenset({"TE"}),
+    "K": frozenset({"K"}),
+    "DST": frozenset({"DST"}),
+    "FLEX": frozenset({"RB", "WR", "TE"}),
+    "SUPERFLEX": frozenset({"QB", "RB", "WR", "TE"}),
 }
+# Injury designations that cannot score this week; the first two may go on IR.
+IR_ELIGIBLE_STATUSES = ("IR", "OUT")
+INACTIVE_STATUSES = IR_ELIGIBLE_STATUSES + ("SUSPENDED",)
+# Optimal lineups per (league, week, layout), invalidated by any input write.
+LINEUP_CACHE = VersionedLRUCache("lineups", max_size=256)
 
 
 def _player_from_row(row) -> Player:
@@ -44,21 +119,30 @@ def _player_from_row(row) -> Player:
 
 
 def blend_projections(player_id: str, week: int = CURRENT_WEEK) -> Projection:
+    version = db.data_version("projections")
+    cached = PROJECTION_CACHE.get((player_id, week), version)
+    if cached is not None:
+        return cached
+    projection = _blend_from_db(player_id, week)
+    PROJECTION_CACHE.put((player_id, week), projection, version)
+    return projection
+
+
+def _blend_from_db(player_id: str, week: int) -> Projection:
     rows = db.query_all(
         "SELECT source, projected_points, floor, ceiling FROM projections WHERE player_id = ? AND week = ?",
         (player_id, week),
     )
+    return _blend_rows(player_id, week, rows)
+
+
+def _blend_rows(player_id: str, week: int, rows) -> Projection:
     if not rows:
         return Projection(player_id, week, "demo", 0.0, 0.0, 0.0)
-    weights = {
-        "fantasycalc": 0.6,
-        "nfldata": 0.3,
-        "mock-blend": 0.1,
-    }
     total_weight = 0.0
     blended = {"points": 0.0, "floor": 0.0, "ceiling": 0.0}
     for row in rows:
-        w = weights.get(row["source"], 0.2)
+        w = SOURCE_WEIGHTS.get(row["source"], DEFAULT_SOURCE_WEIGHT)
         total_weight += w
         blended["points"] += row["projected_points"] * w
         blended["floor"] += row["floor"] * w
@@ -74,200 +158,1253 @@ def blend_projections(player_id: str, week: int = CURRENT_WEEK) -> Projection:
     )
 
 
-def start_sit_for_roster(roster_id: str) -> OptimizedLineup:
-    spots = db.query_all(
+def materialize_projection_changes() -> int:
+    """Re-blend changed projections into ``blended_projections`` in one set-based pass.
+
+    Triggers on ``projections`` record every (player, week) written since the
+    last run in ``projection_changes``; only those pairs are re-blended, as a
+    single SQL aggregation using the same source weights as
+    ``blend_projections``. Each pair carries a signature of its source
+    rows and is only upserted when the signature changed. Returns the number of
+    refreshed pairs.
+    """
+    weight_cases = " ".join("WHEN ? THEN ?" for _ in SOURCE_WEIGHTS)
+    weight_params = [value for item in SOURCE_WEIGHTS.items() for value in item]
+    with db.transaction():
+        db.execute(
+            f"""
+            WITH weighted AS (
+                SELECT projections.player_id, projections.week, projected_points, floor, ceiling, updated_at,
+                       CASE source {weight_cases} ELSE ? END AS weight
+                FROM projections
+                JOIN projection_changes AS changed
+                    ON changed.player_id = projections.player_id AND changed.week = projections.week
+            ),
+            blended AS (
+                SELECT player_id, week,
+                       ROUND(SUM(projected_points * weight) / SUM(weight), 2) AS projected_points,
+                       ROUND(SUM(floor * weight) / SUM(weight), 2) AS floor,
+                       ROUND(SUM(ceiling * weight) / SUM(weight), 2) AS ceiling,
+                       COUNT(*) AS source_count,
+                       COUNT(*) || ':' || MAX(updated_at) || ':' || TOTAL(projected_points) || ':'
+                           || TOTAL(floor) || ':' || TOTAL(ceiling) AS source_signature
+                FROM weighted
+                GROUP BY player_id, week
+            )
+            INSERT INTO blended_projections
+                (player_id, week, projected_points, floor, ceiling, source_count, source_signature, refreshed_at)
+            SELECT blended.player_id, blended.week, blended.projected_points, blended.floor, blended.ceiling,
+                   blended.source_count, blended.source_signature, CURRENT_TIMESTAMP
+            FROM blended
+            LEFT JOIN blended_projections AS current
+                ON current.player_id = blended.player_id AND current.week = blended.week
+            WHERE current.source_signature IS NULL OR current.source_signature != blended.source_signature
+            ON CONFLICT (player_id, week) DO UPDATE SET
+                projected_points = excluded.projected_points,
+                floor = excluded.floor,
+                ceiling = excluded.ceiling,
+                source_count = excluded.source_count,
+                source_signature = excluded.source_signature,
+                refreshed_at = excluded.refreshed_at
+            """,
+            (*weight_params, DEFAULT_SOURCE_WEIGHT),
+        )
+        refreshed = db.query_one("SELECT changes() AS n")["n"]
+        db.execute(
+            """
+            DELETE FROM blended_projections
+            WHERE (player_id, week) IN (SELECT player_id, week FROM projection_changes)
+              AND NOT EXISTS (
+                SELECT 1 FROM projections
+                WHERE projections.player_id = blended_projections.player_id
+                  AND projections.week = blended_projections.week
+            )
+            """
+        )
+        db.execute("DELETE FROM projection_changes")
+    return refreshed
+
+
+_materialized_projections: tuple[int, ...] | None = None
+_materialize_lock = threading.Lock()
+
+
+def refresh_rest_of_season() -> None:
+    """Bring ``ROS_INDEX`` up to date with every projection written so far.
+
+    The index reads ``blended_projections``, while waiver ceilings come from
+    the live ``blend_projections``. So any ``projections`` write since the last
+    call is materialized here first, rather than waiting for the nightly job.
+    Only the pairs recorded in ``projection_changes`` are re-blended.
+    """
+    global _materialized_projections
+    version = db.data_version("projections")
+    if version != _materialized_projections:
+        with _materialize_lock:
+            if version != _materialized_projections:
+                materialize_projection_changes()
+                _materialized_projections = version
+    ROS_INDEX.refresh()
+
+
+@dataclass(slots=True)
+class LeagueContext:
+    """Everything the analysis engines need about one league for one week.
+
+    ``load`` issues a fixed number of queries regardless of league size; every
+    analysis entry point accepts an optional context and, when given one,
+    reads from it instead of the database.
+    """
+
+    league_id: str
+    week: int
+    teams: dict[str, Team]
+    rosters: dict[str, dict]
+    roster_spots: dict[str, list[RosterSpot]]
+    players: dict[str, Player]
+    matchups: list[Matchup]
+    projections: dict[str, Projection]
+    free_agents: tuple[Player, ...]
+    lineup_slots: dict[str, int] = field(default_factory=lambda: dict(DEFAULT_LINEUP_SLOTS))
+    # Per-player schedule outlook from ``SCHEDULE_INDEX`` (1.0 = neutral).
+    schedule: dict[str, float] = field(default_factory=dict)
+    # ``data_version(*ANALYSIS_INPUT_TABLES, "leagues")`` as of ``load``, so
+    # results derived from this context are stamped with the data it read.
+    version: tuple[int, ...] | None = None
+
+    @classmethod
+    def load(cls, league_id: str, week: int = CURRENT_WEEK) -> "LeagueContext":
+        projection_version = db.data_version("projections")
+        refresh_rest_of_season()
+        SCHEDULE_INDEX.refresh()
+        version = db.data_version(*ANALYSIS_INPUT_TABLES, "leagues")
+        league = db.query_one("SELECT lineup_slots FROM leagues WHERE id = ?", (league_id,))
+        teams = {
+            row["id"]: Team(
+                id=row["id"],
+                league_id=row["league_id"],
+                name=row["name"],
+                wins=row["wins"],
+                losses=row["losses"],
+                ties=row["ties"],
+                points_for=row["points_for"],
+                points_against=row["points_against"],
+                playoff_odds=row["playoff_odds"],
+            )
+            for row in db.query_all("SELECT * FROM teams WHERE league_id = ? ORDER BY id", (league_id,))
+        }
+        rosters = {
+            row["id"]: {"id": row["id"], "team_id": row["team_id"], "week": row["week"]}
+            for row in db.query_all(
+                "SELECT id, team_id, week FROM rosters WHERE league_id = ? ORDER BY id", (league_id,)
+            )
+        }
+        players: dict[str, Player] = {}
+        roster_spots: dict[str, list[RosterSpot]] = {roster_id: [] for roster_id in rosters}
+        spot_rows = db.query_all(
+            """
+            SELECT roster_spots.roster_id, roster_spots.slot, roster_spots.status, roster_spots.projected_points,
+                   roster_spots.opponent, roster_spots.notes, players.*
+            FROM roster_spots
+            JOIN rosters ON rosters.id = roster_spots.roster_id
+            JOIN players ON players.id = roster_spots.player_id
+            WHERE rosters.league_id = ?
+            ORDER BY roster_spots.rowid
+            """,
+            (league_id,),
+        )
+        for row in spot_rows:
+            player = players.setdefault(row["id"], _player_from_row(row))
+            roster_spots[row["roster_id"]].append(
+                RosterSpot(
+                    player=player,
+                    slot=row["slot"],
+                    status=row["status"],
+                    projected_points=row["projected_points"],
+                    opponent=row["opponent"] or "",
+                    notes=row["notes"] or "",
+                )
+            )
+        free_agents = _free_agents(league_id)
+        for player in free_agents:
+            players.setdefault(player.id, player)
+        matchups = [
+            Matchup(
+                league_id=row["league_id"],
+                week=row["week"],
+                home_team_id=row["home_team_id"],
+                away_team_id=row["away_team_id"],
+                home_score=row["home_score"],
+                away_score=row["away_score"],
+                kickoff=datetime.fromisoformat(row["kickoff"]) if row["kickoff"] else None,
+            )
+            for row in db.query_all(
+                "SELECT * FROM matchups WHERE league_id = ? ORDER BY week, id", (league_id,)
+            )
+        ]
+        source_rows: defaultdict[str, list] = defaultdict(list)
+        for row in db.query_all(
+            "SELECT player_id, source, projected_points, floor, ceiling FROM projections WHERE week = ?",
+            (week,),
+        ):
+            if row["player_id"] in players:
+                source_rows[row["player_id"]].append(row)
+        projections = {}
+        for player_id, rows in source_rows.items():
+            projection = _blend_rows(player_id, week, rows)
+            PROJECTION_CACHE.put((player_id, week), projection, projection_version)
+            projections[player_id] = projection
+        return cls(
+            league_id=league_id,
+            week=week,
+            teams=teams,
+            rosters=rosters,
+            roster_spots=roster_spots,
+            players=players,
+            matchups=matchups,
+            projections=projections,
+            free_agents=free_agents,
+            lineup_slots=lineup_layout(league["lineup_slots"] if league else None),
+            schedule={
+                player.id: SCHEDULE_INDEX.outlook(player.team, player.position, week, player.bye_week)
+                for player in players.values()
+            },
+            version=version,
+        )
+
+    @classmethod
+    def for_roster(cls, roster_id: str, week: int = CURRENT_WEEK) -> "LeagueContext | None":
+        row = db.query_one("SELECT league_id FROM rosters WHERE id = ?", (roster_id,))
+        return cls.load(row["league_id"], week) if row else None
+
+    def projection(self, player_id: str) -> Projection:
+        projection = self.projections.get(player_id)
+        if projection is None:
+            return Projection(player_id, self.week, "demo", 0.0, 0.0, 0.0)
+        return projection
+
+    def schedule_outlook(self, player: Player) -> float:
+        return self.schedule.get(player.id, 1.0)
+
+    def snapshot(self) -> "LeagueContext":
+        """Copy without free agents, for shipping to analytics worker processes.
+
+        Rostered players are all the simulation and trade engines read; the
+        free-agent pool is usually far larger than the rosters.
         """
-        SELECT roster_spots.*, players.name, players.position, players.team, players.bye_week, players.injury_status
-        FROM roster_spots
-        JOIN players ON players.id = roster_spots.player_id
-        WHERE roster_id = ?
-        """,
-        (roster_id,),
+        rostered = {spot.player.id for spots in self.roster_spots.values() for spot in spots}
+        return LeagueContext(
+            league_id=self.league_id,
+            week=self.week,
+            teams=self.teams,
+            rosters=self.rosters,
+            roster_spots=self.roster_spots,
+            players={pid: player for pid, player in self.players.items() if pid in rostered},
+            matchups=self.matchups,
+            projections={pid: proj for pid, proj in self.projections.items() if pid in rostered},
+            free_agents=(),
+            lineup_slots=self.lineup_slots,
+            schedule={pid: outlook for pid, outlook in self.schedule.items() if pid in rostered},
+            version=self.version,
+        )
+
+    def latest_roster_id(self, team_id: str) -> str | None:
+        candidates = [roster for roster in self.rosters.values() if roster["team_id"] == team_id]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda roster: roster["week"])["id"]
+
+    def team_players(self, team_id: str) -> list[Player]:
+        roster_id = self.latest_roster_id(team_id)
+        if roster_id is None:
+            return []
+        return [spot.player for spot in self.roster_spots[roster_id]]
+
+    def opponent_of(self, team_id: str) -> str | None:
+        """Opponent for ``team_id``, preferring this week's matchup."""
+        fallback = None
+        for matchup in self.matchups:
+            if team_id not in (matchup.home_team_id, matchup.away_team_id):
+                continue
+            opponent = matchup.away_team_id if matchup.home_team_id == team_id else matchup.home_team_id
+            if matchup.week == self.week:
+                return opponent
+            fallback = fallback or opponent
+        return fallback
+
+
+def lineup_layout(raw: str | None) -> dict[str, int]:
+    """Slot counts from a ``leagues.lineup_slots`` JSON object (``None`` = default).
+
+    Slots the optimizer does not model, such as bench size, are ignored. A
+    value that is not such an object also falls back to the default layout.
+    """
+    if not raw:
+        return dict(DEFAULT_LINEUP_SLOTS)
+    try:
+        return {
+            slot.upper(): int(count)
+            for slot, count in json.loads(raw).items()
+            if slot.upper() in SLOT_ELIGIBILITY or slot.upper() == "IR"
+        }
+    except (ValueError, TypeError, AttributeError):
+        return dict(DEFAULT_LINEUP_SLOTS)
+
+
+def _starting_slots(layout: dict[str, int]) -> list[str]:
+    # Narrow slots first, so flex spots end up holding the players that need them.
+    slots = [slot for slot, count in layout.items() if slot in SLOT_ELIGIBILITY for _ in range(count)]
+    return sorted(slots, key=lambda slot: len(SLOT_ELIGIBILITY[slot]))
+
+
+@functools.lru_cache(maxsize=64)
+def _slot_indices(slots: tuple[str, ...]) -> dict[str, tuple[int, ...]]:
+    """Indices of the slots in ``slots`` that each position may fill."""
+    positions = set().union(*(SLOT_ELIGIBILITY[slot] for slot in slots))
+    return {
+        position: tuple(i for i, slot in enumerate(slots) if position in SLOT_ELIGIBILITY[slot])
+        for position in positions
+    }
+
+
+def _seat(
+    eligible: dict[str, tuple[int, ...]],
+    seated: list[str | None],
+    positions: dict[str, str],
+    candidate: str,
+    visited: set[int],
+) -> bool:
+    """Seat ``candidate`` along an augmenting path, moving starters between slots.
+
+    ``visited`` slots are skipped. After a failed search they stay dead for
+    later candidates until the seating changes.
+    """
+    indices = eligible.get(positions[candidate], ())
+    # Take an open slot before displacing anyone, so starters stay put.
+    for index in indices:
+        if seated[index] is None and index not in visited:
+            visited.add(index)
+            seated[index] = candidate
+            return True
+    for index in indices:
+        if index not in visited:
+            visited.add(index)
+            if _seat(eligible, seated, positions, seated[index], visited):
+                seated[index] = candidate
+                return True
+    return False
+
+
+def _fill(
+    eligible: dict[str, tuple[int, ...]],
+    seated: list[str | None],
+    positions: dict[str, str],
+    candidates: Iterable[str],
+    limit: int,
+) -> set[str]:
+    """Seat up to ``limit`` more ``candidates`` in the order given; returns those seated."""
+    added: set[str] = set()
+    dead: set[int] = set()
+    for candidate in candidates:
+        if len(added) == limit:
+            break
+        if _seat(eligible, seated, positions, candidate, dead):
+            added.add(candidate)
+            dead = set()
+    return added
+
+
+def assign_starters(slots: Sequence[str], candidates: list[tuple[str, str]]) -> list[str | None]:
+    """Seat ``candidates`` (player id, position), given best first, into ``slots``.
+
+    The sets of players that can start together form a transversal matroid, so
+    taking players in descending value and keeping each one an augmenting path
+    can seat is an exact maximum-weight assignment. Returns the player id in
+    each slot, or ``None`` where no eligible player is left.
+    """
+    seated: list[str | None] = [None] * len(slots)
+    _fill(_slot_indices(tuple(slots)), seated, dict(candidates), [pid for pid, _ in candidates], len(slots))
+    return seated
+
+
+class LineupEvaluator:
+    """A solved lineup that answers add / drop / swap what-ifs incrementally.
+
+    Holds the optimal seating and the value-ordered bench for one roster.
+    ``what_if`` never re-solves from scratch: dropped starters are refilled
+    greedily from the bench (optimal for the contracted matroid), then each
+    added player is exchanged against the weakest starter on its alternating
+    paths, or seated directly when a path reaches an open slot. Both steps
+    keep the seating a maximum-weight basis, so totals match a full solve.
+    """
+
+    __slots__ = ("slots", "total", "_eligible", "_positions", "_points", "_seated", "_bench")
+
+    def __init__(self, slots: Sequence[str], players: Iterable[tuple[str, str, float]]) -> None:
+        self.slots = tuple(slots)
+        self._eligible = _slot_indices(self.slots)
+        self._positions: dict[str, str] = {}
+        self._points: dict[str, float] = {}
+        for player_id, position, points in players:
+            self._positions[player_id] = position
+            self._points[player_id] = points
+        order = sorted(self._points, key=self._rank)
+        self._seated: list[str | None] = [None] * len(self.slots)
+        starting = _fill(self._eligible, self._seated, self._positions, order, len(self.slots))
+        self._bench = [player_id for player_id in order if player_id not in starting]
+        self.total = self._total()
+
+    @classmethod
+    def for_roster(cls, ctx: LeagueContext, spots: Iterable[RosterSpot]) -> "LineupEvaluator":
+        players = (_lineup_candidate(ctx, spot.player) for spot in spots)
+        return cls(_starting_slots(ctx.lineup_slots), [player for player in players if player is not None])
+
+    @classmethod
+    def for_team(cls, ctx: LeagueContext, team_id: str) -> "LineupEvaluator":
+        roster_id = ctx.latest_roster_id(team_id)
+        return cls.for_roster(ctx, ctx.roster_spots[roster_id] if roster_id else [])
+
+    def _rank(self, player_id: str) -> tuple[float, str]:
+        return -self._points[player_id], player_id
+
+    def _total(self) -> float:
+        return math.fsum(self._points[player_id] for player_id in self._seated if player_id is not None)
+
+    def assignment(self) -> list[tuple[str, str | None]]:
+        """(slot, player id) for every starting slot; ``None`` marks an open slot."""
+        return list(zip(self.slots, self._seated))
+
+    def delta(self, add: Iterable[tuple[str, str, float]] = (), drop: Iterable[str] = ()) -> float:
+        return round(self.what_if(add, drop).total - self.total, 2)
+
+    def what_if(self, add: Iterable[tuple[str, str, float]] = (), drop: Iterable[str] = ()) -> "LineupEvaluator":
+        """The optimal lineup after dropping ``drop`` ids and adding ``add`` (id, position, points)."""
+        dropped = set(drop)
+        result = object.__new__(LineupEvaluator)
+        result.slots, result._eligible = self.slots, self._eligible
+        result._positions, result._points = self._positions, self._points
+        result._seated, result._bench = list(self._seated), self._bench
+        freed = 0
+        if dropped:
+            # Dropped players keep their stale position/points entries; they are
+            # neither seated nor benched, so nothing reads them again.
+            result._bench = [pid for pid in self._bench if pid not in dropped]
+            for index, player_id in enumerate(result._seated):
+                if player_id in dropped:
+                    result._seated[index] = None
+                    freed += 1
+        if freed:
+            # The remaining starters lie in an optimal lineup of the smaller
+            # roster, so the best bench players that still fit complete it.
+            refilled = _fill(result._eligible, result._seated, result._positions, result._bench, freed)
+            result._bench = [pid for pid in result._bench if pid not in refilled]
+        for player_id, position, points in add:
+            if result._points is self._points:
+                result._positions, result._points = dict(self._positions), dict(self._points)
+            if result._bench is self._bench:
+                result._bench = list(self._bench)
+            result._positions[player_id] = position
+            result._points[player_id] = points
+            left_out = result._exchange(player_id)
+            if left_out is not None:
+                bisect.insort(result._bench, left_out, key=result._rank)
+        result.total = result._total()
+        return result
+
+    def _exchange(self, newcomer: str) -> str | None:
+        """Seat ``newcomer`` if it improves the lineup; returns whoever ends up benched."""
+        seated, eligible, positions, points = self._seated, self._eligible, self._positions, self._points
+        value = points[newcomer]
+        if None not in seated and value <= min(points[player_id] for player_id in seated):
+            return newcomer
+        via: dict[int, int | None] = dict.fromkeys(eligible.get(positions[newcomer], ()))
+        frontier = list(via)
+        target = None
+        for index in frontier:
+            occupant = seated[index]
+            if occupant is None:
+                target = index
+                break
+            for other in eligible[positions[occupant]]:
+                if other not in via:
+                    via[other] = index
+                    frontier.append(other)
+        left_out = None
+        if target is None:
+            # Every reachable slot is taken: those starters form the circuit the
+            # newcomer closes, and the weakest of them is the one to replace.
+            if not via:
+                return newcomer
+            target = min(via, key=lambda index: (points[seated[index]], seated[index]))
+            if points[seated[target]] >= value:
+                return newcomer
+            left_out = seated[target]
+        while via[target] is not None:
+            previous = via[target]
+            seated[target] = seated[previous]
+            target = previous
+        seated[target] = newcomer
+        return left_out
+
+
+def _unavailable_reason(player: Player, week: int) -> str | None:
+    status = player.injury_status.upper()
+    if status in INACTIVE_STATUSES:
+        return status
+    if player.bye_week == week:
+        return "BYE"
+    return None
+
+
+def _lineup_candidate(ctx: LeagueContext, player: Player) -> tuple[str, str, float] | None:
+    """(id, position, points) for the lineup solvers, or ``None`` if the player cannot start."""
+    if _unavailable_reason(player, ctx.week):
+        return None
+    return player.id, player.position, ctx.projection(player.id).projected_points
+
+
+def _optimize_roster(ctx: LeagueContext, spots: list[RosterSpot]) -> OptimizedLineup:
+    evaluator = LineupEvaluator.for_roster(ctx, spots)
+    assignment = evaluator.assignment()
+    starting = {player_id: slot for slot, player_id in assignment if player_id is not None}
+    unavailable = {
+        spot.player.id: reason for spot in spots if (reason := _unavailable_reason(spot.player, ctx.week))
+    }
+    points = {
+        spot.player.id: 0.0 if spot.player.id in unavailable else ctx.projection(spot.player.id).projected_points
+        for spot in spots
+    }
+    # Players already on IR keep their spot ahead of newly injured ones.
+    ir_candidates = sorted(
+        (spot for spot in spots if spot.player.injury_status.upper() in IR_ELIGIBLE_STATUSES),
+        key=lambda spot: (spot.status != "ir", spot.player.id),
     )
+    reserve = {spot.player.id for spot in ir_candidates[: ctx.lineup_slots.get("IR", 0)]}
+    names = {spot.player.id: spot.player.name for spot in spots}
+
     lineup = []
-    baseline = 0.0
-    optimized_total = 0.0
     rationale_lines = []
     for spot in spots:
-        projection = blend_projections(spot["player_id"])
-        replacement = POSITION_REPLACEMENT.get(spot["slot"], POSITION_REPLACEMENT.get(spot["status"].upper(), 9.5))
-        start_score = projection.projected_points + (projection.projected_points - replacement) * 0.35
-        risk_modifier = 0.0 if spot["status"] == "start" else -1.5
-        recommendation = "start" if start_score + risk_modifier >= replacement else "bench"
+        player = spot.player
+        projection = ctx.projection(player.id)
+        if player.id in starting:
+            recommendation, optimal_slot = "start", starting[player.id]
+            reason = f"Proj {points[player.id]} at {optimal_slot}"
+        elif player.id in reserve:
+            recommendation, optimal_slot = "ir", "IR"
+            reason = f"{unavailable.get(player.id, player.injury_status)}: move to IR"
+        elif player.id in unavailable:
+            recommendation, optimal_slot = "bench", "Bench"
+            reason = f"Unavailable ({unavailable[player.id]})"
+        else:
+            recommendation, optimal_slot = "bench", "Bench"
+            rivals = [
+                (points[starter], slot, starter)
+                for slot, starter in assignment
+                if starter is not None and player.position in SLOT_ELIGIBILITY[slot]
+            ]
+            if rivals:
+                rival_points, rival_slot, rival = min(rivals)
+                reason = f"Proj {points[player.id]} trails {names[rival]} ({rival_points}) at {rival_slot}"
+            else:
+                reason = f"No open slot takes a {player.position}"
         lineup.append(
             {
-                "player_id": spot["player_id"],
-                "name": spot["name"],
-                "slot": spot["slot"],
-                "status": spot["status"],
+                "player_id": player.id,
+                "name": player.name,
+                "slot": spot.slot,
+                "status": spot.status,
                 "projected_points": projection.projected_points,
                 "recommendation": recommendation,
-                "rationale": f"Proj {projection.projected_points} vs replacement {replacement}",
+                "optimal_slot": optimal_slot,
+                "rationale": reason,
             }
         )
-        if spot["status"] == "start":
-            baseline += spot["projected_points"]
-        if recommendation == "start":
-            optimized_total += max(projection.projected_points, replacement)
-        else:
-            optimized_total += replacement
         rationale_lines.append(
-            f"{spot['name']}: {recommendation.upper()} (blend {projection.projected_points} / floor {projection.floor})"
+            f"{player.name}: {recommendation.upper()} (blend {projection.projected_points} / floor {projection.floor})"
         )
-    delta = round(optimized_total - baseline, 2)
+    open_slots = [slot for slot, player_id in assignment if player_id is None]
+    if open_slots:
+        rationale_lines.append(f"Open slots: {', '.join(open_slots)}")
+    baseline = math.fsum(points[spot.player.id] for spot in spots if spot.status == "start")
     return OptimizedLineup(
         lineup=lineup,
-        total_projection=round(optimized_total, 2),
-        delta=delta,
+        total_projection=round(evaluator.total, 2),
+        delta=round(evaluator.total - baseline, 2),
         rationale="; ".join(rationale_lines),
+        open_slots=open_slots,
     )
 
 
-def _league_players_not_on_team(league_id: str, team_id: str) -> list[Player]:
+def start_sit_for_roster(roster_id: str, ctx: LeagueContext | None = None) -> OptimizedLineup:
+    """Best legal lineup for one roster under its league's slot layout."""
+    if ctx is None:
+        ctx = LeagueContext.for_roster(roster_id)
+    if ctx is None:
+        return OptimizedLineup(lineup=[], total_projection=0.0, delta=0.0, rationale="")
+    return _optimize_roster(ctx, ctx.roster_spots.get(roster_id, []))
+
+
+def optimize_league_lineups(league_id: str, ctx: LeagueContext | None = None) -> dict[str, OptimizedLineup]:
+    """Best lineup for every team's latest roster, keyed by team id.
+
+    The whole league is solved in one pass over one context and cached until
+    a league, roster, player or projection write, so the dashboard cards and
+    the league lineup report share a single solve. Results from a given
+    ``ctx`` are stamped with the version it was loaded at, so a write since
+    then is not hidden behind them.
+    """
+    week = ctx.week if ctx is not None else CURRENT_WEEK
+    current = db.data_version(*ANALYSIS_INPUT_TABLES, "leagues")
+    cached = LINEUP_CACHE.get((league_id, week), current)
+    if cached is not None:
+        return cached
+    if ctx is None:
+        ctx = LeagueContext.load(league_id, week)
+    version = ctx.version or current
+    lineups = {}
+    for team_id in ctx.teams:
+        roster_id = ctx.latest_roster_id(team_id)
+        if roster_id is not None:
+            lineups[team_id] = _optimize_roster(ctx, ctx.roster_spots[roster_id])
+    LINEUP_CACHE.put((league_id, week), lineups, version)
+    return lineups
+
+
+def _free_agents(league_id: str) -> tuple[Player, ...]:
+    """Players not on any roster in ``league_id``, rebuilt only when rosters change."""
+    version = db.data_version("players", "rosters", "roster_spots")
+    cached = FREE_AGENT_INDEX.get(league_id, version)
+    if cached is not None:
+        return cached
     rows = db.query_all(
         """
-        SELECT DISTINCT players.*
+        SELECT players.*
         FROM players
-        LEFT JOIN roster_spots ON roster_spots.player_id = players.id
-        LEFT JOIN rosters ON rosters.id = roster_spots.roster_id
-        WHERE (rosters.league_id != ? OR rosters.team_id != ? OR rosters.team_id IS NULL)
+        WHERE players.id NOT IN (
+            SELECT roster_spots.player_id
+            FROM roster_spots
+            JOIN rosters ON rosters.id = roster_spots.roster_id
+            WHERE rosters.league_id = ?
+        )
         """,
-        (league_id, team_id),
+        (league_id,),
     )
-    return [_player_from_row(row) for row in rows]
-
-
-def waiver_recommendations(league_id: str, team_id: str, limit: int = 5) -> list[WaiverCandidate]:
-    candidates: list[WaiverCandidate] = []
-    for player in _league_players_not_on_team(league_id, team_id):
-        projection = blend_projections(player.id)
-        ros_value = projection.projected_points * 0.9 + projection.ceiling * 0.1
-        scarcity = 1.2 if player.position in {"RB", "WR"} else 1.0
-        bye_bonus = 1.1 if player.bye_week not in {5, 9} else 0.9
-        schedule = 1.0
-        total = round(ros_value * scarcity * bye_bonus * schedule, 2)
-        candidates.append(
-            WaiverCandidate(
-                player=player,
-                ros_value=round(ros_value, 2),
-                scarcity_score=scarcity,
-                team_fit_score=round(bye_bonus, 2),
-                bye_coverage_score=round(bye_bonus, 2),
-                schedule_score=round(schedule, 2),
-                total_score=total,
-                explanation=f"Blended proj {projection.projected_points}, scarcity {scarcity}",
+    free_agents = tuple(_player_from_row(row) for row in rows)
+    FREE_AGENT_INDEX.put(league_id, free_agents, version)
+    return free_agents
+
+
+def waiver_recommendations(
+    league_id: str, team_id: str, limit: int = 5, ctx: LeagueContext | None = None
+) -> list[WaiverCandidate]:
+    week = ctx.week if ctx is not None else CURRENT_WEEK
+    key = (league_id, team_id, week, limit, db.data_version(*ANALYSIS_INPUT_TABLES))
+    return WAIVER_FLIGHTS.do(key, lambda: _rank_waivers(league_id, limit, ctx))
+
+
+def _rank_waivers(league_id: str, limit: int, ctx: LeagueContext | None) -> list[WaiverCandidate]:
+    if ctx is None:
+        refresh_rest_of_season()
+        SCHEDULE_INDEX.refresh()
+        candidates = (
+            _waiver_candidate(
+                player,
+                blend_projections(player.id),
+                CURRENT_WEEK,
+                SCHEDULE_INDEX.outlook(player.team, player.position, CURRENT_WEEK, player.bye_week),
             )
+            for player in _free_agents(league_id)
         )
-    candidates.sort(key=lambda c: c.total_score, reverse=True)
-    return candidates[:limit]
+    else:
+        candidates = (
+            _waiver_candidate(player, ctx.projection(player.id), ctx.week, ctx.schedule_outlook(player))
+            for player in ctx.free_agents
+        )
+    return heapq.nlargest(limit, candidates, key=lambda c: c.total_score)
 
 
-def _team_players(team_id: str) -> list[Player]:
-    rows = db.query_all(
-        """
-        SELECT players.*
-        FROM roster_spots
-        JOIN rosters ON rosters.id = roster_spots.roster_id
-        JOIN players ON players.id = roster_spots.player_id
-        WHERE rosters.team_id = ?
-        """,
-        (team_id,),
+def season_window(player: Player, projection: Projection, start: int, end: int) -> float:
+    """Projected points over weeks ``start``..``end`` from the rest-of-season index.
+
+    Players the index has not seen yet (no materialized blend) are treated the
+    way the index would treat them: this week's projection carried over the
+    window, minus their bye.
+    """
+    start, end = max(start, 1), min(end, SEASON_FINAL_WEEK)
+    if start > end:
+        return 0.0
+    if player.id in ROS_INDEX:
+        return ROS_INDEX.window(player.id, start, end)
+    games = end - start + 1 - (start <= player.bye_week <= end)
+    return projection.projected_points * games
+
+
+def _waiver_candidate(player: Player, projection: Projection, week: int, schedule: float) -> WaiverCandidate:
+    remaining = SEASON_FINAL_WEEK - week + 1
+    ros_total = season_window(player, projection, week, SEASON_FINAL_WEEK)
+    playoff_total = season_window(player, projection, max(week, PLAYOFF_START_WEEK), SEASON_FINAL_WEEK)
+    weekly_rate = ros_total / remaining if remaining > 0 else projection.projected_points
+    ros_value = weekly_rate * 0.9 + projection.ceiling * 0.1
+    scarcity = 1.2 if player.position in {"RB", "WR"} else 1.0
+    bye_bonus = 1.1 if player.bye_week not in {5, 9} else 0.9
+    total = round(ros_value * scarcity * bye_bonus * schedule, 2)
+    return WaiverCandidate(
+        player=player,
+        ros_value=round(ros_value, 2),
+        scarcity_score=scarcity,
+        team_fit_score=round(bye_bonus, 2),
+        bye_coverage_score=round(bye_bonus, 2),
+        schedule_score=round(schedule, 2),
+        total_score=total,
+        explanation=(
+            f"Blended proj {projection.projected_points}, ROS {round(ros_total, 1)} over {max(remaining, 0)} wks"
+            f" (playoffs {round(playoff_total, 1)}), scarcity {scarcity}, schedule {round(schedule, 2)}"
+        ),
+        ros_total=round(ros_total, 2),
+        playoff_value=round(playoff_total, 2),
     )
-    return [_player_from_row(row) for row in rows]
 
 
-def trade_ideas(league_id: str, team_id: str) -> list[TradeProposal]:
-    team_players = _team_players(team_id)
-    other_team_rows = db.query_all(
-        "SELECT id FROM teams WHERE league_id = ? AND id != ?",
-        (league_id, team_id),
+MAX_TRADE_PACKAGE = 3
+
+
+def trade_ideas(
+    league_id: str,
+    team_id: str,
+    *,
+    limit: int = 3,
+    max_give: int = 2,
+    max_receive: int = 2,
+    time_budget: float | None = None,
+    ctx: LeagueContext | None = None,
+) -> list[TradeProposal]:
+    """Return the ``limit`` trades that most improve ``team_id``'s optimal lineup.
+
+    Proposals are ranked by the change in the re-optimized starting lineup, so
+    giving away bench depth costs nothing and receiving a player who would not
+    start gains nothing. Every give package is solved once as a
+    ``LineupEvaluator`` what-if and reused against every receive package. A
+    pair is only evaluated when both bounds on its delta beat the current k-th
+    best: the receive package's gain on its own, and its raw value minus the
+    give package's loss. When ``time_budget`` seconds elapse the best
+    proposals found so far are returned.
+    """
+    if not 1 <= max_give <= MAX_TRADE_PACKAGE or not 1 <= max_receive <= MAX_TRADE_PACKAGE:
+        raise ValueError(f"package sizes must be between 1 and {MAX_TRADE_PACKAGE}")
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    if ctx is None:
+        ctx = LeagueContext.load(league_id)
+    evaluator = LineupEvaluator.for_team(ctx, team_id)
+
+    def raw_value(package: tuple[Player, ...]) -> float:
+        return round(math.fsum(ctx.projection(player.id).projected_points for player in package), 2)
+
+    # Cheapest packages first: what the lineup loses without them.
+    gives = []
+    for size in range(1, max_give + 1):
+        for package in itertools.combinations(ctx.team_players(team_id), size):
+            after = evaluator.what_if(drop=[player.id for player in package])
+            gives.append((round(evaluator.total - after.total, 2), package, after))
+    gives.sort(key=operator.itemgetter(0))
+    # Entries are (lineup_delta, -|offer - request value|, -sequence, proposal):
+    # equal lineup gains go to the fairest-looking offer, then the first found.
+    heap: list[tuple[float, float, int, TradeProposal]] = []
+    sequence = itertools.count()
+
+    def threshold() -> float:
+        return heap[0][0] if len(heap) >= limit else 0.0
+
+    for other_team_id in ctx.teams:
+        if other_team_id == team_id:
+            continue
+        theirs = ctx.team_players(other_team_id)
+        entries = {player.id: _lineup_candidate(ctx, player) for player in theirs}
+        receives = []
+        for size in range(1, max_receive + 1):
+            for package in itertools.combinations(theirs, size):
+                added = [entries[player.id] for player in package if entries[player.id] is not None]
+                gain = round(evaluator.what_if(add=added).total - evaluator.total, 2)
+                if gain > 0:
+                    receives.append((gain, math.fsum(entry[2] for entry in added), package, added))
+        if not receives:
+            continue
+        receives.sort(key=operator.itemgetter(0), reverse=True)
+        best_value = max(receive[1] for receive in receives)
+        for loss, give, after in gives:
+            if round(best_value - loss, 2) < threshold():
+                break
+            for gain, value, receive, added in receives:
+                if gain < threshold():
+                    break
+                if round(value - loss, 2) < threshold():
+                    continue
+                lineup_delta = round(after.what_if(add=added).total - evaluator.total, 2)
+                if lineup_delta <= 0:
+                    continue
+                offer_value, request_value = raw_value(give), raw_value(receive)
+                balance = -round(abs(offer_value - request_value), 2)
+                if len(heap) >= limit and (lineup_delta, balance) <= heap[0][:2]:
+                    continue
+                proposal = TradeProposal(
+                    offer_players=give,
+                    request_players=receive,
+                    offer_value=offer_value,
+                    request_value=request_value,
+                    lineup_delta=lineup_delta,
+                    playoff_odds_delta=round(lineup_delta * 0.02, 3),
+                    notes=f"Optimal lineup gains {lineup_delta} pts",
+                    schedule_delta=_schedule_delta(ctx, give, receive),
+                )
+                entry = (lineup_delta, balance, -next(sequence), proposal)
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heapreplace(heap, entry)
+            if deadline is not None and time.monotonic() >= deadline:
+                return _ranked_proposals(heap)
+    return _ranked_proposals(heap)
+
+
+def _schedule_delta(ctx: LeagueContext, give: Sequence[Player], receive: Sequence[Player]) -> float:
+    """Average schedule outlook of the players received minus that of the players given."""
+    received = math.fsum(map(ctx.schedule_outlook, receive)) / len(receive)
+    given = math.fsum(map(ctx.schedule_outlook, give)) / len(give)
+    return round(received - given, 3)
+
+
+def _ranked_proposals(heap: list[tuple[float, float, int, TradeProposal]]) -> list[TradeProposal]:
+    return [entry[-1] for entry in sorted(heap, reverse=True)]
+
+
+# Largest batch ``evaluate_trades`` scores in one call.
+MAX_TRADE_EVALUATIONS = 1000
+
+
+@dataclass(slots=True)
+class TradeEvaluation:
+    proposals: list[TradeProposal]
+    timing: dict[str, float]
+
+
+def evaluate_trades(
+    league_id: str,
+    proposals: Sequence[tuple[str, Sequence[str], Sequence[str]]],
+    ctx: LeagueContext | None = None,
+) -> TradeEvaluation:
+    """Score ``(team id, offered ids, requested ids)`` proposals in one batched pass.
+
+    Each proposal is judged from the proposing team's side, exactly like
+    ``trade_ideas``. The batch shares one context, one set of player values,
+    one ``LineupEvaluator`` per proposing team and one what-if per distinct
+    give package, so offers that reuse a package only pay for the players
+    they add. Every proposal is validated before any is scored; a malformed
+    one raises ``ValueError`` naming its index.
+    """
+    started = time.perf_counter()
+    if len(proposals) > MAX_TRADE_EVALUATIONS:
+        raise ValueError(f"at most {MAX_TRADE_EVALUATIONS} proposals per batch")
+    if ctx is None:
+        ctx = LeagueContext.load(league_id)
+    loaded = time.perf_counter()
+    owners = {player.id: team_id for team_id in ctx.teams for player in ctx.team_players(team_id)}
+    for index, (team_id, offer, request) in enumerate(proposals):
+        if team_id not in ctx.teams:
+            raise ValueError(f"proposal {index}: unknown team {team_id}")
+        if not offer or not request or len(set(offer)) < len(offer) or len(set(request)) < len(request):
+            raise ValueError(f"proposal {index}: offer and request must be non-empty lists of distinct players")
+        if any(owners.get(player_id) != team_id for player_id in offer):
+            raise ValueError(f"proposal {index}: every offered player must be on team {team_id}")
+        partners = {owners.get(player_id) for player_id in request}
+        if len(partners) != 1 or None in partners or team_id in partners:
+            raise ValueError(f"proposal {index}: requested players must all be on one other team")
+
+    players = {player_id: ctx.players[player_id] for player_id in owners}
+    values = {player_id: ctx.projection(player_id).projected_points for player_id in owners}
+    entries = {player_id: _lineup_candidate(ctx, player) for player_id, player in players.items()}
+    evaluators: dict[str, LineupEvaluator] = {}
+    gives: dict[tuple[str, frozenset[str]], LineupEvaluator] = {}
+    scored = []
+    for team_id, offer, request in proposals:
+        evaluator = evaluators.get(team_id)
+        if evaluator is None:
+            evaluator = evaluators[team_id] = LineupEvaluator.for_team(ctx, team_id)
+        give_key = (team_id, frozenset(offer))
+        after = gives.get(give_key)
+        if after is None:
+            after = gives[give_key] = evaluator.what_if(drop=offer)
+        added = [entries[player_id] for player_id in request if entries[player_id] is not None]
+        lineup_delta = round(after.what_if(add=added).total - evaluator.total, 2)
+        scored.append(
+            TradeProposal(
+                offer_players=tuple(players[player_id] for player_id in offer),
+                request_players=tuple(players[player_id] for player_id in request),
+                offer_value=round(math.fsum(values[player_id] for player_id in offer), 2),
+                request_value=round(math.fsum(values[player_id] for player_id in request), 2),
+                lineup_delta=lineup_delta,
+                playoff_odds_delta=round(lineup_delta * 0.02, 3),
+                notes=f"Optimal lineup {'gains' if lineup_delta >= 0 else 'loses'} {abs(lineup_delta)} pts",
+                schedule_delta=_schedule_delta(
+                    ctx, [players[player_id] for player_id in offer], [players[player_id] for player_id in request]
+                ),
+            )
+        )
+    finished = time.perf_counter()
+    return TradeEvaluation(
+        proposals=scored,
+        timing={
+            "proposals": len(scored),
+            "load_ms": round((loaded - started) * 1000, 3),
+            "score_ms": round((finished - loaded) * 1000, 3),
+            "total_ms": round((finished - started) * 1000, 3),
+            "per_proposal_us": round((finished - loaded) * 1e6 / len(scored), 2) if scored else 0.0,
+        },
     )
-    proposals: list[TradeProposal] = []
-    for other in other_team_rows:
-        other_players = _team_players(other["id"])
-        for give_count in (1, 2):
-            for receive_count in (1, 2):
-                for give in itertools.combinations(team_players, give_count):
-                    for receive in itertools.combinations(other_players, receive_count):
-                        give_value = sum(blend_projections(p.id).projected_points for p in give)
-                        receive_value = sum(blend_projections(p.id).projected_points for p in receive)
-                        lineup_delta = round(receive_value - give_value, 2)
-                        playoff_delta = round(lineup_delta * 0.02, 3)
-                        if lineup_delta <= 0:
-                            continue
-                        proposals.append(
-                            TradeProposal(
-                                offer_players=give,
-                                request_players=receive,
-                                offer_value=round(give_value, 2),
-                                request_value=round(receive_value, 2),
-                                lineup_delta=lineup_delta,
-                                playoff_odds_delta=playoff_delta,
-                                notes="Improves starting lineup with higher floor",
-                            )
-                        )
-    proposals.sort(key=lambda p: p.lineup_delta, reverse=True)
-    return proposals[:3]
-
-
-def simulate_matchup(league_id: str, team_id: str, opponent_team_id: str, runs: int = 500) -> SimulationResult:
-    rng = random.Random(f"{league_id}-{team_id}-{opponent_team_id}")
-    team_players = _team_players(team_id)
-    opponent_players = _team_players(opponent_team_id)
-    team_scores = []
-    opponent_scores = []
-    for _ in range(runs):
-        team_scores.append(_simulate_team_score(rng, team_players))
-        opponent_scores.append(_simulate_team_score(rng, opponent_players))
-    wins = sum(1 for a, b in zip(team_scores, opponent_scores) if a > b)
-    win_probability = wins / runs
+
+
+def simulate_matchup(
+    league_id: str,
+    team_id: str,
+    opponent_team_id: str,
+    runs: int = 500,
+    ctx: LeagueContext | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    *,
+    tolerance: float | None = None,
+    time_budget: float | None = None,
+    simulate: Simulator | None = None,
+) -> SimulationResult:
+    """Simulate up to ``runs`` head-to-head weeks and persist the summary.
+
+    Without ``tolerance`` exactly ``runs`` runs are drawn. With it the
+    simulation is adaptive: it stops early once the 95% Wilson interval on the
+    win probability is at most ``tolerance`` wide on either side, or once
+    ``time_budget`` seconds have passed. The summary reports the runs used and
+    the interval reached.
+
+    Results are stored in ``simulation_results`` under a hash of their inputs
+    and reused while that hash is unchanged (see ``simulation_input_hash``).
+    ``progress`` is called with ``(completed_runs, runs)`` after each batch.
+    Concurrent calls with the same inputs share one run (only its caller sees
+    ``progress``). ``simulate`` replaces ``run_simulation`` for the compute
+    itself; ``analytics_pool`` uses it to run the simulation in a worker.
+    """
+    summary, _ = _shared_simulation(
+        league_id, team_id, opponent_team_id, runs, ctx, progress, tolerance, time_budget, simulate
+    )
+    return summary
+
+
+def _shared_simulation(
+    league_id: str,
+    team_id: str,
+    opponent_team_id: str,
+    runs: int,
+    ctx: LeagueContext | None,
+    progress: Callable[[int, int], None] | None,
+    tolerance: float | None,
+    time_budget: float | None,
+    simulate: Simulator | None,
+) -> tuple[SimulationResult, ScoreDistribution | None]:
+    """Stored or freshly simulated (summary, distribution), one run per key in flight.
+
+    The distribution is ``None`` when the summary came from storage; read it
+    with ``stored_distribution``.
+    """
+    simulate = simulate or run_simulation
+
+    def compute() -> tuple[SimulationResult, ScoreDistribution | None]:
+        context = ctx if ctx is not None else LeagueContext.load(league_id)
+        input_hash = simulation_input_hash(context, team_id, opponent_team_id, runs, tolerance)
+        summary = cached_simulation(input_hash)
+        if summary is not None:
+            if progress is not None:
+                progress(summary.runs, runs)
+            return summary, None
+        summary, distribution = simulate(
+            context, team_id, opponent_team_id, runs, progress, tolerance=tolerance, time_budget=time_budget
+        )
+        save_simulation(team_id, opponent_team_id, summary, input_hash, distribution, runs, tolerance)
+        return summary, distribution
+
+    week = ctx.week if ctx is not None else CURRENT_WEEK
+    key = simulation_key(league_id, team_id, opponent_team_id, week, runs, tolerance)
+    return SIMULATION_FLIGHTS.do(key, compute)
+
+
+def simulation_key(
+    league_id: str, team_id: str, opponent_team_id: str, week: int, runs: int, tolerance: float | None = None
+) -> tuple:
+    """Single-flight key: identical inputs at the same data version."""
+    return (league_id, team_id, opponent_team_id, week, runs, tolerance, db.data_version(*ANALYSIS_INPUT_TABLES))
+
+
+def wilson_interval(successes: int, trials: int, z: float = WILSON_Z) -> tuple[float, float]:
+    """Wilson score interval for a binomial proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+Simulator = Callable[..., tuple[SimulationResult, ScoreDistribution]]
+"""Signature of ``run_simulation``: ``(ctx, team_id, opponent_team_id, runs, progress, *, tolerance, time_budget)``."""
+
+
+def run_simulation(
+    ctx: LeagueContext,
+    team_id: str,
+    opponent_team_id: str,
+    runs: int,
+    progress: Callable[[int, int], None] | None = None,
+    *,
+    tolerance: float | None = None,
+    time_budget: float | None = None,
+) -> tuple[SimulationResult, ScoreDistribution]:
+    """Pure simulation over ``ctx``: no database access, safe in worker processes.
+
+    Returns the summary plus the full per-run distribution for storage.
+    """
+    rng = random.Random(f"{ctx.league_id}-{team_id}-{opponent_team_id}")
+    team_parameters = _score_parameters(ctx, team_id)
+    opponent_parameters = _score_parameters(ctx, opponent_team_id)
+    batch_runs = ADAPTIVE_BATCH_RUNS if tolerance is not None else SIMULATION_BATCH_RUNS
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    team_scores: list[float] = []
+    opponent_scores: list[float] = []
+    wins = 0
+    completed = 0
+    while completed < runs:
+        batch = min(batch_runs, runs - completed)
+        team_batch = _simulate_team_scores(rng, team_parameters, batch)
+        opponent_batch = _simulate_team_scores(rng, opponent_parameters, batch)
+        wins += sum(map(operator.gt, team_batch, opponent_batch))
+        team_scores += team_batch
+        opponent_scores += opponent_batch
+        completed += batch
+        if progress is not None:
+            progress(completed, runs)
+        if tolerance is not None:
+            low, high = wilson_interval(wins, completed)
+            if (high - low) / 2 <= tolerance:
+                break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    win_probability = wins / completed if completed else 0.0
+    low, high = wilson_interval(wins, completed)
     playoff_odds = min(0.99, 0.5 + (win_probability - 0.5) * 1.5)
+    ordered = sorted(team_scores)
     percentiles = {
-        "p10": round(_percentile(team_scores, 10), 2),
-        "p50": round(_percentile(team_scores, 50), 2),
-        "p90": round(_percentile(team_scores, 90), 2),
+        "p10": round(_percentile_sorted(ordered, 10), 2),
+        "p50": round(_percentile_sorted(ordered, 50), 2),
+        "p90": round(_percentile_sorted(ordered, 90), 2),
     }
     summary = SimulationResult(
-        league_id=league_id,
-        week=CURRENT_WEEK,
-        runs=runs,
+        league_id=ctx.league_id,
+        week=ctx.week,
+        runs=completed,
         win_probability=round(win_probability, 3),
         playoff_odds=round(playoff_odds, 3),
         median_score=percentiles["p50"],
         percentiles=percentiles,
+        win_probability_interval=[round(low, 4), round(high, 4)],
     )
+    return summary, ScoreDistribution.from_samples(team_scores, opponent_scores)
+
+
+def simulation_input_hash(
+    ctx: LeagueContext, team_id: str, opponent_team_id: str, runs: int, tolerance: float | None = None
+) -> str:
+    """Content address of a simulation: a digest of everything it reads.
+
+    That is the seed (league and team ids), week, run cap, tolerance, batch
+    sizes, model version and each side's per-player score distribution, which
+    captures both roster composition and projection values. A time budget is
+    not part of it; ``save_simulation`` instead declines to store results the
+    budget cut short, so every stored result is one the inputs fully determine.
+    """
+    inputs = [
+        SIMULATION_MODEL_VERSION,
+        SIMULATION_BATCH_RUNS,
+        ADAPTIVE_BATCH_RUNS,
+        ctx.league_id,
+        ctx.week,
+        runs,
+        tolerance,
+        team_id,
+        _score_parameters(ctx, team_id),
+        opponent_team_id,
+        _score_parameters(ctx, opponent_team_id),
+    ]
+    return hashlib.sha256(json.dumps(inputs).encode("utf-8")).hexdigest()
+
+
+def cached_simulation(input_hash: str) -> SimulationResult | None:
+    """Stored result for ``input_hash`` if it is younger than the cache max age."""
+    max_age = f"-{get_settings().simulation_cache_max_age_hours} hours"
+    row = db.query_one(
+        "SELECT summary FROM simulation_results WHERE id = ? AND run_at >= datetime('now', ?)",
+        (input_hash, max_age),
+    )
+    if row is None:
+        return None
+    metrics.SIMULATION_CACHE_HITS.inc()
+    return SimulationResult(**json.loads(row["summary"]))
+
+
+def save_simulation(
+    team_id: str,
+    opponent_team_id: str,
+    summary: SimulationResult,
+    input_hash: str,
+    distribution: ScoreDistribution,
+    runs: int | None = None,
+    tolerance: float | None = None,
+) -> None:
+    """Count a finished simulation and store it under its input hash.
+
+    Given the requested ``runs`` cap and ``tolerance``, a result that stopped
+    on its time budget short of both is counted but not stored, so a slow
+    moment does not pin a wide interval in the cache.
+    """
+    metrics.SIMULATIONS.inc()
+    metrics.SIMULATION_RUNS.inc(summary.runs)
+    if runs is not None and not reached_target(summary, runs, tolerance):
+        return
     db.execute(
         """
-        INSERT OR REPLACE INTO simulation_results (id, league_id, week, summary)
-        VALUES (?, ?, ?, ?)
+        INSERT OR REPLACE INTO simulation_results
+            (id, league_id, week, team_id, opponent_team_id, runs, summary, distribution)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (
-            f"sim-{league_id}-{team_id}-{opponent_team_id}",
-            league_id,
-            CURRENT_WEEK,
+            input_hash,
+            summary.league_id,
+            summary.week,
+            team_id,
+            opponent_team_id,
+            summary.runs,
             json.dumps(asdict(summary)),
+            distribution.to_bytes(),
         ),
     )
-    return summary
+    DISTRIBUTION_CACHE.put(input_hash, distribution, 0)
+
 
+def reached_target(summary: SimulationResult, runs: int, tolerance: float | None) -> bool:
+    """Whether a simulation hit its ``runs`` cap or its tolerance, not just a time budget."""
+    if summary.runs >= runs:
+        return True
+    if tolerance is None:
+        return False
+    low, high = summary.win_probability_interval
+    # The stored interval is rounded to four places; allow for that.
+    return (high - low) / 2 <= tolerance + 1e-4
 
-def _simulate_team_score(rng: random.Random, players: Iterable[Player]) -> float:
-    total = 0.0
-    for player in players:
-        projection = blend_projections(player.id)
+
+def stored_distribution(input_hash: str) -> ScoreDistribution | None:
+    """Decoded per-run distribution for ``input_hash``, memoized in-process."""
+    distribution = DISTRIBUTION_CACHE.get(input_hash, 0)
+    if distribution is not None:
+        return distribution
+    row = db.query_one("SELECT distribution FROM simulation_results WHERE id = ?", (input_hash,))
+    if row is None or row["distribution"] is None:
+        return None
+    distribution = ScoreDistribution.from_bytes(row["distribution"])
+    DISTRIBUTION_CACHE.put(input_hash, distribution, 0)
+    return distribution
+
+
+def matchup_distribution(
+    league_id: str,
+    team_id: str,
+    opponent_team_id: str,
+    runs: int = 500,
+    ctx: LeagueContext | None = None,
+    *,
+    tolerance: float | None = None,
+    time_budget: float | None = None,
+    simulate: Simulator | None = None,
+) -> ScoreDistribution:
+    """Stored distribution for this matchup, simulating once if none is stored.
+
+    The simulation shares ``simulate_matchup``'s single-flight key, so a
+    distribution query and a matchup request for the same inputs run once.
+    """
+    if ctx is None:
+        ctx = LeagueContext.load(league_id)
+    input_hash = simulation_input_hash(ctx, team_id, opponent_team_id, runs, tolerance)
+    distribution = stored_distribution(input_hash)
+    if distribution is None:
+        _, distribution = _shared_simulation(
+            league_id, team_id, opponent_team_id, runs, ctx, None, tolerance, time_budget, simulate
+        )
+    if distribution is None:
+        distribution = stored_distribution(input_hash)
+    if distribution is None:
+        # Rows written before distributions were stored are recomputed in place.
+        summary, distribution = (simulate or run_simulation)(
+            ctx, team_id, opponent_team_id, runs, None, tolerance=tolerance, time_budget=time_budget
+        )
+        save_simulation(team_id, opponent_team_id, summary, input_hash, distribution, runs, tolerance)
+    return distribution
+
+
+def prune_simulation_results(max_rows: int, max_age_hours: float) -> int:
+    """Delete stored simulations older than ``max_age_hours`` or beyond the newest ``max_rows``."""
+    with db.transaction():
+        db.execute(
+            """
+            DELETE FROM simulation_results
+            WHERE run_at < datetime('now', ?)
+               OR id NOT IN (SELECT id FROM simulation_results ORDER BY run_at DESC, rowid DESC LIMIT ?)
+            """,
+            (f"-{max_age_hours} hours", max_rows),
+        )
+        return db.query_one("SELECT changes() AS n")["n"]
+
+
+def _score_parameters(ctx: LeagueContext, team_id: str) -> list[tuple[float, float]]:
+    """Return the (mean, std_dev) of each rostered player's score."""
+    return _projection_parameters(ctx, (player.id for player in ctx.team_players(team_id)))
+
+
+def _projection_parameters(ctx: LeagueContext, player_ids: Iterable[str]) -> list[tuple[float, float]]:
+    parameters = []
+    for player_id in player_ids:
+        projection = ctx.projection(player_id)
         if projection.projected_points == 0:
             continue
         std_dev = max(2.5, (projection.ceiling - projection.floor) / 3)
-        score = rng.gauss(projection.projected_points, std_dev)
-        score = max(0.0, score)
-        total += score
-    return round(total, 2)
+        parameters.append((projection.projected_points, std_dev))
+    return parameters
+
+
+def _simulate_team_scores(rng: random.Random, parameters: Iterable[tuple[float, float]], runs: int) -> list[float]:
+    """Draw ``runs`` team totals at once, one player column at a time.
+
+    Each column of the (runs x players) score matrix is drawn in a single
+    comprehension, clipped at zero and folded into the running totals with
+    ``map`` so the per-run work stays inside C builtins.
+    """
+    totals = [0.0] * runs
+    gauss = rng.gauss
+    for mean, std_dev in parameters:
+        draws = [gauss(mean, std_dev) for _ in itertools.repeat(None, runs)]
+        totals = list(map(operator.add, totals, map(max, draws, itertools.repeat(0.0))))
+    return totals
 
 
 def _percentile(values: list[float], percentile: float) -> float:
+    return _percentile_sorted(sorted(values), percentile)
+
+
+def _percentile_sorted(values: list[float], percentile: float) -> float:
     if not values:
         return 0.0
-    values = sorted(values)
     k = (len(values) - 1) * percentile / 100
     f = math.floor(k)
     c = math.ceil(k)
@@ -276,14 +1413,136 @@ def _percentile(values: list[float], percentile: float) -> float:
     return values[f] * (c - k) + values[c] * (k - f)
 
 
-def schedule_heatmap(league_id: str) -> list[dict[str, float]]:
-    rows = db.query_all(
-        "SELECT week, home_score, away_score FROM matchups WHERE league_id = ?",
-        (league_id,),
-    )
+def schedule_heatmap(league_id: str, ctx: LeagueContext | None = None) -> list[dict[str, float]]:
+    """Per matchup week: combined fantasy scoring (``pace``) and the average
+    strength-of-schedule factor of the league's rostered position groups."""
+    if ctx is None:
+        ctx = LeagueContext.load(league_id)
+    groups = {(spot.player.team, spot.player.position) for spots in ctx.roster_spots.values() for spot in spots}
     heatmap: defaultdict[int, float] = defaultdict(float)
-    for row in rows:
-        heatmap[row["week"]] += float(row["home_score"]) + float(row["away_score"])
-    return [
-        {"week": week, "pace": round(score, 2)} for week, score in sorted(heatmap.items())
-    ]
+    for matchup in ctx.matchups:
+        heatmap[matchup.week] += float(matchup.home_score) + float(matchup.away_score)
+    rows = []
+    for week, score in sorted(heatmap.items()):
+        factors = [
+            factor for team, position in groups if (factor := SCHEDULE_INDEX.factor(team, position, week)) is not None
+        ]
+        schedule = math.fsum(factors) / len(factors) if factors else 1.0
+        rows.append({"week": week, "pace": round(score, 2), "schedule": round(schedule, 3)})
+    return rows
+
+
+SEASON_SIMULATION_RUNS = 20000
+# Fallback spread for a team without projected players.
+DEFAULT_TEAM_STD_DEV = 25.0
+
+
+def playoff_format(team_count: int, playoff_teams: int | None = None, byes: int | None = None) -> tuple[int, int]:
+    """Playoff spots and first-round byes; defaults follow the common ESPN layout."""
+    if playoff_teams is None:
+        playoff_teams = min(6, max(1, team_count // 2))
+    playoff_teams = min(playoff_teams, team_count)
+    if byes is None:
+        byes = 2 if playoff_teams == 6 else 0
+    return playoff_teams, min(byes, playoff_teams)
+
+
+def _team_strength(ctx: LeagueContext, team: Team) -> tuple[float, float]:
+    """Weekly score (mean, std_dev) of the projected starting lineup, else from season scoring.
+
+    Only starters score, as in ``points_for``; counting the bench would
+    inflate deep rosters.
+    """
+    starters = (player_id for _, player_id in LineupEvaluator.for_team(ctx, team.id).assignment() if player_id)
+    parameters = _projection_parameters(ctx, starters)
+    if parameters:
+        return sum(mean for mean, _ in parameters), math.sqrt(sum(sd * sd for _, sd in parameters))
+    games = team.wins + team.losses + team.ties
+    return (team.points_for / games if games else 0.0), DEFAULT_TEAM_STD_DEV
+
+
+def simulate_season(
+    league_id: str,
+    runs: int = SEASON_SIMULATION_RUNS,
+    ctx: LeagueContext | None = None,
+    *,
+    playoff_teams: int | None = None,
+    byes: int | None = None,
+) -> dict[str, PlayoffOdds]:
+    """Simulate the rest of the season ``runs`` times from current standings.
+
+    Every matchup from ``ctx.week`` on is played out with each team's weekly
+    score drawn from its projected strength. Like ``_simulate_team_scores`` the
+    draws are column-wise: one comprehension per game covers every simulated
+    season, and wins / points are folded in with ``map``. Standings rank by
+    wins (ties count half) then points for, giving playoff, bye and per-seed
+    probabilities for every team in a single pass.
+    """
+    if ctx is None:
+        ctx = LeagueContext.load(league_id)
+    team_ids = list(ctx.teams)
+    if not team_ids or runs < 1:
+        return {}
+    spots, bye_spots = playoff_format(len(team_ids), playoff_teams, byes)
+    index = {team_id: i for i, team_id in enumerate(team_ids)}
+    strength = [_team_strength(ctx, ctx.teams[team_id]) for team_id in team_ids]
+    wins = [[team.wins + team.ties * 0.5] * runs for team in ctx.teams.values()]
+    points = [[float(team.points_for)] * runs for team in ctx.teams.values()]
+    rng = random.Random(f"season-{league_id}-{ctx.week}")
+    gauss = rng.gauss
+    for matchup in ctx.matchups:
+        if matchup.week < ctx.week or matchup.home_team_id not in index or matchup.away_team_id not in index:
+            continue
+        home, away = index[matchup.home_team_id], index[matchup.away_team_id]
+        (home_mean, home_sd), (away_mean, away_sd) = strength[home], strength[away]
+        home_scores = [gauss(home_mean, home_sd) for _ in itertools.repeat(None, runs)]
+        away_scores = [gauss(away_mean, away_sd) for _ in itertools.repeat(None, runs)]
+        wins[home] = list(map(operator.add, wins[home], map(operator.gt, home_scores, away_scores)))
+        wins[away] = list(map(operator.add, wins[away], map(operator.gt, away_scores, home_scores)))
+        points[home] = list(map(operator.add, points[home], home_scores))
+        points[away] = list(map(operator.add, points[away], away_scores))
+    seed_counts = [[0] * spots for _ in team_ids]
+    order = range(len(team_ids))
+    for season_wins, season_points in zip(zip(*wins), zip(*points)):
+        standings = sorted(order, key=lambda t: (season_wins[t], season_points[t]), reverse=True)
+        for seed, team in enumerate(standings[:spots]):
+            seed_counts[team][seed] += 1
+    return {
+        team_id: PlayoffOdds(
+            team_id=team_id,
+            playoff=round(sum(seed_counts[i]) / runs, 4),
+            bye=round(sum(seed_counts[i][:bye_spots]) / runs, 4),
+            seeds=[round(count / runs, 4) for count in seed_counts[i]],
+            mean_wins=round(math.fsum(wins[i]) / runs, 2),
+            runs=runs,
+        )
+        for i, team_id in enumerate(team_ids)
+    }
+
+
+def refresh_playoff_odds(
+    league_id: str,
+    runs: int = SEASON_SIMULATION_RUNS,
+    *,
+    simulate: Callable[..., dict[str, PlayoffOdds]] | None = None,
+) -> dict[str, PlayoffOdds]:
+    """Run ``simulate_season`` with the league's playoff format and store the odds on ``teams``.
+
+    ``simulate`` replaces ``simulate_season`` (same signature), which lets
+    ``analytics_pool`` run the seasons in a worker while the write stays here.
+    """
+    league = db.query_one("SELECT playoff_teams, playoff_byes FROM leagues WHERE id = ?", (league_id,))
+    if league is None:
+        return {}
+    odds = (simulate or simulate_season)(
+        league_id, runs, playoff_teams=league["playoff_teams"], byes=league["playoff_byes"]
+    )
+    db.executemany(
+        """
+        UPDATE teams
+        SET playoff_odds = ?, bye_odds = ?, seed_odds = ?, playoff_odds_updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+        """,
+        [(o.playoff, o.bye, json.dumps(o.seeds), o.team_id) for o in odds.values()],
+    )
+    return odds
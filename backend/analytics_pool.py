@@ -0,0 +1,247 @@
+"""Process pool for the CPU-bound analytics engines.
+
+Matchup and season simulations and trade searches are pure Python loops, so
+on handler and job threads they serialize on the GIL. With
+``ANALYTICS_WORKERS`` > 0 they instead run in warm worker processes: the
+calling thread loads a ``LeagueContext``, ships a picklable ``snapshot()`` of
+it to a worker and persists whatever the worker returns, so workers never open
+the database. Submissions are bounded by
+``ANALYTICS_QUEUE_SIZE`` and callers may pass a ``cancelled`` probe (e.g. "has
+the client disconnected?") to abandon a computation early.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, TypeVar
+
+from . import analysis
+from .config import get_settings
+from .models import PlayoffOdds, SimulationResult, TradeProposal
+
+LOGGER = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.05
+
+T = TypeVar("T")
+
+
+class AnalyticsBusy(RuntimeError):
+    """Every worker is busy and the submission queue is full."""
+
+
+class AnalyticsCancelled(RuntimeError):
+    """The caller gave up on the computation before it finished."""
+
+
+def _init_worker() -> None:
+    # Ctrl-C is handled by the server process, which shuts the pool down.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+class AnalyticsExecutor:
+    def __init__(self, workers: int, max_queued: int) -> None:
+        if workers < 1:
+            raise ValueError("workers must be positive")
+        self.workers = workers
+        # Spawned rather than forked: the server process holds threads and
+        # sqlite connections that must not be duplicated into workers.
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        self._slots = threading.BoundedSemaphore(workers + max(0, max_queued))
+
+    def warm(self) -> list[int]:
+        """Start every worker process up front; returns their pids."""
+        futures = [self._pool.submit(_worker_pid) for _ in range(self.workers)]
+        wait(futures)
+        return sorted({future.result() for future in futures})
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queue ``fn(*args)``; raises ``AnalyticsBusy`` instead of queueing unboundedly."""
+        if not self._slots.acquire(blocking=False):
+            raise AnalyticsBusy("analytics queue is full")
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the worker is done, even if the caller gave up.
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn: Callable[..., Any], *args: Any, cancelled: Callable[[], bool] | None = None) -> Any:
+        """Run ``fn(*args)`` in a worker and wait for it, polling ``cancelled``."""
+        future = self.submit(fn, *args)
+        while True:
+            try:
+                return future.result(timeout=POLL_SECONDS if cancelled else None)
+            except TimeoutError:
+                if cancelled():
+                    # Only a still-queued task can be withdrawn; a running one
+                    # finishes in its worker and the result is dropped.
+                    future.cancel()
+                    raise AnalyticsCancelled from None
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: AnalyticsExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> AnalyticsExecutor | None:
+    """Return the shared executor, or ``None`` when ``ANALYTICS_WORKERS`` is 0."""
+    global _executor
+    settings = get_settings()
+    if settings.analytics_workers < 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = AnalyticsExecutor(settings.analytics_workers, settings.analytics_queue_size)
+        return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def simulate_matchup(
+    league_id: str,
+    team_id: str,
+    opponent_team_id: str,
+    runs: int = 500,
+    *,
+    ctx: analysis.LeagueContext | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    tolerance: float | None = None,
+    time_budget: float | None = None,
+) -> SimulationResult:
+    """``analysis.simulate_matchup`` on the process pool when one is configured.
+
+    Caching and single-flight are ``analysis.simulate_matchup``'s own; only
+    ``run_simulation`` moves to a worker. Progress cannot cross the process
+    boundary, so ``progress`` is called once when the worker finishes.
+    """
+    options = {"ctx": ctx, "progress": progress, "tolerance": tolerance, "time_budget": time_budget}
+    return _pooled(
+        lambda simulate: analysis.simulate_matchup(
+            league_id, team_id, opponent_team_id, runs, simulate=simulate, **options
+        ),
+        cancelled,
+    )
+
+
+def matchup_distribution(
+    league_id: str,
+    team_id: str,
+    opponent_team_id: str,
+    runs: int = 500,
+    *,
+    ctx: analysis.LeagueContext | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    tolerance: float | None = None,
+    time_budget: float | None = None,
+) -> analysis.ScoreDistribution:
+    """``analysis.matchup_distribution`` on the process pool when one is configured."""
+    options = {"ctx": ctx, "tolerance": tolerance, "time_budget": time_budget}
+    return _pooled(
+        lambda simulate: analysis.matchup_distribution(
+            league_id, team_id, opponent_team_id, runs, simulate=simulate, **options
+        ),
+        cancelled,
+    )
+
+
+def _pooled(call: Callable[[analysis.Simulator | None], T], cancelled: Callable[[], bool] | None) -> T:
+    """``call(simulate)`` with a worker-backed simulator, or ``call(None)`` without a pool."""
+    executor = get_executor()
+    if executor is None:
+        return call(None)
+    simulate = functools.partial(_simulate_in_worker, executor, cancelled)
+    while True:
+        try:
+            return call(simulate)
+        except AnalyticsCancelled:
+            if cancelled is None or cancelled():
+                raise
+            # We were sharing a run whose own caller went away; start our own.
+
+
+def _simulate_in_worker(
+    executor: AnalyticsExecutor,
+    cancelled: Callable[[], bool] | None,
+    ctx: analysis.LeagueContext,
+    team_id: str,
+    opponent_team_id: str,
+    runs: int,
+    progress: Callable[[int, int], None] | None = None,
+    **options: Any,
+) -> tuple[SimulationResult, analysis.ScoreDistribution]:
+    """An ``analysis.Simulator`` that runs ``run_simulation`` on a snapshot in a worker."""
+    simulate = functools.partial(analysis.run_simulation, ctx.snapshot(), team_id, opponent_team_id, runs, **options)
+    summary, distribution = executor.run(simulate, cancelled=cancelled)
+    if progress is not None:
+        progress(summary.runs, runs)
+    return summary, distribution
+
+
+def refresh_playoff_odds(
+    league_id: str,
+    runs: int = analysis.SEASON_SIMULATION_RUNS,
+    *,
+    cancelled: Callable[[], bool] | None = None,
+) -> dict[str, PlayoffOdds]:
+    """``analysis.refresh_playoff_odds`` with ``simulate_season`` on the process pool when one is configured."""
+    executor = get_executor()
+    if executor is None:
+        return analysis.refresh_playoff_odds(league_id, runs)
+    simulate = functools.partial(_season_in_worker, executor, cancelled)
+    return analysis.refresh_playoff_odds(league_id, runs, simulate=simulate)
+
+
+def _season_in_worker(
+    executor: AnalyticsExecutor,
+    cancelled: Callable[[], bool] | None,
+    league_id: str,
+    runs: int,
+    **options: Any,
+) -> dict[str, PlayoffOdds]:
+    ctx = analysis.LeagueContext.load(league_id)
+    season = functools.partial(analysis.simulate_season, league_id, runs, ctx.snapshot(), **options)
+    return executor.run(season, cancelled=cancelled)
+
+
+def trade_ideas(
+    league_id: str,
+    team_id: str,
+    *,
+    ctx: analysis.LeagueContext | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    **options: Any,
+) -> list[TradeProposal]:
+    """``analysis.trade_ideas`` on the process pool when one is configured."""
+    executor = get_executor()
+    if executor is None:
+        return analysis.trade_ideas(league_id, team_id, ctx=ctx, **options)
+    if ctx is None:
+        ctx = analysis.LeagueContext.load(league_id)
+    search = functools.partial(analysis.trade_ideas, league_id, team_id, ctx=ctx.snapshot(), **options)
+    return executor.run(search, cancelled=cancelled)
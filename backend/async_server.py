@@ -0,0 +1,204 @@
+"""asyncio HTTP front end serving the same routes as ``server.AppHandler``.
+
+The event loop owns the sockets: it parses request framing, keeps HTTP/1.1
+connections alive and bounds the number of in-flight requests. Each request is
+then dispatched to ``AppHandler`` on a worker thread, so routing, auth and the
+CPU-heavy analytics stay identical to the threading server and never block the
+loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import logging
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable
+
+from .server import MAX_BODY_BYTES, AppHandler, _redact_query
+
+LOGGER = logging.getLogger(__name__)
+
+KEEPALIVE_TIMEOUT = 15.0
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class _LoopWriter:
+    """File-like sink that forwards handler output to the connection's transport."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter) -> None:
+        self._loop = loop
+        self._writer = writer
+
+    def write(self, data: bytes) -> int:
+        if self.closed:
+            # Lets long-lived responses (event streams) notice a gone client.
+            raise BrokenPipeError("connection closed")
+        self._loop.call_soon_threadsafe(self._writer.write, bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    @property
+    def closed(self) -> bool:
+        return self._writer.is_closing()
+
+
+class _DispatchHandler(AppHandler):
+    """``AppHandler`` driven from an in-memory request instead of a socket."""
+
+    protocol_version = "HTTP/1.1"
+
+    def __init__(
+        self,
+        raw_request: bytes,
+        client_address: tuple,
+        wfile: _LoopWriter,
+        reader: asyncio.StreamReader | None = None,
+    ) -> None:
+        # Deliberately skip BaseRequestHandler.__init__, which would read from a socket.
+        self.rfile = io.BytesIO(raw_request)
+        self.wfile = wfile
+        self.client_address = client_address
+        self.server = None
+        self.close_connection = True
+        self._reader = reader
+        self.detached: Future | None = None
+
+    def client_disconnected(self) -> bool:
+        return self.wfile.closed or (self._reader is not None and self._reader.at_eof())
+
+    def detach_stream(self) -> tuple[_LoopWriter, Callable[[], None]]:
+        # The connection task waits on ``detached`` without holding a slot.
+        self.close_connection = True
+        self.detached = Future()
+
+        def close() -> None:
+            try:
+                self.detached.set_result(None)
+            except InvalidStateError:
+                pass
+
+        return self.wfile, close
+
+    def dispatch(self) -> tuple[bool, Future | None]:
+        """Handle the request; returns whether the connection may be reused and
+        the future a detached stream resolves when it ends."""
+        self.handle_one_request()
+        return not self.close_connection, self.detached
+
+
+class _FramingError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _content_length(head: bytes) -> int:
+    """Body length from the request head; raises ``_FramingError`` for bodies we will not read."""
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"transfer-encoding":
+            raise _FramingError(HTTPStatus.NOT_IMPLEMENTED, "Transfer-Encoding is not supported; send Content-Length")
+        if name == b"content-length":
+            try:
+                length = int(value.strip() or 0)
+            except ValueError:
+                raise _FramingError(HTTPStatus.BAD_REQUEST, "invalid Content-Length") from None
+    if length < 0:
+        raise _FramingError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise _FramingError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"request body exceeds {MAX_BODY_BYTES} bytes")
+    return length
+
+
+def _error_response(status: HTTPStatus, message: str) -> bytes:
+    body = json.dumps({"error": message}).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class AsyncAppServer:
+    def __init__(self, host: str, port: int, *, max_concurrency: int = 64, workers: int = 16) -> None:
+        self.host = host
+        self.port = port
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-worker")
+        self._max_concurrency = max_concurrency
+        self._slots: asyncio.Semaphore | None = None
+        self._stopping: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def serve_forever(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self._max_concurrency)
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES)
+        LOGGER.info("Async server listening on %s:%s", self.host, self.port)
+        try:
+            async with server:
+                await self._stopping.wait()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self) -> None:
+        """Stop serving; safe to call from any thread."""
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername") or ("unknown", 0)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                    length = _content_length(head)
+                    body = await reader.readexactly(length) if length else b""
+                except _FramingError as exc:
+                    writer.write(_error_response(exc.status, str(exc)))
+                    await writer.drain()
+                    break
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, TimeoutError, ValueError):
+                    break
+                async with self._slots:
+                    keep_alive, detached = await self._loop.run_in_executor(
+                        self._executor, self._dispatch, head + body, peer, reader, writer
+                    )
+                await writer.drain()
+                if detached is not None:
+                    # Event streams run on their own thread; hold the socket open until they end.
+                    await asyncio.wrap_future(detached)
+                    break
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown cancels open connections; a request still running
+            # on a worker finishes there and its output is dropped.
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(
+        self, raw_request: bytes, peer: tuple, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> tuple[bool, Future | None]:
+        handler = _DispatchHandler(raw_request, peer, _LoopWriter(self._loop, writer), reader)
+        try:
+            return handler.dispatch()
+        except Exception:
+            LOGGER.exception("Request failed: %s", _redact_query(getattr(handler, "requestline", "")))
+            return False, handler.detached
+
+
+def serve(host: str, port: int, *, max_concurrency: int, workers: int) -> None:
+    server = AsyncAppServer(host, port, max_concurrency=max_concurrency, workers=workers)
+    asyncio.run(server.serve_forever())
@@ -0,0 +1,140 @@
+"""Thread-safe in-process caches shared across request and job threads."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+_registry: dict[str, "VersionedLRUCache"] = {}
+_flights: dict[str, "SingleFlight"] = {}
+_registry_lock = threading.Lock()
+
+
+class VersionedLRUCache:
+    """Bounded LRU cache whose entries are stamped with a data version.
+
+    Callers read the relevant ``db.data_version(...)`` *before* loading data and
+    pass it to both ``get`` and ``put``. An entry only counts as a hit when its
+    stamp matches the requested version, so a write anywhere in the dependent
+    tables invalidates every entry without walking the cache.
+    """
+
+    def __init__(self, name: str, max_size: int = 4096) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        self.name = name
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[Hashable, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        with _registry_lock:
+            _registry[name] = self
+
+    def get(self, key: Hashable, version: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, version: Hashable) -> None:
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def all_caches() -> list[VersionedLRUCache]:
+    with _registry_lock:
+        return list(_registry.values())
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one computation.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in
+    flight block and receive the same result (or exception). Nothing is kept
+    once the call completes, so keys should embed a data version and pair with
+    a cache when results should outlive the flight.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+        with _registry_lock:
+            _flights[name] = self
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"name": self.name, "in_flight": len(self._calls), "leaders": self.leaders, "shared": self.shared}
+
+
+def all_flights() -> list[SingleFlight]:
+    with _registry_lock:
+        return list(_flights.values())
@@ -1,6 +1,7 @@
 """Application configuration helpers."""
 from __future__ import annotations
 
+import functools
 import os
 from dataclasses import dataclass
 from pathlib import Path
@@ -18,6 +19,20 @@ class Settings:
     whats_new_url: str
     background_jobs_enabled: bool
     projection_sources: tuple[str, ...]
+    projection_cache_size: int
+    server_mode: str
+    server_max_concurrency: int
+    server_workers: int
+    dashboard_workers: int
+    dashboard_deadline_seconds: float
+    sse_max_streams: int
+    analytics_workers: int
+    analytics_queue_size: int
+    simulation_cache_max_rows: int
+    simulation_cache_max_age_hours: int
+    current_week: int
+    season_final_week: int
+    playoff_start_week: int
 
 
 def _env_bool(key: str, default: bool) -> bool:
@@ -27,7 +42,13 @@ def _env_bool(key: str, default: bool) -> bool:
     return value.lower() in {"1", "true", "yes", "on"}
 
 
+@functools.lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """Settings resolved from the environment once per process.
+
+    Hot paths (connection lookup, cache versions) call this constantly, so the
+    result is cached. Call ``reset_settings()`` after changing the environment.
+    """
     root = Path(__file__).resolve().parents[1]
     database_url = os.environ.get("DATABASE_URL")
     if not database_url:
@@ -51,4 +72,23 @@ def get_settings() -> Settings:
             "nfldata",
             "mock-blend",
         ),
+        projection_cache_size=int(os.environ.get("PROJECTION_CACHE_SIZE", "8192")),
+        server_mode=os.environ.get("SERVER_MODE", "threading").lower(),
+        server_max_concurrency=int(os.environ.get("SERVER_MAX_CONCURRENCY", "64")),
+        server_workers=int(os.environ.get("SERVER_WORKERS", "16")),
+        dashboard_workers=int(os.environ.get("DASHBOARD_WORKERS", "8")),
+        dashboard_deadline_seconds=float(os.environ.get("DASHBOARD_DEADLINE_SECONDS", "5")),
+        sse_max_streams=int(os.environ.get("SSE_MAX_STREAMS", "32")),
+        analytics_workers=int(os.environ.get("ANALYTICS_WORKERS", "0")),
+        analytics_queue_size=int(os.environ.get("ANALYTICS_QUEUE_SIZE", "32")),
+        simulation_cache_max_rows=int(os.environ.get("SIMULATION_CACHE_MAX_ROWS", "5000")),
+        simulation_cache_max_age_hours=int(os.environ.get("SIMULATION_CACHE_MAX_AGE_HOURS", "168")),
+        current_week=int(os.environ.get("CURRENT_WEEK", "8")),
+        season_final_week=int(os.environ.get("SEASON_FINAL_WEEK", "17")),
+        playoff_start_week=int(os.environ.get("PLAYOFF_START_WEEK", "15")),
     )
+
+
+def reset_settings() -> None:
+    """Re-read the environment on the next ``get_settings()`` call."""
+    get_settings.cache_clear()
@@ -1,52 +1,245 @@
 """Database utilities built on sqlite3."""
 from __future__ import annotations
 
+import hashlib
+import logging
 import sqlite3
-from contextlib import contextmanager
+import threading
+import time
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator
 
+from . import metrics
 from .config import get_settings
 
-_connection_cache: dict[str, sqlite3.Connection] = {}
+LOGGER = logging.getLogger(__name__)
 
+# Connections are pooled per (thread, database, mode): every worker thread gets
+# its own reader and writer, so commits and rollbacks never interleave across
+# threads. Writers are additionally serialized per database in-process; with WAL
+# journaling readers keep working against the last committed snapshot meanwhile.
+_pool: dict[tuple[int, str, bool], sqlite3.Connection] = {}
+_pool_lock = threading.Lock()
+_write_locks: dict[str, threading.RLock] = {}
+# Per-thread unit-of-work state: open transaction depth per database.
+_tx_state = threading.local()
 
-def _ensure_connection() -> sqlite3.Connection:
-    settings = get_settings()
-    path = Path(settings.database_url)
+BUSY_TIMEOUT_MS = 5000
+_PRAGMAS = (
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA journal_mode = WAL;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA cache_size = -16384;",
+    "PRAGMA mmap_size = 268435456;",
+    "PRAGMA temp_store = MEMORY;",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};",
+)
+
+# Per-table write counters live in the database itself: ``table_versions`` is
+# bumped by triggers that run_migrations installs on every table, so a commit
+# from any connection or process (a cron-driven job run, a second server)
+# invalidates version-stamped caches here. Each thread keeps the counters it
+# last read and re-reads them only when its reader's ``PRAGMA data_version``
+# reports a commit from another connection.
+_VERSION_EVENTS = ("INSERT", "UPDATE", "DELETE")
+_UNVERSIONED_TABLES = frozenset({"table_versions", "schema_migrations"})
+_version_state = threading.local()
+
+
+def _connect(database_url: str, readonly: bool) -> sqlite3.Connection:
+    path = Path(database_url)
     path.parent.mkdir(parents=True, exist_ok=True)
-    cached = _connection_cache.get(settings.database_url)
-    if cached is not None:
-        return cached
     conn = sqlite3.connect(
-        settings.database_url,
+        database_url,
         detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=BUSY_TIMEOUT_MS / 1000,
         check_same_thread=False,
     )
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    _connection_cache[settings.database_url] = conn
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+    if readonly:
+        conn.execute("PRAGMA query_only = ON;")
+    return conn
+
+
+def _reap_dead_threads() -> None:
+    alive = {thread.ident for thread in threading.enumerate()}
+    for key in [key for key in _pool if key[0] not in alive]:
+        _pool.pop(key).close()
+
+
+def _ensure_connection(readonly: bool = False) -> sqlite3.Connection:
+    """Return the calling thread's pooled connection for the configured database."""
+    database_url = get_settings().database_url
+    key = (threading.get_ident(), database_url, readonly)
+    conn = _pool.get(key)
+    if conn is not None:
+        return conn
+    with _pool_lock:
+        _reap_dead_threads()
+        conn = _connect(database_url, readonly)
+        _pool[key] = conn
+        _write_locks.setdefault(database_url, threading.RLock())
     return conn
 
 
+def _write_lock() -> threading.RLock:
+    database_url = get_settings().database_url
+    with _pool_lock:
+        return _write_locks.setdefault(database_url, threading.RLock())
+
+
+def close_all() -> None:
+    """Empty the pool, e.g. before switching or deleting a database.
+
+    Connections of the calling thread and of finished threads are closed. Those
+    of other live threads are only dropped from the pool: closing a connection
+    while its thread runs a statement on it crashes sqlite, so they close once
+    their thread lets go of them.
+    """
+    current = threading.get_ident()
+    alive = {thread.ident for thread in threading.enumerate()}
+    with _pool_lock:
+        for (ident, _, _), conn in _pool.items():
+            if ident == current or ident not in alive:
+                conn.close()
+        _pool.clear()
+
+
+def _transaction_depths() -> dict[str, int]:
+    depths = getattr(_tx_state, "depths", None)
+    if depths is None:
+        depths = _tx_state.depths = {}
+    return depths
+
+
+def in_transaction() -> bool:
+    return _transaction_depths().get(get_settings().database_url, 0) > 0
+
+
 @contextmanager
-def get_cursor() -> Iterator[sqlite3.Cursor]:
+def transaction() -> Iterator[sqlite3.Connection]:
+    """Group every statement issued in the block into one commit.
+
+    Nested blocks become savepoints: an exception inside a nested block rolls
+    back only that block, while the outermost block commits (or rolls back)
+    everything. Reads inside the block see its uncommitted writes.
+    """
+    database_url = get_settings().database_url
+    depths = _transaction_depths()
+    depth = depths.get(database_url, 0)
     conn = _ensure_connection()
-    cursor = conn.cursor()
+    with _write_lock():
+        savepoint = f"sp_{depth}"
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        depths[database_url] = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            if depth == 0:
+                conn.rollback()
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            if depth == 0:
+                conn.commit()
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+        finally:
+            depths[database_url] = depth
+
+
+@contextmanager
+def get_cursor(readonly: bool = False) -> Iterator[sqlite3.Cursor]:
+    if in_transaction():
+        # Inside a unit of work: share its connection and leave commit to it.
+        cursor = _ensure_connection().cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+        return
+    conn = _ensure_connection(readonly)
+    lock = nullcontext() if readonly else _write_lock()
+    with lock:
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+def _committed_versions() -> dict[str, int]:
+    url = get_settings().database_url
+    conn = _ensure_connection(readonly=True)
+    marker = conn.execute("PRAGMA data_version").fetchone()[0]
+    snapshots = getattr(_version_state, "snapshots", None)
+    if snapshots is None:
+        snapshots = _version_state.snapshots = {}
+    cached = snapshots.get(url)
+    if cached is not None and cached[0] is conn and cached[1] == marker:
+        return cached[2]
     try:
-        yield cursor
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cursor.close()
+        versions = {row[0]: row[1] for row in conn.execute("SELECT name, version FROM table_versions")}
+    except sqlite3.OperationalError:
+        # Migrations have not created the table yet: nothing is versioned.
+        versions = {}
+    snapshots[url] = (conn, marker, versions)
+    return versions
+
+
+def data_version(*tables: str) -> tuple[int, ...]:
+    """Return the committed write version of each table in ``tables``.
+
+    Versions come from the database, so they change whenever any connection
+    commits a write to the table. Writes inside the calling thread's open
+    transaction count once it commits. The database's random epoch is folded
+    into every value, so versions never collide across database files.
+    """
+    versions = _committed_versions()
+    epoch = versions.get("", 0) << 64
+    return tuple(epoch | versions.get(table, 0) for table in tables)
+
+
+def _install_version_triggers() -> None:
+    """Create the ``table_versions`` row and write triggers for every table."""
+    tables = {row["name"] for row in query_all("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "table_versions" not in tables:
+        return
+    triggers = {row["name"] for row in query_all("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    for table in sorted(tables - _UNVERSIONED_TABLES):
+        if table.startswith("sqlite_"):
+            continue
+        execute("INSERT OR IGNORE INTO table_versions (name) VALUES (?)", (table,))
+        for event in _VERSION_EVENTS:
+            trigger = f"{table}_version_{event.lower()}"
+            if trigger in triggers:
+                continue
+            execute(
+                f"""
+                CREATE TRIGGER "{trigger}" AFTER {event} ON "{table}"
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                END
+                """
+            )
 
 
 def query_all(query: str, params: tuple | list | None = None) -> list[sqlite3.Row]:
     if params is None:
         params = ()
-    with get_cursor() as cursor:
+    with metrics.DB_QUERY_SECONDS.time("read"), get_cursor(readonly=True) as cursor:
         cursor.execute(query, params)
         return cursor.fetchall()
 
@@ -59,21 +252,95 @@ def query_one(query: str, params: tuple | list | None = None) -> sqlite3.Row | N
 def execute(query: str, params: tuple | list | None = None) -> None:
     if params is None:
         params = ()
-    with get_cursor() as cursor:
+    with metrics.DB_QUERY_SECONDS.time("write"), get_cursor() as cursor:
         cursor.execute(query, params)
 
 
-def executemany(query: str, seq: list[tuple]) -> None:
-    with get_cursor() as cursor:
+def executemany(query: str, seq: Iterable[tuple]) -> None:
+    """Run ``query`` once per parameter tuple in a single statement batch.
+
+    Combined with ``INSERT OR REPLACE``/``ON CONFLICT`` this is the bulk upsert
+    path; inside ``transaction()`` it shares the surrounding commit.
+    """
+    with metrics.DB_QUERY_SECONDS.time("write_many"), get_cursor() as cursor:
         cursor.executemany(query, seq)
 
 
-def run_migrations() -> None:
-    """Apply SQL migrations in order."""
-    migrations_dir = Path(__file__).resolve().parents[1] / "migrations"
-    paths = sorted(p for p in migrations_dir.glob("*.sql"))
-    for path in paths:
-        with path.open("r", encoding="utf-8") as handle:
-            sql = handle.read()
-        with get_cursor() as cursor:
-            cursor.executescript(sql)
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+
+
+class _DryRunRollback(Exception):
+    pass
+
+
+def _split_statements(sql: str) -> Iterator[str]:
+    buffer = ""
+    for line in sql.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            buffer = ""
+            if statement:
+                yield statement
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def applied_migrations() -> dict[str, str]:
+    """Return ``{version: checksum}`` for every recorded migration."""
+    execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            checksum TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            duration_ms REAL NOT NULL DEFAULT 0
+        )
+        """
+    )
+    return {row["version"]: row["checksum"] for row in query_all("SELECT version, checksum FROM schema_migrations")}
+
+
+def run_migrations(migrations_dir: Path | None = None, *, dry_run: bool = False) -> list[dict]:
+    """Apply pending SQL migrations in order, each inside its own transaction.
+
+    Applied versions and checksums are recorded in ``schema_migrations`` so
+    startup only touches files it has not seen. Every run then installs the
+    ``table_versions`` write triggers on any table that lacks them. With ``dry_run`` the pending
+    migrations run against the live database and are rolled back, which makes
+    it possible to time them on production-sized data. Returns one
+    ``{"version", "checksum", "duration_ms"}`` entry per migration run.
+    """
+    applied = applied_migrations()
+    pending = []
+    for path in sorted((migrations_dir or MIGRATIONS_DIR).glob("*.sql")):
+        sql = path.read_text(encoding="utf-8")
+        checksum = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+        if path.stem in applied:
+            if applied[path.stem] != checksum:
+                LOGGER.warning("Migration %s changed after it was applied; not re-running", path.stem)
+            continue
+        pending.append((path.stem, sql, checksum))
+    report: list[dict] = []
+    outer = transaction() if dry_run else nullcontext()
+    try:
+        with outer:
+            for version, sql, checksum in pending:
+                start = time.perf_counter()
+                with transaction():
+                    for statement in _split_statements(sql):
+                        execute(statement)
+                    duration_ms = round((time.perf_counter() - start) * 1000, 3)
+                    execute(
+                        "INSERT INTO schema_migrations (version, checksum, duration_ms) VALUES (?, ?, ?)",
+                        (version, checksum, duration_ms),
+                    )
+                report.append({"version": version, "checksum": checksum, "duration_ms": duration_ms})
+                LOGGER.info("Applied migration %s in %.1f ms%s", version, duration_ms, " (dry run)" if dry_run else "")
+            with transaction():
+                _install_version_triggers()
+            if dry_run:
+                raise _DryRunRollback
+    except _DryRunRollback:
+        pass
+    return report
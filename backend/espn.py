@@ -74,6 +74,7 @@ class MockESPNProvider(ESPNProvider):
                     "name": league["name"],
                     "season": league["season"],
                     "scoring_type": league.get("scoring_type", "PPR"),
+                    "settings": league.get("settings", {}),
                     "teams": league["teams"],
                 }
             )
@@ -118,6 +119,11 @@ class RealESPNProvider(ESPNProvider):
                     "name": f"ESPN League {season}",
                     "season": season,
                     "scoring_type": rng.choice(["PPR", "Half-PPR", "Standard"]),
+                    "settings": {
+                        "playoff_teams": 2,
+                        "playoff_byes": 0,
+                        "lineup_slots": {"QB": 1, "RB": 2, "WR": 2, "TE": 1, "FLEX": 1, "BE": 6, "IR": 1},
+                    },
                     "teams": [
                         {
                             "id": f"team-{league_id}-{idx}",
@@ -162,56 +168,118 @@ def sync_leagues(user_id: str, provider_name: str | None = None) -> list[dict[st
     if not credential:
         raise ValueError("No ESPN credential found")
     leagues = provider.fetch_leagues(credential["access_token"])
-    # Persist leagues + teams
+    # Persist leagues + teams in one unit of work
+    with db.transaction():
+        upsert_leagues(leagues, user_id)
+        team_rows = []
+        member_rows = []
+        for league in leagues:
+            for team in league.get("teams", []):
+                owner_email = team.get("owner_email")
+                owner = None
+                if owner_email:
+                    owner = db.query_one("SELECT id FROM users WHERE email = ?", (owner_email.lower(),))
+                    if not owner:
+                        from .auth import _ensure_user  # local import to avoid cycle
+
+                        owner_id = _ensure_user(owner_email.lower())
+                        owner = {"id": owner_id}
+                team_rows.append(
+                    (
+                        team["id"],
+                        league["id"],
+                        team["name"],
+                        owner["id"] if owner else None,
+                        team.get("wins", 0),
+                        team.get("losses", 0),
+                        team.get("ties", 0),
+                        team.get("points_for", 0.0),
+                        team.get("points_against", 0.0),
+                        team.get("playoff_odds", 0.5),
+                    )
+                )
+                if owner:
+                    member_rows.append((f"member-{owner['id']}-{league['id']}", league["id"], owner["id"], team["id"]))
+        upsert_teams(team_rows)
+        db.executemany(
+            "INSERT OR IGNORE INTO league_members (id, league_id, user_id, team_id, role) VALUES (?, ?, ?, ?, 'manager')",
+            member_rows,
+        )
+    return leagues
+
+
+def upsert_leagues(leagues: Iterable[dict[str, Any]], owner_id: str | None) -> None:
+    """Insert or update provider leagues, writing only the columns sync owns.
+
+    ``is_active`` is the user's choice and is set only when a league is first
+    seen. The playoff format and roster slot counts come from the league's
+    ``settings``; a setting the provider omits keeps its stored value.
+    """
+    rows = []
     for league in leagues:
-        db.execute(
-            """
-            INSERT OR REPLACE INTO leagues (id, espn_league_id, season, name, scoring_type, is_active, user_owner_id)
-            VALUES (?, ?, ?, ?, ?, 1, ?)
-            """,
+        settings = league.get("settings", {})
+        lineup_slots = settings.get("lineup_slots")
+        rows.append(
             (
                 league["id"],
                 league.get("espn_league_id", league["id"]),
                 league["season"],
                 league["name"],
                 league.get("scoring_type", "PPR"),
-                user_id,
-            ),
-        )
-        for team in league.get("teams", []):
-            owner_email = team.get("owner_email")
-            owner = None
-            if owner_email:
-                owner = db.query_one("SELECT id FROM users WHERE email = ?", (owner_email.lower(),))
-                if not owner:
-                    from .auth import _ensure_user  # local import to avoid cycle
-
-                    owner_id = _ensure_user(owner_email.lower())
-                    owner = {"id": owner_id}
-            db.execute(
-                """
-                INSERT OR REPLACE INTO teams (id, league_id, name, owner_user_id, wins, losses, ties, points_for, points_against, playoff_odds)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    team["id"],
-                    league["id"],
-                    team["name"],
-                    owner["id"] if owner else None,
-                    team.get("wins", 0),
-                    team.get("losses", 0),
-                    team.get("ties", 0),
-                    team.get("points_for", 0.0),
-                    team.get("points_against", 0.0),
-                    team.get("playoff_odds", 0.5),
-                ),
+                owner_id,
+                settings.get("playoff_teams"),
+                settings.get("playoff_byes"),
+                json.dumps(lineup_slots) if lineup_slots else None,
             )
-            if owner:
-                db.execute(
-                    "INSERT OR IGNORE INTO league_members (id, league_id, user_id, team_id, role) VALUES (?, ?, ?, ?, 'manager')",
-                    (f"member-{owner['id']}-{league['id']}", league["id"], owner["id"], team["id"]),
-                )
-    return leagues
+        )
+    db.executemany(
+        """
+        INSERT INTO leagues
+            (id, espn_league_id, season, name, scoring_type, is_active, user_owner_id,
+             playoff_teams, playoff_byes, lineup_slots)
+        VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            espn_league_id = excluded.espn_league_id,
+            season = excluded.season,
+            name = excluded.name,
+            scoring_type = excluded.scoring_type,
+            user_owner_id = COALESCE(excluded.user_owner_id, leagues.user_owner_id),
+            playoff_teams = COALESCE(excluded.playoff_teams, leagues.playoff_teams),
+            playoff_byes = COALESCE(excluded.playoff_byes, leagues.playoff_byes),
+            lineup_slots = COALESCE(excluded.lineup_slots, leagues.lineup_slots)
+        """,
+        rows,
+    )
+
+
+def upsert_teams(rows: Iterable[tuple]) -> None:
+    """Insert or update teams from ``(id, league_id, name, owner_user_id, wins, losses,
+    ties, points_for, points_against, playoff_odds)`` rows.
+
+    The provider's ``playoff_odds`` only seeds a team until the season
+    simulator has written its own; ``bye_odds`` and ``seed_odds`` are never
+    touched.
+    """
+    db.executemany(
+        """
+        INSERT INTO teams (id, league_id, name, owner_user_id, wins, losses, ties, points_for, points_against, playoff_odds)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            league_id = excluded.league_id,
+            name = excluded.name,
+            owner_user_id = excluded.owner_user_id,
+            wins = excluded.wins,
+            losses = excluded.losses,
+            ties = excluded.ties,
+            points_for = excluded.points_for,
+            points_against = excluded.points_against,
+            playoff_odds = CASE
+                WHEN teams.playoff_odds_updated_at IS NULL THEN excluded.playoff_odds
+                ELSE teams.playoff_odds
+            END
+        """,
+        rows,
+    )
 
 
 def active_leagues_for_user(user_id: str) -> list[dict[str, Any]]:
@@ -231,13 +299,12 @@ def active_leagues_for_user(user_id: str) -> list[dict[str, Any]]:
 def set_active_leagues(user_id: str, league_ids: Iterable[str]) -> None:
     ids = set(league_ids)
     rows = db.query_all("SELECT id FROM leagues")
-    for row in rows:
-        db.execute(
+    with db.transaction():
+        db.executemany(
             "UPDATE leagues SET is_active = ? WHERE id = ?",
-            (1 if row["id"] in ids else 0, row["id"]),
+            [(1 if row["id"] in ids else 0, row["id"]) for row in rows],
         )
-    for league_id in ids:
-        db.execute(
+        db.executemany(
             "INSERT OR IGNORE INTO league_members (id, league_id, user_id, team_id, role) VALUES (?, ?, ?, NULL, 'viewer')",
-            (f"member-{user_id}-{league_id}", league_id, user_id),
+            [(f"member-{user_id}-{league_id}", league_id, user_id) for league_id in ids],
         )
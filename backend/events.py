@@ -0,0 +1,86 @@
+"""In-process publish/subscribe hub for pushing data changes to live clients.
+
+Background jobs publish a topic whenever they change data the dashboard is
+derived from; streaming endpoints subscribe and re-send the affected cards.
+Delivery is best effort: each subscriber has a bounded queue and drops the
+oldest events rather than stalling publishers behind a slow client.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+LOGGER = logging.getLogger(__name__)
+
+PROJECTIONS = "projections"
+INJURIES = "injuries"
+
+MAX_PENDING_EVENTS = 64
+
+_subscribers: set["Subscription"] = set()
+_subscribers_lock = threading.Lock()
+
+
+@dataclass(eq=False)
+class Event:
+    topic: str
+    payload: dict[str, Any] = field(default_factory=dict)
+
+
+class Subscription:
+    def __init__(self, topics: frozenset[str] | None) -> None:
+        self.topics = topics
+        self._queue: queue.Queue[Event] = queue.Queue(maxsize=MAX_PENDING_EVENTS)
+
+    def wants(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
+    def deliver(self, event: Event) -> None:
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float | None = None) -> Event | None:
+        """Return the next event, or ``None`` if none arrives within ``timeout``."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        with _subscribers_lock:
+            _subscribers.discard(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def subscribe(*topics: str) -> Subscription:
+    """Register for ``topics`` (every topic when none are given)."""
+    subscription = Subscription(frozenset(topics) if topics else None)
+    with _subscribers_lock:
+        _subscribers.add(subscription)
+    return subscription
+
+
+def publish(topic: str, **payload: Any) -> int:
+    """Fan ``topic`` out to current subscribers; returns how many received it."""
+    event = Event(topic, payload)
+    with _subscribers_lock:
+        targets = [sub for sub in _subscribers if sub.wants(topic)]
+    for subscription in targets:
+        subscription.deliver(event)
+    LOGGER.debug("Published %s to %s subscribers", topic, len(targets))
+    return len(targets)
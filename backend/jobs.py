@@ -7,7 +7,7 @@ import threading
 import time
 from datetime import datetime, timedelta
 
-from . import analysis, db
+from . import analysis, analytics_pool, db, events, metrics
 from .config import get_settings
 from .notifications import queue_notification
 
@@ -25,10 +25,14 @@ class JobThread(threading.Thread):
 
     def _run_wrapper(self) -> None:
         while not self._stop_event.is_set():
+            start = time.perf_counter()
             try:
                 self._target()
             except Exception as exc:  # pragma: no cover - logging side effect
+                metrics.JOB_FAILURES.inc(1, self.name)
                 LOGGER.exception("Job %s failed: %s", self.name, exc)
+            finally:
+                metrics.JOB_RUN_SECONDS.observe(time.perf_counter() - start, self.name)
             self._stop_event.wait(self.interval)
 
     def stop(self) -> None:
@@ -38,34 +42,145 @@ class JobThread(threading.Thread):
 _threads: list[JobThread] = []
 
 
-def refresh_projections() -> None:
-    rows = db.query_all("SELECT DISTINCT player_id, week FROM projections")
-    for row in rows:
-        projection = analysis.blend_projections(row["player_id"], row["week"])
+def refresh_projections() -> int:
+    """Nightly re-blend of changed projections into ``blended_projections``.
+
+    Reads between runs usually find nothing left to do, since
+    ``analysis.refresh_rest_of_season`` materializes projection writes as they
+    are seen; this catches anything still pending and announces the change.
+    Returns the number of refreshed pairs.
+    """
+    refreshed = analysis.materialize_projection_changes()
+    LOGGER.info("Refreshed %s blended projections", refreshed)
+    if refreshed:
+        events.publish(events.PROJECTIONS, refreshed=refreshed)
+    return refreshed
+
+
+# Per (NFL team, position, week): the average of each player's projection that
+# week over the player's own mean projection.
+_SCHEDULE_STRENGTH_CTE = """
+    WITH ratios AS (
+        SELECT players.team AS nfl_team, players.position AS position, blended.week AS week,
+               blended.projected_points
+                   / AVG(blended.projected_points) OVER (PARTITION BY blended.player_id) AS ratio
+        FROM blended_projections AS blended
+        JOIN players ON players.id = blended.player_id
+        WHERE COALESCE(players.team, '') != ''
+    ),
+    strength AS (
+        SELECT nfl_team, position, week, ROUND(AVG(ratio), 3) AS factor, COUNT(*) AS player_count
+        FROM ratios
+        WHERE ratio IS NOT NULL
+        GROUP BY nfl_team, position, week
+    )
+"""
+
+
+def refresh_schedule_strength() -> int:
+    """Rebuild the ``schedule_strength`` index from ``blended_projections``.
+
+    Only changed (team, position, week) groups are upserted, and groups that
+    no longer have projections are deleted. Returns the number of refreshed
+    groups.
+    """
+    with db.transaction():
         db.execute(
-            "UPDATE projections SET projected_points = ?, floor = ?, ceiling = ?, updated_at = ? WHERE player_id = ? AND week = ? AND source = ?",
-            (
-                projection.projected_points,
-                projection.floor,
-                projection.ceiling,
-                datetime.utcnow().isoformat(),
-                projection.player_id,
-                projection.week,
-                "blended",
-            ),
+            _SCHEDULE_STRENGTH_CTE
+            + """
+            INSERT INTO schedule_strength (nfl_team, position, week, factor, player_count, refreshed_at)
+            SELECT strength.nfl_team, strength.position, strength.week, strength.factor, strength.player_count,
+                   CURRENT_TIMESTAMP
+            FROM strength
+            LEFT JOIN schedule_strength AS current
+                ON current.nfl_team = strength.nfl_team
+               AND current.position = strength.position
+               AND current.week = strength.week
+            WHERE current.factor IS NULL
+               OR current.factor != strength.factor
+               OR current.player_count != strength.player_count
+            ON CONFLICT (nfl_team, position, week) DO UPDATE SET
+                factor = excluded.factor,
+                player_count = excluded.player_count,
+                refreshed_at = excluded.refreshed_at
+            """
         )
+        refreshed = db.query_one("SELECT changes() AS n")["n"]
+        db.execute(
+            _SCHEDULE_STRENGTH_CTE
+            + """
+            DELETE FROM schedule_strength
+            WHERE NOT EXISTS (
+                SELECT 1 FROM strength
+                WHERE strength.nfl_team = schedule_strength.nfl_team
+                  AND strength.position = schedule_strength.position
+                  AND strength.week = schedule_strength.week
+            )
+            """
+        )
+    LOGGER.info("Refreshed %s schedule strength groups", refreshed)
+    return refreshed
+
+
+def refresh_nightly() -> None:
+    """Nightly materialization: re-blend changed projections, then rebuild
+    schedule strength from the blends.
 
+    Schedule strength only moves when blends do, so it rides on this job
+    rather than running on its own timer.
+    """
+    refresh_projections()
+    refresh_schedule_strength()
+
+
+def refresh_injuries() -> list[str]:
+    """Apply the latest injury statuses; returns the ids whose status changed.
 
-def refresh_injuries() -> None:
+    Unchanged statuses are not rewritten, so caches keyed on ``players`` stay
+    valid and live clients only hear about injuries when something moved.
+    """
     updates = {
         "QUESTIONABLE": ["player-004"],
     }
-    for status, players in updates.items():
-        for player_id in players:
-            db.execute(
-                "UPDATE players SET injury_status = ? WHERE id = ?",
-                (status, player_id),
-            )
+    changed = []
+    with db.transaction():
+        for status, players in updates.items():
+            for player_id in players:
+                db.execute(
+                    "UPDATE players SET injury_status = ? WHERE id = ? AND injury_status IS NOT ?",
+                    (status, player_id, status),
+                )
+                if db.query_one("SELECT changes() AS n")["n"]:
+                    changed.append(player_id)
+    if changed:
+        events.publish(events.INJURIES, player_ids=changed)
+    return changed
+
+
+def prune_simulation_cache() -> int:
+    settings = get_settings()
+    pruned = analysis.prune_simulation_results(
+        settings.simulation_cache_max_rows, settings.simulation_cache_max_age_hours
+    )
+    LOGGER.info("Pruned %s stored simulations", pruned)
+    return pruned
+
+
+def refresh_playoff_odds() -> int:
+    """Re-simulate the rest of the season for every active league.
+
+    The seasons run on the analytics pool when workers are configured, so the
+    web process's request threads do not queue behind them on the GIL.
+    """
+    leagues = db.query_all("SELECT id FROM leagues WHERE is_active = 1")
+    for league in leagues:
+        try:
+            analytics_pool.refresh_playoff_odds(league["id"])
+        except analytics_pool.AnalyticsBusy:
+            # Interactive work has the pool; the next run picks this league up.
+            LOGGER.warning("Analytics pool busy; playoff odds for league %s not refreshed", league["id"])
+    LOGGER.info("Refreshed playoff odds for %s leagues", len(leagues))
+    return len(leagues)
 
 
 def send_pre_kickoff_alerts() -> None:
@@ -83,9 +198,11 @@ def send_pre_kickoff_alerts() -> None:
 
 
 def run_all_jobs_once() -> None:
-    refresh_projections()
+    refresh_nightly()
     refresh_injuries()
     send_pre_kickoff_alerts()
+    refresh_playoff_odds()
+    prune_simulation_cache()
 
 
 def start_scheduler() -> None:
@@ -97,9 +214,11 @@ def start_scheduler() -> None:
         return
     _threads.extend(
         [
-            JobThread(60 * 60 * 24, refresh_projections, "nightly-projections"),
+            JobThread(60 * 60 * 24, refresh_nightly, "nightly-projections"),
             JobThread(60 * 60, refresh_injuries, "hourly-injuries"),
             JobThread(60 * 30, send_pre_kickoff_alerts, "pre-kickoff-alerts"),
+            JobThread(60 * 60, prune_simulation_cache, "simulation-cache-prune"),
+            JobThread(60 * 60 * 6, refresh_playoff_odds, "playoff-odds"),
         ]
     )
     for thread in _threads:
@@ -0,0 +1,232 @@
+"""Prometheus-compatible metrics registry and exporter.
+
+Instruments are plain in-process counters and fixed-bucket histograms guarded
+by a lock, so recording an observation costs a ``bisect`` and a few integer
+updates. ``start_metrics_server`` exposes them in the Prometheus text format on
+``Settings.metrics_port``.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+from . import cache
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: list["_Metric"] = []
+_collectors: list[Callable[[], list[str]]] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def register_collector(collector: Callable[[], list[str]]) -> None:
+    """Add a callback producing exposition lines at scrape time."""
+    _collectors.append(collector)
+
+
+def _cache_collector() -> list[str]:
+    stats = [c.stats() for c in cache.all_caches()]
+    lines = []
+    for metric, kind, field, documentation in (
+        ("ffa_cache_hits_total", "counter", "hits", "Cache lookups served from memory."),
+        ("ffa_cache_misses_total", "counter", "misses", "Cache lookups that had to recompute."),
+        ("ffa_cache_evictions_total", "counter", "evictions", "Entries evicted to respect max size."),
+        ("ffa_cache_entries", "gauge", "size", "Entries currently held."),
+        ("ffa_cache_hit_ratio", "gauge", "hit_ratio", "Hits divided by lookups since start."),
+    ):
+        lines.append(f"# HELP {metric} {documentation}")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(f'{metric}{{cache="{_escape(s["name"])}"}} {_format_value(s[field])}' for s in stats)
+    return lines
+
+
+register_collector(_cache_collector)
+
+
+def _flight_collector() -> list[str]:
+    stats = [flight.stats() for flight in cache.all_flights()]
+    lines = []
+    for metric, kind, field, documentation in (
+        ("ffa_singleflight_leaders_total", "counter", "leaders", "Computations actually run."),
+        ("ffa_singleflight_shared_total", "counter", "shared", "Callers served by another caller's in-flight computation."),
+        ("ffa_singleflight_in_flight", "gauge", "in_flight", "Computations currently running."),
+    ):
+        lines.append(f"# HELP {metric} {documentation}")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(f'{metric}{{flight="{_escape(s["name"])}"}} {_format_value(s[field])}' for s in stats)
+    return lines
+
+
+register_collector(_flight_collector)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    for collector in list(_collectors):
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "ffa_http_request_duration_seconds",
+    "Latency of AppHandler requests by route.",
+    ("method", "route", "status"),
+)
+DB_QUERY_SECONDS = Histogram(
+    "ffa_db_query_duration_seconds",
+    "Duration of database statements by kind.",
+    ("kind",),
+)
+JOB_RUN_SECONDS = Histogram(
+    "ffa_job_duration_seconds",
+    "Duration of background job runs.",
+    ("job",),
+)
+JOB_FAILURES = Counter("ffa_job_failures_total", "Background job runs that raised.", ("job",))
+SIMULATIONS = Counter("ffa_simulations_total", "Matchup simulations executed.")
+SIMULATION_RUNS = Counter("ffa_simulation_runs_total", "Monte Carlo runs executed across all simulations.")
+SIMULATION_CACHE_HITS = Counter("ffa_simulation_cache_hits_total", "Simulations served from simulation_results by input hash.")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    server_version = "FantasyFootballAI-Metrics/1.0"
+
+    def log_message(self, format: str, *args) -> None:  # pragma: no cover - scrape log
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = render().encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True)
+    thread.start()
+    LOGGER.info("Metrics exporter listening on %s:%s", host, port)
+    return server
@@ -79,6 +79,8 @@ class WaiverCandidate:
     schedule_score: float
     total_score: float
     explanation: str
+    ros_total: float = 0.0
+    playoff_value: float = 0.0
 
 
 @dataclass(slots=True)
@@ -90,6 +92,7 @@ class TradeProposal:
     lineup_delta: float
     playoff_odds_delta: float
     notes: str
+    schedule_delta: float = 0.0
 
 
 @dataclass(slots=True)
@@ -101,6 +104,19 @@ class SimulationResult:
     playoff_odds: float
     median_score: float
     percentiles: dict[str, float]
+    # 95% Wilson interval [low, high] on win_probability.
+    win_probability_interval: list[float] | None = None
+
+
+@dataclass(slots=True)
+class PlayoffOdds:
+    team_id: str
+    playoff: float
+    bye: float
+    # seeds[i] is the probability of finishing as seed i + 1.
+    seeds: list[float]
+    mean_wins: float
+    runs: int
 
 
 @dataclass(slots=True)
@@ -0,0 +1,124 @@
+"""Rest-of-season projections with constant-time window sums.
+
+``RosIndex`` keeps, per player, a points value for every week of the season
+and the prefix sums of those values, so the total over any window (the next
+three weeks, the fantasy playoffs, the rest of the season) is one
+subtraction. Weekly values come from ``blended_projections``. A week with no
+projection carries the nearest earlier projected week forward (or the
+earliest one backward), and the player's ``players.bye_week`` scores zero.
+
+The index refreshes lazily. When ``blended_projections`` or ``players`` has
+been written since the last build, only rows refreshed since the previous
+``refreshed_at`` high-water mark are read, and only the affected players'
+prefix sums are rebuilt.
+"""
+from __future__ import annotations
+
+import threading
+from array import array
+
+from . import db
+from .config import get_settings
+
+
+class RosIndex:
+    def __init__(self, final_week: int | None = None) -> None:
+        self.final_week = final_week if final_week is not None else get_settings().season_final_week
+        self._lock = threading.Lock()
+        self._database_url: str | None = None
+        self._version: tuple[int, ...] | None = None
+        self._watermark: str | None = None
+        self._weekly: dict[str, dict[int, float]] = {}
+        self._byes: dict[str, int] = {}
+        self._prefix: dict[str, array] = {}
+        self.rebuilt_players = 0
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the database; a no-op when nothing was written."""
+        version = db.data_version("blended_projections", "players")
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            database_url = get_settings().database_url
+            if database_url != self._database_url:
+                self._reset()
+                self._database_url = database_url
+            dirty = self._load_changes()
+            for player_id in dirty:
+                self._rebuild(player_id)
+            self._version = version
+
+    def _load_changes(self) -> set[str]:
+        if self._watermark is None:
+            rows = db.query_all("SELECT player_id, week, projected_points, refreshed_at FROM blended_projections")
+        else:
+            # Inclusive: rows stamped in the same instant as the last build are re-read.
+            rows = db.query_all(
+                """
+                SELECT player_id, week, projected_points, refreshed_at FROM blended_projections
+                WHERE refreshed_at >= ?
+                """,
+                (self._watermark,),
+            )
+        dirty = set()
+        for row in rows:
+            weeks = self._weekly.setdefault(row["player_id"], {})
+            if weeks.get(row["week"]) != row["projected_points"]:
+                weeks[row["week"]] = row["projected_points"]
+                dirty.add(row["player_id"])
+            if self._watermark is None or row["refreshed_at"] > self._watermark:
+                self._watermark = row["refreshed_at"]
+        held = sum(len(weeks) for weeks in self._weekly.values())
+        if held != db.query_one("SELECT COUNT(*) AS n FROM blended_projections")["n"]:
+            # Rows were deleted; they leave no refreshed_at trail, so start over.
+            self._reset()
+            return self._load_changes()
+        for row in db.query_all("SELECT id, bye_week FROM players"):
+            bye_week = row["bye_week"] or 0
+            if self._byes.get(row["id"]) != bye_week:
+                self._byes[row["id"]] = bye_week
+                if row["id"] in self._weekly:
+                    dirty.add(row["id"])
+        return dirty
+
+    def _reset(self) -> None:
+        self._watermark = None
+        self._weekly.clear()
+        self._byes.clear()
+        self._prefix.clear()
+
+    def _rebuild(self, player_id: str) -> None:
+        weeks = self._weekly.get(player_id)
+        if not weeks:
+            self._prefix.pop(player_id, None)
+            return
+        bye_week = self._byes.get(player_id, 0)
+        carried = weeks[min(weeks)]
+        prefix = array("d", [0.0]) * (self.final_week + 1)
+        for week in range(1, self.final_week + 1):
+            carried = weeks.get(week, carried)
+            prefix[week] = prefix[week - 1] + (0.0 if week == bye_week else carried)
+        self._prefix[player_id] = prefix
+        self.rebuilt_players += 1
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self._prefix
+
+    def window(self, player_id: str, start: int, end: int) -> float:
+        """Projected points for weeks ``start``..``end`` inclusive (0 for unknown players)."""
+        prefix = self._prefix.get(player_id)
+        start, end = max(start, 1), min(end, self.final_week)
+        if prefix is None or start > end:
+            return 0.0
+        return prefix[end] - prefix[start - 1]
+
+    def weekly(self, player_id: str, week: int) -> float:
+        return self.window(player_id, week, week)
+
+    def rest_of_season(self, player_id: str, week: int) -> float:
+        return self.window(player_id, week, self.final_week)
+
+
+ROS_INDEX = RosIndex()
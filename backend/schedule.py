@@ -0,0 +1,56 @@
+"""In-memory strength-of-schedule lookups.
+
+``jobs.refresh_schedule_strength`` (part of the nightly job) materializes
+``schedule_strength``: for every (NFL team, position, week), how that position
+group is projected that week relative to its own season average. Projection
+sources already price in the opponent, so a factor above 1 marks a softer
+matchup. ``ScheduleIndex`` holds the table in a dict, so reads are plain
+lookups. It reloads the whole table, a few thousand rows, whenever the table
+has been written since the last load.
+"""
+from __future__ import annotations
+
+import threading
+
+from . import db
+
+# Weeks ahead, starting with the current one, that a schedule outlook averages.
+SCHEDULE_WINDOW = 3
+
+
+class ScheduleIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: tuple[int, ...] | None = None
+        self._factors: dict[tuple[str, str, int], float] = {}
+
+    def refresh(self) -> None:
+        """Reload the table if it was written since the last load."""
+        version = db.data_version("schedule_strength")
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self._factors = {
+                (row["nfl_team"], row["position"], row["week"]): row["factor"]
+                for row in db.query_all("SELECT nfl_team, position, week, factor FROM schedule_strength")
+            }
+            self._version = version
+
+    def factor(self, nfl_team: str, position: str, week: int) -> float | None:
+        return self._factors.get((nfl_team, position, week))
+
+    def outlook(
+        self, nfl_team: str, position: str, week: int, bye_week: int = 0, weeks: int = SCHEDULE_WINDOW
+    ) -> float:
+        """Average factor over ``weeks`` weeks from ``week``, skipping the bye; 1.0 when nothing is indexed."""
+        factors = [
+            factor
+            for current in range(week, week + weeks)
+            if current != bye_week and (factor := self._factors.get((nfl_team, position, current))) is not None
+        ]
+        return sum(factors) / len(factors) if factors else 1.0
+
+
+SCHEDULE_INDEX = ScheduleIndex()
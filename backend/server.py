@@ -1,31 +1,135 @@
 """Minimal HTTP server powering the Fantasy Football AI application."""
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import math
 import mimetypes
+import queue
+import re
+import secrets
+import select
+import socket
+import time
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import asdict
 from http import HTTPStatus
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
+from typing import Callable
 from urllib.parse import parse_qs, urlparse
 
-from . import analysis, auth, db, demo, espn, feature_flags, jobs, notifications
+from . import analysis, analytics_pool, auth, db, demo, espn, events, feature_flags, jobs, metrics, notifications
+from .cache import VersionedLRUCache
 from .config import get_settings
+from .models import TradeProposal
 
 LOGGER = logging.getLogger(__name__)
 STATIC_ROOT = Path(__file__).resolve().parents[1] / "public"
 
+# Tables whose writes can change any analytics response. Their versions form the
+# ETag, and the per-user response cache is stamped with them.
+ANALYTICS_TABLES = (
+    "leagues",
+    "league_members",
+    "teams",
+    "players",
+    "rosters",
+    "roster_spots",
+    "matchups",
+    "projections",
+    "blended_projections",
+    "schedule_strength",
+)
+RESPONSE_CACHE = VersionedLRUCache("responses", max_size=1024)
+# Table versions restart with the process, so ETags also carry a boot id.
+_BOOT_ID = uuid.uuid4().hex
+_DASHBOARD_EXECUTOR: ThreadPoolExecutor | None = None
+_DASHBOARD_EXECUTOR_LOCK = threading.Lock()
+# Adaptive simulation settings per surface: run cap, target half-width of the
+# win-probability interval, and wall-clock budget in seconds.
+DASHBOARD_SIMULATION = {"runs": 5000, "tolerance": 0.03, "time_budget": 0.5}
+MATCHUP_SIMULATION = {"runs": 20000, "tolerance": 0.015, "time_budget": 2.0}
+# Fixed-size simulations the distribution endpoint offers; requested runs round up.
+DISTRIBUTION_RUN_SIZES = (1000, 5000, 20000)
+# Largest request body either server mode will read; bigger bodies get 413.
+MAX_BODY_BYTES = 1024 * 1024
+SSE_HEARTBEAT_SECONDS = 15.0
+SSE_MAX_STREAM_SECONDS = 600.0
+# Dashboard streams authenticate with a single-use ticket, since EventSource
+# cannot send an Authorization header and tokens must not appear in URLs.
+STREAM_TICKET_TTL_SECONDS = 30.0
+_STREAM_TICKETS: dict[str, tuple[str, float]] = {}
+_STREAM_TICKETS_LOCK = threading.Lock()
+_STREAM_SLOTS: threading.BoundedSemaphore | None = None
+_STREAM_SLOTS_LOCK = threading.Lock()
+_QUERY_STRING = re.compile(r"\?\S*")
 
-def _json_response(handler: BaseHTTPRequestHandler, payload: dict, status: HTTPStatus = HTTPStatus.OK) -> None:
+
+def _redact_query(text: str) -> str:
+    return _QUERY_STRING.sub("?…", text)
+
+
+def _json_response(
+    handler: BaseHTTPRequestHandler,
+    payload: dict,
+    status: HTTPStatus = HTTPStatus.OK,
+    headers: dict[str, str] | None = None,
+) -> None:
     body = json.dumps(payload).encode("utf-8")
     handler.send_response(status)
     handler.send_header("Content-Type", "application/json")
     handler.send_header("Content-Length", str(len(body)))
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
     handler.end_headers()
     handler.wfile.write(body)
 
 
+def _etag(key: tuple, version: tuple[int, ...]) -> str:
+    digest = hashlib.sha1(repr((_BOOT_ID, key, version)).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _cached_analytics_response(handler: BaseHTTPRequestHandler, user_id: str, compute) -> None:
+    """Serve an analytics payload with an ETag derived from its data versions.
+
+    A matching ``If-None-Match`` is answered with 304 before any analysis runs;
+    otherwise repeat hits for the same (user, endpoint, data version) are served
+    from ``RESPONSE_CACHE``. Payloads flagged ``partial`` or ``provisional`` or
+    carrying ``errors`` are neither cached nor given an ETag, so the client's
+    next request picks up the finished work (or a simulation that ran to its
+    target instead of its time budget) and a failure is not pinned until the
+    data changes.
+    """
+    # Materialize pending projection writes first, so the version this ETag is
+    # built from already covers the blends the compute reads.
+    analysis.refresh_rest_of_season()
+    version = db.data_version(*ANALYTICS_TABLES)
+    parsed = urlparse(handler.path)
+    key = (user_id, parsed.path, parsed.query)
+    etag = _etag(key, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = handler.headers.get("If-None-Match", "")
+    if etag in {tag.strip() for tag in if_none_match.split(",")}:
+        handler.send_response(HTTPStatus.NOT_MODIFIED)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        return
+    payload = RESPONSE_CACHE.get(key, version)
+    if payload is None:
+        payload = compute()
+        if payload.get("partial") or payload.get("provisional") or payload.get("errors"):
+            _json_response(handler, payload, headers={"Cache-Control": "no-store"})
+            return
+        RESPONSE_CACHE.put(key, payload, version)
+    _json_response(handler, payload, headers=headers)
+
+
 def _bad_request(handler: BaseHTTPRequestHandler, message: str) -> None:
     _json_response(handler, {"error": message}, HTTPStatus.BAD_REQUEST)
 
@@ -50,35 +154,206 @@ def _get_session(handler: BaseHTTPRequestHandler) -> dict | None:
     return auth.get_user_by_session(token)
 
 
+# Every API route, with the league id collapsed; metric labels are drawn only
+# from this set so arbitrary paths cannot create new series.
+API_ROUTES = frozenset(
+    {
+        "/api/me",
+        "/api/dashboard",
+        "/api/dashboard/stream",
+        "/api/dashboard/stream-ticket",
+        "/api/notifications",
+        "/api/leagues/{id}/roster",
+        "/api/leagues/{id}/lineups",
+        "/api/leagues/{id}/waivers",
+        "/api/leagues/{id}/trades",
+        "/api/leagues/{id}/trades/evaluate",
+        "/api/leagues/{id}/matchup",
+        "/api/leagues/{id}/matchup/distribution",
+        "/api/leagues/{id}/schedule",
+        "/api/auth/request-code",
+        "/api/auth/verify",
+        "/api/auth/logout",
+        "/api/demo/login",
+        "/api/espn/begin",
+        "/api/espn/complete",
+        "/api/espn/sync",
+        "/api/espn/activate",
+        "/api/feature-flags",
+    }
+)
+
+
+def _route_label(path: str) -> str:
+    """Map a request path to its route so metrics stay low-cardinality.
+
+    Anything that is not a known API route (404 probes, extra path segments)
+    shares the single ``unmatched`` label.
+    """
+    path = urlparse(path).path
+    if not path.startswith("/api/"):
+        return "static"
+    parts = path.split("/")
+    if len(parts) > 3 and parts[2] == "leagues":
+        parts[3] = "{id}"
+    label = "/".join(parts)
+    return label if label in API_ROUTES else "unmatched"
+
+
+class _SocketStreamWriter:
+    """Blocking writer over a detached socket, for streams served off the request workers."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+
+    def write(self, data: bytes) -> int:
+        self._sock.sendall(data)
+        return len(data)
+
+
+class PooledHTTPServer(HTTPServer):
+    """``HTTPServer`` that handles connections on a fixed pool of worker threads.
+
+    ``ThreadingHTTPServer`` starts a thread per connection, and each new thread
+    opens (and pragmas) its own sqlite connections in ``backend.db``. Reusing a
+    fixed set of threads keeps those connections warm; connections beyond the
+    pool queue until a worker is free. Like ``ThreadingHTTPServer``'s, the
+    workers are daemon threads, so an in-flight request never holds up exit.
+    """
+
+    def __init__(self, server_address: tuple[str, int], handler_class, workers: int) -> None:
+        super().__init__(server_address, handler_class)
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._detached: set[socket.socket] = set()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"http-worker-{index}", daemon=True) for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address) -> None:
+        self._requests.put((request, client_address))
+
+    def _work(self) -> None:
+        while (item := self._requests.get()) is not None:
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if request in self._detached:
+                    self._detached.discard(request)
+                else:
+                    self.shutdown_request(request)
+
+    def detach(self, request: socket.socket) -> Callable[[], None]:
+        """Keep ``request`` open after its handler returns; the returned callable closes it."""
+        self._detached.add(request)
+        return lambda: self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(None)
+
+
 class AppHandler(BaseHTTPRequestHandler):
     server_version = "FantasyFootballAI/1.0"
 
-    def log_message(self, format: str, *args) -> None:  # pragma: no cover - request log
-        LOGGER.info("%s - %s", self.address_string(), format % args)
+    def log_message(self, format: str, *args) -> None:
+        # Query strings can carry credentials (stream tickets); never log them.
+        LOGGER.info("%s - %s", self.address_string(), _redact_query(format % args))
+
+    def detach_stream(self) -> tuple["_SocketStreamWriter", Callable[[], None]] | None:
+        """Hand the connection to a long-lived stream that outlives this request.
+
+        Returns a writer and a ``close`` callable, or ``None`` when the server
+        cannot detach connections (the caller then streams inline).
+        """
+        detach = getattr(self.server, "detach", None)
+        if detach is None:
+            return None
+        self.close_connection = True
+        return _SocketStreamWriter(self.connection), detach(self.request)
+
+    def send_response(self, code, message=None) -> None:
+        self._status = int(code)
+        super().send_response(code, message)
+
+    def _observe(self, method: str, start: float) -> None:
+        status = str(getattr(self, "_status", "error"))
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method, _route_label(self.path), status)
+
+    def client_disconnected(self) -> bool:
+        """True once the peer has closed its end; peeks without consuming input."""
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+        except (OSError, ValueError):
+            return True
 
     def do_OPTIONS(self) -> None:
-        self.send_response(HTTPStatus.NO_CONTENT)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type, Authorization")
-        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.end_headers()
+        start = time.perf_counter()
+        try:
+            self.send_response(HTTPStatus.NO_CONTENT)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Access-Control-Allow-Headers", "Content-Type, Authorization, If-None-Match")
+            self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+            self.end_headers()
+        finally:
+            self._observe("OPTIONS", start)
 
     def do_GET(self) -> None:  # noqa: N802
-        if self.path.startswith("/api/"):
-            self.handle_api_get()
-        else:
-            self.serve_static()
+        start = time.perf_counter()
+        try:
+            if self.path.startswith("/api/"):
+                self.handle_api_get()
+            else:
+                self.serve_static()
+        except analytics_pool.AnalyticsBusy:
+            _json_response(
+                self, {"error": "analytics busy, retry shortly"}, HTTPStatus.SERVICE_UNAVAILABLE, {"Retry-After": "1"}
+            )
+        except analytics_pool.AnalyticsCancelled:
+            self.close_connection = True
+            LOGGER.info("Abandoned %s: client disconnected", self.path)
+        finally:
+            self._observe("GET", start)
 
     def do_POST(self) -> None:  # noqa: N802
-        if not self.path.startswith("/api/"):
-            _bad_request(self, "POST not allowed")
-            return
-        self.handle_api_post()
+        start = time.perf_counter()
+        try:
+            if not self.path.startswith("/api/"):
+                _bad_request(self, "POST not allowed")
+                return
+            if "Transfer-Encoding" in self.headers:
+                self.close_connection = True
+                _json_response(self, {"error": "Transfer-Encoding is not supported"}, HTTPStatus.NOT_IMPLEMENTED)
+                return
+            if not (self.headers.get("Content-Length") or "0").isdigit():
+                self.close_connection = True
+                _bad_request(self, "invalid Content-Length")
+                return
+            if int(self.headers.get("Content-Length") or 0) > MAX_BODY_BYTES:
+                self.close_connection = True
+                _json_response(
+                    self, {"error": f"request body exceeds {MAX_BODY_BYTES} bytes"}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                )
+                return
+            self.handle_api_post()
+        finally:
+            self._observe("POST", start)
 
     # API routing ---------------------------------------------------------
     def handle_api_get(self) -> None:
         user = _get_session(self)
         parsed = urlparse(self.path)
+        if user is None and parsed.path == "/api/dashboard/stream":
+            # EventSource cannot send an Authorization header; it presents a ticket.
+            ticket = parse_qs(parsed.query).get("ticket", [None])[0]
+            user_id = redeem_stream_ticket(ticket) if ticket else None
+            user = {"id": user_id} if user_id else None
         if parsed.path == "/api/me":
             if not user:
                 _json_response(self, {"authenticated": False})
@@ -93,30 +368,55 @@ class AppHandler(BaseHTTPRequestHandler):
             _bad_request(self, "Authentication required")
             return
         if parsed.path == "/api/dashboard":
-            payload = build_dashboard_payload(user["id"])
-            _json_response(self, payload)
+            _cached_analytics_response(self, user["id"], lambda: build_dashboard_payload(user["id"]))
+            return
+        if parsed.path == "/api/dashboard/stream":
+            stream_dashboard(self, user["id"])
             return
         if parsed.path.startswith("/api/leagues/") and parsed.path.endswith("/roster"):
             league_id = parsed.path.split("/")[3]
-            roster = get_league_roster_payload(league_id, user["id"])
-            _json_response(self, roster)
+            _cached_analytics_response(self, user["id"], lambda: get_league_roster_payload(league_id, user["id"]))
+            return
+        if parsed.path.startswith("/api/leagues/") and parsed.path.endswith("/lineups"):
+            league_id = parsed.path.split("/")[3]
+            _cached_analytics_response(self, user["id"], lambda: get_lineup_report_payload(league_id, user["id"]))
+            return
+        if parsed.path.startswith("/api/leagues/") and parsed.path.endswith("/schedule"):
+            league_id = parsed.path.split("/")[3]
+            _cached_analytics_response(self, user["id"], lambda: get_schedule_payload(league_id, user["id"]))
             return
         if parsed.path.startswith("/api/leagues/") and parsed.path.endswith("/waivers"):
             league_id = parsed.path.split("/")[3]
-            waivers = get_waiver_payload(league_id, user["id"])
-            _json_response(self, waivers)
+            _cached_analytics_response(self, user["id"], lambda: get_waiver_payload(league_id, user["id"]))
             return
         if parsed.path.startswith("/api/leagues/") and parsed.path.endswith("/trades"):
             league_id = parsed.path.split("/")[3]
-            trades = get_trade_payload(league_id, user["id"])
-            _json_response(self, trades)
+            _cached_analytics_response(
+                self, user["id"], lambda: get_trade_payload(league_id, user["id"], self.client_disconnected)
+            )
+            return
+        if parsed.path.startswith("/api/leagues/") and parsed.path.endswith("/matchup/distribution"):
+            league_id = parsed.path.split("/")[3]
+            try:
+                options = _distribution_options(parse_qs(parsed.query))
+            except ValueError as exc:
+                _bad_request(self, f"invalid distribution query: {exc}")
+                return
+            _cached_analytics_response(
+                self,
+                user["id"],
+                lambda: get_distribution_payload(league_id, user["id"], cancelled=self.client_disconnected, **options),
+            )
             return
         if parsed.path.startswith("/api/leagues/") and parsed.path.endswith("/matchup"):
             league_id = parsed.path.split("/")[3]
             query = parse_qs(parsed.query)
             opponent = query.get("opponent", [None])[0]
-            matchup = get_matchup_payload(league_id, user["id"], opponent)
-            _json_response(self, matchup)
+            _cached_analytics_response(
+                self,
+                user["id"],
+                lambda: get_matchup_payload(league_id, user["id"], opponent, self.client_disconnected),
+            )
             return
         if parsed.path == "/api/notifications":
             notices = notifications.pending_notifications(user["id"])
@@ -161,6 +461,10 @@ class AppHandler(BaseHTTPRequestHandler):
             auth.revoke_session(token)
             _json_response(self, {"status": "signed-out"})
             return
+        if parsed.path == "/api/dashboard/stream-ticket":
+            ticket = issue_stream_ticket(user["id"])
+            _json_response(self, {"ticket": ticket, "expires_in": STREAM_TICKET_TTL_SECONDS})
+            return
         if parsed.path == "/api/espn/begin":
             provider = body.get("provider", "mock")
             state = espn.begin_connection(user["id"], provider)
@@ -183,6 +487,15 @@ class AppHandler(BaseHTTPRequestHandler):
             espn.set_active_leagues(user["id"], league_ids)
             _json_response(self, {"status": "updated"})
             return
+        if parsed.path.startswith("/api/leagues/") and parsed.path.endswith("/trades/evaluate"):
+            league_id = parsed.path.split("/")[3]
+            try:
+                payload = evaluate_trades_payload(league_id, user["id"], body)
+            except ValueError as exc:
+                _bad_request(self, str(exc))
+                return
+            _json_response(self, payload)
+            return
         if parsed.path == "/api/feature-flags":
             flag = body.get("flag")
             enabled = bool(body.get("enabled", True))
@@ -212,43 +525,257 @@ class AppHandler(BaseHTTPRequestHandler):
         self.wfile.write(content)
 
 
-def build_dashboard_payload(user_id: str) -> dict:
+def _dashboard_executor() -> ThreadPoolExecutor:
+    """Shared pool for dashboard cards, so concurrent requests stay bounded."""
+    global _DASHBOARD_EXECUTOR
+    with _DASHBOARD_EXECUTOR_LOCK:
+        if _DASHBOARD_EXECUTOR is None:
+            _DASHBOARD_EXECUTOR = ThreadPoolExecutor(
+                max_workers=get_settings().dashboard_workers, thread_name_prefix="dashboard"
+            )
+        return _DASHBOARD_EXECUTOR
+
+
+def _dashboard_targets(user_id: str) -> list[tuple[dict, str | None]]:
+    """Return ``(league, team_id)`` for each of the user's active leagues."""
     leagues = espn.active_leagues_for_user(user_id)
-    cards = []
-    for league in leagues:
-        team_row = db.query_one(
-            "SELECT teams.id as team_id, teams.playoff_odds FROM teams JOIN league_members ON league_members.team_id = teams.id WHERE league_members.user_id = ? AND teams.league_id = ?",
-            (user_id, league["id"]),
-        )
-        team_id = team_row["team_id"] if team_row else None
-        waivers = []
-        matchup = None
-        lineup = None
-        if team_id:
-            waivers = [asdict(c) for c in analysis.waiver_recommendations(league["id"], team_id)]
-            opponent = db.query_one(
-                "SELECT away_team_id FROM matchups WHERE home_team_id = ? LIMIT 1",
-                (team_id,),
+    team_rows = db.query_all(
+        "SELECT teams.league_id, teams.id as team_id FROM teams JOIN league_members ON league_members.team_id = teams.id WHERE league_members.user_id = ?",
+        (user_id,),
+    )
+    team_by_league = {row["league_id"]: row["team_id"] for row in team_rows}
+    return [(league, team_by_league.get(league["id"])) for league in leagues]
+
+
+def _build_league_card(
+    league: dict,
+    team_id: str | None,
+    progress: Callable[[int, int], None] | None = None,
+) -> dict:
+    start = time.perf_counter()
+    waivers = []
+    matchup = None
+    provisional = False
+    lineup = None
+    if team_id:
+        ctx = analysis.LeagueContext.load(league["id"])
+        waivers = [asdict(c) for c in analysis.waiver_recommendations(league["id"], team_id, ctx=ctx)]
+        opponent_id = ctx.opponent_of(team_id)
+        if opponent_id:
+            matchup_result = analytics_pool.simulate_matchup(
+                league["id"], team_id, opponent_id, ctx=ctx, progress=progress, **DASHBOARD_SIMULATION
+            )
+            matchup = asdict(matchup_result)
+            provisional = not analysis.reached_target(
+                matchup_result, DASHBOARD_SIMULATION["runs"], DASHBOARD_SIMULATION["tolerance"]
             )
-            if opponent:
-                matchup_result = analysis.simulate_matchup(league["id"], team_id, opponent["away_team_id"], runs=120)
-                matchup = asdict(matchup_result)
-            roster_row = db.query_one(
-                "SELECT id FROM rosters WHERE league_id = ? AND team_id = ? ORDER BY week DESC LIMIT 1",
-                (league["id"], team_id),
+        optimal = analysis.optimize_league_lineups(league["id"], ctx=ctx).get(team_id)
+        if optimal:
+            lineup = asdict(optimal)
+    return {
+        "league": league,
+        "team_id": team_id,
+        "status": "ready",
+        "matchup": matchup,
+        "provisional": provisional,
+        "waivers": waivers,
+        "lineup": lineup,
+        "compute_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _unfinished_card(league: dict, team_id: str | None, status: str) -> dict:
+    return {
+        "league": league,
+        "team_id": team_id,
+        "status": status,
+        "matchup": None,
+        "provisional": False,
+        "waivers": [],
+        "lineup": None,
+        "compute_ms": None,
+    }
+
+
+def _card_from_future(league: dict, team_id: str | None, future: Future) -> dict:
+    if isinstance(future.exception(), analytics_pool.AnalyticsBusy):
+        # The analytics pool is saturated; the client retries pending cards.
+        return _unfinished_card(league, team_id, "pending")
+    if future.exception() is not None:
+        LOGGER.error("Dashboard card for league %s failed", league["id"], exc_info=future.exception())
+        return _unfinished_card(league, team_id, "error")
+    return future.result()
+
+
+def build_dashboard_payload(user_id: str, deadline: float | None = None) -> dict:
+    """Build one card per active league, computing the cards concurrently.
+
+    Cards run on the shared dashboard pool. Any card not finished within
+    ``deadline`` seconds (``DASHBOARD_DEADLINE_SECONDS`` by default) is returned
+    with status ``pending`` and the payload is flagged ``partial``; the work keeps
+    running and warms the analysis caches for the client's retry. Cards whose
+    matchup simulation stopped at its time budget are flagged ``provisional``,
+    and so is the payload. Cards that
+    failed are reported with status ``error`` and counted in ``errors``; they
+    do not make the payload partial, since retrying would only fail again.
+    """
+    if deadline is None:
+        deadline = get_settings().dashboard_deadline_seconds
+    start = time.perf_counter()
+    targets = _dashboard_targets(user_id)
+    executor = _dashboard_executor()
+    futures = [executor.submit(_build_league_card, league, team_id) for league, team_id in targets]
+    wait(futures, timeout=deadline)
+    cards = [
+        _card_from_future(league, team_id, future) if future.done() else _unfinished_card(league, team_id, "pending")
+        for (league, team_id), future in zip(targets, futures)
+    ]
+    return {
+        "leagues": cards,
+        "partial": any(card["status"] == "pending" for card in cards),
+        "provisional": any(card["provisional"] for card in cards),
+        "errors": sum(card["status"] == "error" for card in cards),
+        "compute_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _sse_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def issue_stream_ticket(user_id: str) -> str:
+    """Mint a single-use ticket that opens one dashboard stream for ``user_id``."""
+    ticket = secrets.token_urlsafe(24)
+    now = time.monotonic()
+    with _STREAM_TICKETS_LOCK:
+        for stale in [key for key, (_, expires) in _STREAM_TICKETS.items() if expires <= now]:
+            del _STREAM_TICKETS[stale]
+        _STREAM_TICKETS[ticket] = (user_id, now + STREAM_TICKET_TTL_SECONDS)
+    return ticket
+
+
+def redeem_stream_ticket(ticket: str) -> str | None:
+    """Consume ``ticket``; returns its user id, or ``None`` if unknown, used or expired."""
+    with _STREAM_TICKETS_LOCK:
+        entry = _STREAM_TICKETS.pop(ticket, None)
+    if entry is None or entry[1] <= time.monotonic():
+        return None
+    return entry[0]
+
+
+def _stream_slots() -> threading.BoundedSemaphore:
+    global _STREAM_SLOTS
+    with _STREAM_SLOTS_LOCK:
+        if _STREAM_SLOTS is None:
+            _STREAM_SLOTS = threading.BoundedSemaphore(get_settings().sse_max_streams)
+        return _STREAM_SLOTS
+
+
+def _stream_dashboard_cards(wfile, user_id: str) -> None:
+    """Write one ``card`` event per league as soon as each card finishes.
+
+    A ``start`` event first lists every league as a pending card, ``progress``
+    events relay simulation batches, and ``done`` closes the round.
+    """
+    start = time.perf_counter()
+    targets = _dashboard_targets(user_id)
+    wfile.write(
+        _sse_event("start", {"leagues": [_unfinished_card(league, team_id, "pending") for league, team_id in targets]})
+    )
+    # Pool threads only enqueue; the stream thread is the sole writer.
+    updates: queue.SimpleQueue = queue.SimpleQueue()
+    executor = _dashboard_executor()
+    for league, team_id in targets:
+
+        def report(completed: int, runs: int, league_id: str = league["id"]) -> None:
+            updates.put(("progress", {"league_id": league_id, "completed_runs": completed, "runs": runs}))
+
+        future = executor.submit(_build_league_card, league, team_id, report)
+        future.add_done_callback(
+            lambda done, league=league, team_id=team_id: updates.put(
+                ("card", _card_from_future(league, team_id, done))
             )
-            if roster_row:
-                lineup = asdict(analysis.start_sit_for_roster(roster_row["id"]))
-        cards.append(
-            {
-                "league": league,
-                "team_id": team_id,
-                "matchup": matchup,
-                "waivers": waivers,
-                "lineup": lineup,
-            }
         )
-    return {"leagues": cards}
+    for _ in range(len(targets)):
+        kind, data = updates.get()
+        while kind == "progress":
+            wfile.write(_sse_event(kind, data))
+            kind, data = updates.get()
+        wfile.write(_sse_event(kind, data))
+    wfile.write(
+        _sse_event("done", {"leagues": len(targets), "compute_ms": round((time.perf_counter() - start) * 1000, 2)})
+    )
+
+
+def _serve_dashboard_stream(wfile, user_id: str) -> None:
+    with events.subscribe(events.PROJECTIONS, events.INJURIES) as subscription:
+        try:
+            wfile.write(b"retry: 5000\n\n")
+            _stream_dashboard_cards(wfile, user_id)
+            expires = time.monotonic() + SSE_MAX_STREAM_SECONDS
+            while (remaining := expires - time.monotonic()) > 0:
+                event = subscription.get(timeout=min(SSE_HEARTBEAT_SECONDS, remaining))
+                if event is None:
+                    wfile.write(b": keep-alive\n\n")
+                    continue
+                topics = {event.topic}
+                # Coalesce bursts (e.g. both nightly jobs finishing) into one recompute.
+                while (extra := subscription.get(timeout=0)) is not None:
+                    topics.add(extra.topic)
+                wfile.write(_sse_event("update", {"topics": sorted(topics)}))
+                _stream_dashboard_cards(wfile, user_id)
+        except (BrokenPipeError, ConnectionResetError):
+            LOGGER.debug("Dashboard stream closed by client")
+
+
+def stream_dashboard(handler: BaseHTTPRequestHandler, user_id: str) -> None:
+    """Serve the dashboard as Server-Sent Events and keep pushing updates.
+
+    After the initial round of cards the stream stays open: whenever a
+    background job publishes a projection or injury change, an ``update`` event
+    is sent and every card is recomputed and re-sent. Idle streams get a comment
+    heartbeat, and streams end after ``SSE_MAX_STREAM_SECONDS``.
+
+    Streams do not occupy a request worker or concurrency slot: the handler
+    detaches the connection and a dedicated daemon thread serves it. At most
+    ``SSE_MAX_STREAMS`` are open at once; beyond that the client gets 503.
+    """
+    slots = _stream_slots()
+    if not slots.acquire(blocking=False):
+        _json_response(
+            handler, {"error": "too many open dashboard streams"}, HTTPStatus.SERVICE_UNAVAILABLE, {"Retry-After": "5"}
+        )
+        return
+    handler.send_response(HTTPStatus.OK)
+    handler.send_header("Content-Type", "text/event-stream")
+    handler.send_header("Cache-Control", "no-cache")
+    handler.send_header("X-Accel-Buffering", "no")
+    handler.end_headers()
+    handler.close_connection = True
+    detached = handler.detach_stream() if hasattr(handler, "detach_stream") else None
+    if detached is None:
+        try:
+            _serve_dashboard_stream(handler.wfile, user_id)
+        finally:
+            slots.release()
+        return
+    wfile, close = detached
+
+    def serve() -> None:
+        try:
+            _serve_dashboard_stream(wfile, user_id)
+        except Exception:
+            LOGGER.exception("Dashboard stream failed")
+        finally:
+            close()
+            slots.release()
+
+    try:
+        threading.Thread(target=serve, name="dashboard-stream", daemon=True).start()
+    except BaseException:
+        close()
+        slots.release()
+        raise
 
 
 def get_league_roster_payload(league_id: str, user_id: str) -> dict:
@@ -258,17 +785,51 @@ def get_league_roster_payload(league_id: str, user_id: str) -> dict:
     )
     if not team:
         raise ValueError("team not found")
-    roster = db.query_one(
-        "SELECT id FROM rosters WHERE league_id = ? AND team_id = ? ORDER BY week DESC LIMIT 1",
-        (league_id, team["team_id"]),
-    )
-    lineup = analysis.start_sit_for_roster(roster["id"]) if roster else None
+    lineup = analysis.optimize_league_lineups(league_id).get(team["team_id"])
     return {
         "team_id": team["team_id"],
         "lineup": asdict(lineup) if lineup else None,
     }
 
 
+def get_lineup_report_payload(league_id: str, user_id: str) -> dict:
+    """Every team's optimal lineup in the league, best projected total first."""
+    member = db.query_one(
+        "SELECT team_id FROM league_members WHERE user_id = ? AND league_id = ? LIMIT 1",
+        (user_id, league_id),
+    )
+    if not member:
+        raise ValueError("team not found")
+    teams_query = "SELECT id, name FROM teams WHERE league_id = ?"
+    names = {row["id"]: row["name"] for row in db.query_all(teams_query, (league_id,))}
+    lineups = analysis.optimize_league_lineups(league_id)
+    teams = [
+        {
+            "team_id": team_id,
+            "team_name": names.get(team_id, team_id),
+            "total_projection": lineup.total_projection,
+            "current_projection": round(lineup.total_projection - lineup.delta, 2),
+            "delta": lineup.delta,
+            "open_slots": lineup.open_slots,
+            "lineup": lineup.lineup,
+        }
+        for team_id, lineup in lineups.items()
+    ]
+    teams.sort(key=lambda entry: entry["total_projection"], reverse=True)
+    return {"league_id": league_id, "week": analysis.CURRENT_WEEK, "teams": teams}
+
+
+def get_schedule_payload(league_id: str, user_id: str) -> dict:
+    """Per-week scoring pace and strength of schedule for the league's rostered groups."""
+    member = db.query_one(
+        "SELECT team_id FROM league_members WHERE user_id = ? AND league_id = ? LIMIT 1",
+        (user_id, league_id),
+    )
+    if not member:
+        raise ValueError("team not found")
+    return {"league_id": league_id, "weeks": analysis.schedule_heatmap(league_id)}
+
+
 def get_waiver_payload(league_id: str, user_id: str) -> dict:
     team = db.query_one(
         "SELECT team_id FROM league_members WHERE user_id = ? AND league_id = ? ORDER BY role DESC LIMIT 1",
@@ -280,7 +841,7 @@ def get_waiver_payload(league_id: str, user_id: str) -> dict:
     return {"candidates": candidates}
 
 
-def get_trade_payload(league_id: str, user_id: str) -> dict:
+def get_trade_payload(league_id: str, user_id: str, cancelled: Callable[[], bool] | None = None) -> dict:
     team = db.query_one(
         "SELECT team_id FROM league_members WHERE user_id = ? AND league_id = ? ORDER BY role DESC LIMIT 1",
         (user_id, league_id),
@@ -288,21 +849,63 @@ def get_trade_payload(league_id: str, user_id: str) -> dict:
     if not team:
         raise ValueError("team not found")
     proposals = [
-        {
-            "offer_players": [asdict(player) for player in proposal.offer_players],
-            "request_players": [asdict(player) for player in proposal.request_players],
-            "offer_value": proposal.offer_value,
-            "request_value": proposal.request_value,
-            "lineup_delta": proposal.lineup_delta,
-            "playoff_odds_delta": proposal.playoff_odds_delta,
-            "notes": proposal.notes,
-        }
-        for proposal in analysis.trade_ideas(league_id, team["team_id"])
+        _proposal_payload(proposal)
+        for proposal in analytics_pool.trade_ideas(league_id, team["team_id"], cancelled=cancelled)
     ]
     return {"proposals": proposals}
 
 
-def get_matchup_payload(league_id: str, user_id: str, opponent_team_id: str | None) -> dict:
+def _proposal_payload(proposal: TradeProposal) -> dict:
+    return {
+        "offer_players": [asdict(player) for player in proposal.offer_players],
+        "request_players": [asdict(player) for player in proposal.request_players],
+        "offer_value": proposal.offer_value,
+        "request_value": proposal.request_value,
+        "lineup_delta": proposal.lineup_delta,
+        "playoff_odds_delta": proposal.playoff_odds_delta,
+        "notes": proposal.notes,
+        "schedule_delta": proposal.schedule_delta,
+    }
+
+
+def evaluate_trades_payload(league_id: str, user_id: str, body: dict) -> dict:
+    """Score the posted ``proposals`` batch; each defaults to the caller's team.
+
+    Raises ``ValueError`` for a malformed batch, reported to the client as 400.
+    """
+    member = db.query_one(
+        "SELECT team_id FROM league_members WHERE user_id = ? AND league_id = ? ORDER BY role DESC LIMIT 1",
+        (user_id, league_id),
+    )
+    if not member:
+        raise ValueError("not a member of this league")
+    items = body.get("proposals")
+    if not isinstance(items, list) or not items:
+        raise ValueError("proposals must be a non-empty list")
+    proposals = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f"proposal {index}: expected an object")
+        team_id = item.get("team_id") or member["team_id"]
+        offer, request = item.get("offer"), item.get("request")
+        if not team_id:
+            raise ValueError(f"proposal {index}: team_id required")
+        if not all(isinstance(ids, list) and all(isinstance(i, str) for i in ids) for ids in (offer, request)):
+            raise ValueError(f"proposal {index}: offer and request must be lists of player ids")
+        proposals.append((team_id, offer, request))
+    evaluation = analysis.evaluate_trades(league_id, proposals)
+    return {
+        "evaluations": [_proposal_payload(proposal) for proposal in evaluation.proposals],
+        "timing": evaluation.timing,
+    }
+
+
+def get_matchup_payload(
+    league_id: str,
+    user_id: str,
+    opponent_team_id: str | None,
+    cancelled: Callable[[], bool] | None = None,
+) -> dict:
     team = db.query_one(
         "SELECT team_id FROM league_members WHERE user_id = ? AND league_id = ? ORDER BY role DESC LIMIT 1",
         (user_id, league_id),
@@ -317,8 +920,85 @@ def get_matchup_payload(league_id: str, user_id: str, opponent_team_id: str | No
         opponent_team_id = matchup["away_team_id"] if matchup else None
     if not opponent_team_id:
         return {"error": "No opponent"}
-    result = analysis.simulate_matchup(league_id, team["team_id"], opponent_team_id, runs=200)
-    return asdict(result)
+    result = analytics_pool.simulate_matchup(
+        league_id, team["team_id"], opponent_team_id, cancelled=cancelled, **MATCHUP_SIMULATION
+    )
+    payload = asdict(result)
+    # Cut short by the time budget: not stored, so not worth caching either.
+    payload["provisional"] = not analysis.reached_target(
+        result, MATCHUP_SIMULATION["runs"], MATCHUP_SIMULATION["tolerance"]
+    )
+    return payload
+
+
+def _float_list(query: dict[str, list[str]], name: str, default: list[float]) -> list[float]:
+    values = [float(item) for raw in query.get(name, []) for item in raw.split(",") if item.strip()]
+    if not all(math.isfinite(value) for value in values):
+        # float() accepts nan/inf, which would only fail after the simulation ran.
+        raise ValueError(f"{name} must be finite numbers")
+    return values or default
+
+
+def _distribution_options(query: dict[str, list[str]]) -> dict:
+    bins = int(query.get("bins", ["20"])[0])
+    runs = int(query["runs"][0]) if "runs" in query else None
+    if not 0 <= bins <= 200 or not 1 <= (runs or 1) <= DISTRIBUTION_RUN_SIZES[-1]:
+        raise ValueError(f"bins must be 0-200 and runs 1-{DISTRIBUTION_RUN_SIZES[-1]}")
+    return {
+        "opponent_team_id": query.get("opponent", [None])[0],
+        # Round up to a fixed size so arbitrary values cannot mint new stored simulations.
+        "runs": next(size for size in DISTRIBUTION_RUN_SIZES if size >= runs) if runs else None,
+        "percentiles": _float_list(query, "percentiles", [10, 25, 50, 75, 90]),
+        "above": _float_list(query, "above", []),
+        "margins": _float_list(query, "margins", [0.0]),
+        "bins": bins,
+    }
+
+
+def get_distribution_payload(
+    league_id: str,
+    user_id: str,
+    *,
+    opponent_team_id: str | None,
+    runs: int | None,
+    percentiles: list[float],
+    above: list[float],
+    margins: list[float],
+    bins: int,
+    cancelled: Callable[[], bool] | None = None,
+) -> dict:
+    """Answer percentile / threshold / histogram queries from the stored simulation.
+
+    Without ``runs`` this reads the adaptive simulation behind the matchup
+    endpoint; with it, a fixed-size simulation of that many runs (one of
+    ``DISTRIBUTION_RUN_SIZES``).
+    """
+    team = db.query_one(
+        "SELECT team_id FROM league_members WHERE user_id = ? AND league_id = ? ORDER BY role DESC LIMIT 1",
+        (user_id, league_id),
+    )
+    if not team:
+        raise ValueError("team not found")
+    ctx = analysis.LeagueContext.load(league_id)
+    opponent_team_id = opponent_team_id or ctx.opponent_of(team["team_id"])
+    if not opponent_team_id:
+        return {"error": "No opponent"}
+    simulation = MATCHUP_SIMULATION if runs is None else {"runs": runs}
+    distribution = analytics_pool.matchup_distribution(
+        league_id, team["team_id"], opponent_team_id, ctx=ctx, cancelled=cancelled, **simulation
+    )
+    return {
+        "team_id": team["team_id"],
+        "opponent_team_id": opponent_team_id,
+        "runs": distribution.runs,
+        "mean": round(distribution.mean(), 2),
+        "std_dev": round(distribution.variance() ** 0.5, 2),
+        "percentiles": {f"p{p:g}": round(distribution.percentile(p), 2) for p in percentiles},
+        "prob_above": {f"{t:g}": round(distribution.prob_above(t), 4) for t in above},
+        "prob_win_by": {f"{m:g}": round(distribution.prob_win_by(m), 4) for m in margins},
+        "margin_percentiles": {f"p{p:g}": round(distribution.margin_percentile(p), 2) for p in percentiles},
+        "histogram": distribution.histogram(bins),
+    }
 
 
 def run(host: str = "0.0.0.0", port: int = 8787) -> None:
@@ -327,7 +1007,24 @@ def run(host: str = "0.0.0.0", port: int = 8787) -> None:
     if settings.demo_mode_enabled:
         demo.seed_demo_content()
     jobs.start_scheduler()
-    server = ThreadingHTTPServer((host, port), AppHandler)
+    executor = analytics_pool.get_executor()
+    if executor is not None:
+        LOGGER.info("Analytics workers ready: %s", executor.warm())
+    metrics_server = metrics.start_metrics_server(settings.metrics_port) if settings.telemetry_enabled else None
+    if settings.server_mode == "asyncio":
+        from .async_server import serve
+
+        try:
+            serve(host, port, max_concurrency=settings.server_max_concurrency, workers=settings.server_workers)
+        except KeyboardInterrupt:  # pragma: no cover - manual stop
+            LOGGER.info("Shutting down")
+        finally:
+            jobs.stop_scheduler()
+            analytics_pool.shutdown()
+            if metrics_server:
+                metrics_server.shutdown()
+        return
+    server = PooledHTTPServer((host, port), AppHandler, workers=settings.server_workers)
     LOGGER.info("Server listening on %s:%s", host, port)
     try:
         server.serve_forever()
@@ -335,6 +1032,9 @@ def run(host: str = "0.0.0.0", port: int = 8787) -> None:
         LOGGER.info("Shutting down")
     finally:
         jobs.stop_scheduler()
+        analytics_pool.shutdown()
+        if metrics_server:
+            metrics_server.shutdown()
         server.server_close()
 
 
@@ -0,0 +1,3 @@
+CREATE INDEX IF NOT EXISTS idx_roster_spots_roster ON roster_spots(roster_id);
+CREATE INDEX IF NOT EXISTS idx_roster_spots_player ON roster_spots(player_id);
+CREATE INDEX IF NOT EXISTS idx_rosters_league ON rosters(league_id);
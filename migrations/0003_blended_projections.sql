@@ -0,0 +1,14 @@
+CREATE TABLE IF NOT EXISTS blended_projections (
+    player_id TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    projected_points REAL NOT NULL,
+    floor REAL NOT NULL,
+    ceiling REAL NOT NULL,
+    source_count INTEGER NOT NULL,
+    source_signature TEXT NOT NULL,
+    refreshed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (player_id, week),
+    FOREIGN KEY (player_id) REFERENCES players(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_blended_projections_refreshed ON blended_projections(refreshed_at);
@@ -0,0 +1,10 @@
+-- Simulation results become content-addressed: the id is a hash of every
+-- simulation input, so a row is reusable until any input changes. Legacy rows
+-- were keyed by matchup only and never read back.
+DELETE FROM simulation_results;
+
+ALTER TABLE simulation_results ADD COLUMN team_id TEXT;
+ALTER TABLE simulation_results ADD COLUMN opponent_team_id TEXT;
+ALTER TABLE simulation_results ADD COLUMN runs INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_simulation_results_run_at ON simulation_results(run_at);
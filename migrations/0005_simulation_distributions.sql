@@ -0,0 +1,3 @@
+-- Full per-run score and win-margin distributions (backend.distribution
+-- format: header plus little-endian float32 arrays) next to the JSON summary.
+ALTER TABLE simulation_results ADD COLUMN distribution BLOB;
@@ -0,0 +1,8 @@
+-- Outputs of the rest-of-season simulator next to teams.playoff_odds, and an
+-- optional per-league playoff format (NULL = derived from the team count).
+ALTER TABLE teams ADD COLUMN bye_odds REAL NOT NULL DEFAULT 0;
+ALTER TABLE teams ADD COLUMN seed_odds TEXT;
+ALTER TABLE teams ADD COLUMN playoff_odds_updated_at TEXT;
+
+ALTER TABLE leagues ADD COLUMN playoff_teams INTEGER;
+ALTER TABLE leagues ADD COLUMN playoff_byes INTEGER;
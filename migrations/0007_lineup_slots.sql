@@ -0,0 +1,4 @@
+-- Optional per-league starting lineup layout as a JSON object of slot counts,
+-- e.g. {"QB": 1, "RB": 2, "WR": 2, "TE": 1, "FLEX": 1, "IR": 1}
+-- (NULL = analysis.DEFAULT_LINEUP_SLOTS).
+ALTER TABLE leagues ADD COLUMN lineup_slots TEXT;
@@ -0,0 +1,13 @@
+-- Strength-of-schedule index per (NFL team, position, week), rebuilt from
+-- blended_projections by jobs.refresh_schedule_strength. factor is the group's
+-- projection that week relative to its own season average: above 1 is a
+-- softer matchup, below 1 a harder one.
+CREATE TABLE IF NOT EXISTS schedule_strength (
+    nfl_team TEXT NOT NULL,
+    position TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    factor REAL NOT NULL,
+    player_count INTEGER NOT NULL,
+    refreshed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (nfl_team, position, week)
+);
@@ -0,0 +1,37 @@
+-- (player, week) pairs whose source projections changed since the last
+-- jobs.refresh_projections run. Triggers on projections fill it and the job
+-- re-blends only these pairs, then clears them.
+CREATE TABLE IF NOT EXISTS projection_changes (
+    player_id TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    PRIMARY KEY (player_id, week)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS projections_changed_insert AFTER INSERT ON projections
+BEGIN
+    INSERT OR IGNORE INTO projection_changes (player_id, week) VALUES (NEW.player_id, NEW.week);
+END;
+
+CREATE TRIGGER IF NOT EXISTS projections_changed_update AFTER UPDATE ON projections
+BEGIN
+    INSERT OR IGNORE INTO projection_changes (player_id, week) VALUES (OLD.player_id, OLD.week);
+    INSERT OR IGNORE INTO projection_changes (player_id, week) VALUES (NEW.player_id, NEW.week);
+END;
+
+CREATE TRIGGER IF NOT EXISTS projections_changed_delete AFTER DELETE ON projections
+BEGIN
+    INSERT OR IGNORE INTO projection_changes (player_id, week) VALUES (OLD.player_id, OLD.week);
+END;
+
+-- Everything already present is reconciled by the first run.
+INSERT OR IGNORE INTO projection_changes (player_id, week)
+SELECT player_id, week FROM projections
+UNION
+SELECT player_id, week FROM blended_projections;
+
+-- Earlier job runs stamped ISO timestamps with a 'T' separator; use the
+-- CURRENT_TIMESTAMP format throughout so text comparisons order correctly.
+UPDATE blended_projections SET refreshed_at = REPLACE(SUBSTR(refreshed_at, 1, 19), 'T', ' ')
+WHERE refreshed_at LIKE '%T%';
+UPDATE schedule_strength SET refreshed_at = REPLACE(SUBSTR(refreshed_at, 1, 19), 'T', ' ')
+WHERE refreshed_at LIKE '%T%';
@@ -0,0 +1,11 @@
+-- Per-table write counters behind db.data_version. db.run_migrations installs
+-- AFTER INSERT/UPDATE/DELETE triggers on every table that bump its row here, so
+-- writes from any process or connection invalidate version-stamped caches.
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- The '' row holds a random epoch for this database file, so a recreated
+-- database at the same path never reproduces versions cached from the old one.
+INSERT OR IGNORE INTO table_versions (name, version) VALUES ('', ABS(RANDOM() % 4611686018427387904));
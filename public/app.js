@@ -57,6 +57,7 @@ if (desktopQuery.addEventListener) {
 document.getElementById('logout-btn').addEventListener('click', async () => {
   if (!state.token) return;
   await apiPost('/api/auth/logout', {});
+  closeDashboardStream();
   localStorage.removeItem('ffa_token');
   state.token = null;
   state.user = null;
@@ -289,13 +290,74 @@ async function loadMe() {
   }
 }
 
+function setDashboardCards(cards) {
+  state.dashboard = { ...(state.dashboard || {}), leagues: cards };
+  state.leagues = cards.map((card) => card.league);
+  if (state.view === 'dashboard') renderDashboard();
+}
+
+async function openDashboardStream() {
+  if (!window.EventSource || !state.token) return false;
+  closeDashboardStream();
+  // EventSource cannot send headers, so the session token never goes in the URL;
+  // a short-lived single-use ticket opens the stream instead.
+  const issued = await apiPost('/api/dashboard/stream-ticket', {});
+  if (!issued) return false;
+  const stream = new EventSource(`/api/dashboard/stream?ticket=${encodeURIComponent(issued.ticket)}`);
+  state.dashboardStream = stream;
+  let started = false;
+  stream.onerror = () => {
+    // The ticket is spent, so EventSource's own reconnect would be rejected;
+    // drop the stream and fall back to polling.
+    if (state.dashboardStream !== stream) return;
+    closeDashboardStream();
+    pollDashboard();
+    // A stream that was serving (e.g. one that hit its lifetime) is reopened later.
+    if (started) setTimeout(() => state.view === 'dashboard' && !state.dashboardStream && loadDashboard(), 5000);
+  };
+  stream.addEventListener('start', (event) => {
+    started = true;
+    const { leagues } = JSON.parse(event.data);
+    const current = new Map((state.dashboard?.leagues || []).map((card) => [card.league.id, card]));
+    // Keep already-rendered cards visible while a refresh recomputes them.
+    setDashboardCards(leagues.map((card) => current.get(card.league.id) || card));
+  });
+  stream.addEventListener('card', (event) => {
+    const card = JSON.parse(event.data);
+    const cards = (state.dashboard?.leagues || []).map((existing) =>
+      existing.league.id === card.league.id ? card : existing
+    );
+    setDashboardCards(cards);
+  });
+  stream.addEventListener('update', () => showToast('Projections updated'));
+  return true;
+}
+
+function closeDashboardStream() {
+  if (state.dashboardStream) {
+    state.dashboardStream.close();
+    state.dashboardStream = null;
+  }
+}
+
+const DASHBOARD_RETRIES = 3;
+
 async function loadDashboard() {
+  if (await openDashboardStream()) return;
+  await pollDashboard();
+}
+
+async function pollDashboard(attempt = 0) {
   const response = await apiGet('/api/dashboard');
   if (response) {
     state.dashboard = response;
     const leagues = response.leagues || [];
     state.leagues = leagues.map((card) => card.league);
     render();
+    if (response.partial && state.view === 'dashboard' && attempt < DASHBOARD_RETRIES) {
+      // Some cards missed the server deadline; their results will be cached shortly.
+      setTimeout(() => pollDashboard(attempt + 1), 1500 * 2 ** attempt);
+    }
   }
 }
 
@@ -309,6 +371,17 @@ function renderDashboard() {
   state.dashboard.leagues.forEach((card) => {
     const el = document.createElement('article');
     el.className = 'card';
+    if (card.status && card.status !== 'ready') {
+      el.innerHTML = `
+        <header>
+          <h2>${card.league.name}</h2>
+          <div class="badge">Season ${card.league.season}</div>
+        </header>
+        <p>${card.status === 'pending' ? 'Crunching the numbers…' : 'Could not load this league right now.'}</p>
+      `;
+      container.appendChild(el);
+      return;
+    }
     el.innerHTML = `
       <header>
         <h2>${card.league.name}</h2>
@@ -339,6 +412,10 @@ function renderDashboard() {
   });
 }
 
+function formatScheduleDelta(delta) {
+  return `${delta >= 0 ? '+' : ''}${delta.toFixed(2)}`;
+}
+
 async function renderTradeLab() {
   if (!state.leagues.length) {
     appEl.querySelector('#trade-results').textContent = 'Connect or activate a league to see trade ideas.';
@@ -359,7 +436,7 @@ async function renderTradeLab() {
       <h3>Balanced ${proposal.offer_players.length}-for-${proposal.request_players.length} swap</h3>
       <p><strong>You give:</strong> ${proposal.offer_players.map((p) => p.name).join(', ')}</p>
       <p><strong>You receive:</strong> ${proposal.request_players.map((p) => p.name).join(', ')}</p>
-      <p>Lineup delta: <span class="badge">+${proposal.lineup_delta}</span> | Playoff odds +${(proposal.playoff_odds_delta * 100).toFixed(1)}%</p>
+      <p>Lineup delta: <span class="badge">+${proposal.lineup_delta}</span> | Playoff odds +${(proposal.playoff_odds_delta * 100).toFixed(1)}% | Schedule ${formatScheduleDelta(proposal.schedule_delta)}</p>
       <p class="hint">${proposal.notes}</p>
     `;
     container.appendChild(el);
@@ -454,7 +531,8 @@ async function loadLeagueTab(leagueId, tab) {
     const list = document.createElement('ul');
     roster.lineup.lineup.forEach((slot) => {
       const item = document.createElement('li');
-      item.textContent = `${slot.slot}: ${slot.name} – ${slot.projected_points} pts (${slot.recommendation})`;
+      const move = slot.optimal_slot && slot.optimal_slot !== slot.slot ? ` → ${slot.optimal_slot}` : '';
+      item.textContent = `${slot.slot}${move}: ${slot.name} – ${slot.projected_points} pts (${slot.recommendation})`;
       list.appendChild(item);
     });
     const summary = document.createElement('p');
@@ -483,7 +561,7 @@ async function loadLeagueTab(leagueId, tab) {
         <h3>Trade idea</h3>
         <p>You give: ${proposal.offer_players.map((p) => p.name).join(', ')}</p>
         <p>You receive: ${proposal.request_players.map((p) => p.name).join(', ')}</p>
-        <p>Lineup delta +${proposal.lineup_delta} | Playoff odds +${(proposal.playoff_odds_delta * 100).toFixed(1)}%</p>
+        <p>Lineup delta +${proposal.lineup_delta} | Playoff odds +${(proposal.playoff_odds_delta * 100).toFixed(1)}% | Schedule ${formatScheduleDelta(proposal.schedule_delta)}</p>
         <p class="hint">${proposal.notes}</p>
       `;
       list.appendChild(card);
@@ -492,8 +570,17 @@ async function loadLeagueTab(leagueId, tab) {
     return;
   }
   if (tab === 'schedule') {
-    const schedule = await apiGet(`/api/dashboard`); // reuse for heatmap
-    container.innerHTML = '<p>Playoff heatmap driven by nightly simulations.</p>';
+    const schedule = await apiGet(`/api/leagues/${leagueId}/schedule`);
+    const list = document.createElement('ul');
+    (schedule?.weeks || []).forEach((row) => {
+      const item = document.createElement('li');
+      item.textContent = `Week ${row.week}: pace ${row.pace} pts, schedule ${formatScheduleDelta(row.schedule - 1)}`;
+      list.appendChild(item);
+    });
+    const hint = document.createElement('p');
+    hint.className = 'hint';
+    hint.textContent = 'Schedule factors are rebuilt nightly; above zero means softer matchups for your league’s position groups.';
+    container.replaceChildren(hint, list);
     return;
   }
 }
@@ -0,0 +1,81 @@
+"""Benchmarks for database-heavy code paths, run against a throwaway database."""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from backend import config, db, demo, espn
+
+BENCH_USER = "bench-user"
+
+
+def _timed(func: Callable[[], object], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_seed(repeat: int) -> list[float]:
+    return _timed(demo.seed_demo_content, repeat)
+
+
+def bench_sync(repeat: int) -> list[float]:
+    db.execute(
+        "INSERT OR IGNORE INTO users (id, email, name, is_demo) VALUES (?, ?, ?, 0)",
+        (BENCH_USER, "bench@example.com", "Bench"),
+    )
+    for provider in ("mock", "real"):
+        state = espn.begin_connection(BENCH_USER, provider)
+        espn.complete_connection(state.state_id, {"access_token": f"bench-{provider}-token"}, provider)
+    return _timed(lambda: espn.sync_leagues(BENCH_USER, "real"), repeat)
+
+
+def bench_activate(repeat: int) -> list[float]:
+    league_ids = [row["id"] for row in db.query_all("SELECT id FROM leagues")]
+    return _timed(lambda: espn.set_active_leagues(BENCH_USER, league_ids[::2]), repeat)
+
+
+def bench_migrations(repeat: int) -> list[float]:
+    return _timed(db.run_migrations, repeat)
+
+
+STAGES: dict[str, Callable[[int], list[float]]] = {
+    "seed": bench_seed,
+    "sync": bench_sync,
+    "activate": bench_activate,
+    "migrations": bench_migrations,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("stages", nargs="*", help=f"subset of: {', '.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    stages = args.stages or list(STAGES)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = str(Path(tmp) / "bench.db")
+        config.reset_settings()
+        db.close_all()
+        db.run_migrations()
+        demo.seed_demo_content()
+        print(f"{'stage':<10} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+        for name in stages:
+            timings = [t * 1000 for t in STAGES[name](args.repeat)]
+            print(f"{name:<10} {statistics.median(timings):>10.2f} {min(timings):>10.2f} {max(timings):>10.2f}")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -20,9 +20,20 @@ def run_types() -> None:
 
 
 def run_unit() -> None:
-    from tests.unit import test_analysis
+    from tests.unit import test_analysis, test_analytics_pool, test_db, test_distribution, test_events, test_metrics, test_ros
 
-    suite = unittest.TestLoader().loadTestsFromModule(test_analysis)
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite(
+        [
+            loader.loadTestsFromModule(test_analysis),
+            loader.loadTestsFromModule(test_analytics_pool),
+            loader.loadTestsFromModule(test_db),
+            loader.loadTestsFromModule(test_distribution),
+            loader.loadTestsFromModule(test_events),
+            loader.loadTestsFromModule(test_metrics),
+            loader.loadTestsFromModule(test_ros),
+        ]
+    )
     result = unittest.TextTestRunner(verbosity=2).run(suite)
     if not result.wasSuccessful():
         raise SystemExit(1)
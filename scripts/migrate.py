@@ -0,0 +1,30 @@
+"""Apply pending migrations, or time them against the live database with --check."""
+from __future__ import annotations
+
+import argparse
+import logging
+
+from backend import db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="run pending migrations inside a transaction, report timings, then roll back",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    report = db.run_migrations(dry_run=args.check)
+    if not report:
+        print(f"No pending migrations ({len(db.applied_migrations())} applied)")
+        return
+    for entry in report:
+        print(f"{entry['version']:<40} {entry['duration_ms']:>10.1f} ms")
+    if args.check:
+        print("Dry run: changes rolled back")
+
+
+if __name__ == "__main__":
+    main()
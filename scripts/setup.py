@@ -4,7 +4,7 @@ from __future__ import annotations
 import os
 from pathlib import Path
 
-from backend import db, demo
+from backend import config, db, demo
 from tools.generate_changelog import main as build_changelog
 
 
@@ -16,6 +16,7 @@ def run() -> None:
                 continue
             key, value = line.split("=", 1)
             os.environ.setdefault(key, value)
+    config.reset_settings()
     db.run_migrations()
     demo.seed_demo_content()
     build_changelog()
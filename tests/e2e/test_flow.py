@@ -1,25 +1,45 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import threading
 import time
 import unittest
 import urllib.request
-from http.client import HTTPResponse
+from unittest import mock
+from urllib.error import HTTPError
+from http.client import HTTPConnection, HTTPResponse
 
-from backend import db, demo
-from backend.server import AppHandler
-from http.server import ThreadingHTTPServer
+from backend import config, db, demo, jobs, server
+from backend.async_server import AsyncAppServer
+from backend.server import AppHandler, PooledHTTPServer
 
 TEST_DB = "data/test_e2e.db"
 BASE_URL = "http://127.0.0.1:8890"
 
 
+def open_dashboard_streams(port: int, count: int) -> list[HTTPConnection]:
+    """Open ``count`` dashboard event streams and return their live connections."""
+    conn = HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("POST", "/api/demo/login", body="{}", headers={"Content-Type": "application/json"})
+    token = json.loads(conn.getresponse().read())["token"]
+    streams = []
+    for _ in range(count):
+        conn.request("POST", "/api/dashboard/stream-ticket", body="{}", headers={"Authorization": f"Bearer {token}"})
+        ticket = json.loads(conn.getresponse().read())["ticket"]
+        stream = HTTPConnection("127.0.0.1", port, timeout=5)
+        stream.request("GET", f"/api/dashboard/stream?ticket={ticket}")
+        assert stream.getresponse().status == 200
+        streams.append(stream)
+    conn.close()
+    return streams
+
+
 class LiveServer(threading.Thread):
     def __init__(self) -> None:
         super().__init__(daemon=True)
-        self.server = ThreadingHTTPServer(("127.0.0.1", 8890), AppHandler)
+        self.server = PooledHTTPServer(("127.0.0.1", 8890), AppHandler, workers=4)
 
     def run(self) -> None:  # pragma: no cover - server loop
         self.server.serve_forever()
@@ -34,7 +54,8 @@ class EndToEndTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
         os.environ["DATABASE_URL"] = TEST_DB
-        db._connection_cache.clear()
+        config.reset_settings()
+        db.close_all()
         db.run_migrations()
         demo.seed_demo_content()
         cls.server = LiveServer()
@@ -44,9 +65,7 @@ class EndToEndTestCase(unittest.TestCase):
     @classmethod
     def tearDownClass(cls) -> None:
         cls.server.stop()
-        for conn in list(db._connection_cache.values()):
-            conn.close()
-        db._connection_cache.clear()
+        db.close_all()
         if os.path.exists(TEST_DB):
             os.remove(TEST_DB)
 
@@ -96,6 +115,94 @@ class EndToEndTestCase(unittest.TestCase):
         token = demo_payload["token"]
         dashboard = self._get("/api/dashboard", token)
         self.assertGreaterEqual(len(dashboard["leagues"]), 1)
+        self.assertFalse(dashboard["partial"])
+        for card in dashboard["leagues"]:
+            self.assertEqual(card["status"], "ready")
+            self.assertGreaterEqual(card["compute_ms"], 0)
+
+    def test_dashboard_returns_pending_cards_past_deadline(self) -> None:
+        user_id = self._post("/api/demo/login", {})["user_id"]
+        release = threading.Event()
+        original = server._build_league_card
+
+        def slow_card(league: dict, team_id: str | None) -> dict:
+            release.wait(5)
+            return original(league, team_id)
+
+        with mock.patch.object(server, "_build_league_card", slow_card):
+            payload = server.build_dashboard_payload(user_id, deadline=0.05)
+            release.set()
+        self.assertTrue(payload["partial"])
+        self.assertGreaterEqual(len(payload["leagues"]), 1)
+        for card in payload["leagues"]:
+            self.assertEqual(card["status"], "pending")
+            self.assertIsNone(card["compute_ms"])
+
+    def test_failed_cards_are_not_partial(self) -> None:
+        user_id = self._post("/api/demo/login", {})["user_id"]
+        failing = mock.Mock(side_effect=RuntimeError("boom"))
+        with mock.patch.object(server, "_build_league_card", failing), self.assertLogs(server.LOGGER, "ERROR"):
+            payload = server.build_dashboard_payload(user_id)
+        self.assertFalse(payload["partial"])
+        self.assertEqual(payload["errors"], len(payload["leagues"]))
+        self.assertTrue(all(card["status"] == "error" for card in payload["leagues"]))
+
+    def test_dashboard_stream_sends_cards_and_job_updates(self) -> None:
+        token = self._post("/api/demo/login", {})["token"]
+        ticket = self._post("/api/dashboard/stream-ticket", {}, token)["ticket"]
+        conn = HTTPConnection("127.0.0.1", 8890, timeout=5)
+        with self.assertLogs(server.LOGGER, "INFO") as logs:
+            conn.request("GET", f"/api/dashboard/stream?ticket={ticket}")
+            response = conn.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        self.assertNotIn(ticket, "\n".join(logs.output))
+
+        def read_until(name: str) -> list[tuple[str, dict]]:
+            received, event = [], None
+            while True:
+                line = response.fp.readline().decode().rstrip("\n")
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    received.append((event, json.loads(line[len("data: "):])))
+                    if event == name:
+                        return received
+
+        initial = read_until("done")
+        names = [name for name, _ in initial]
+        self.assertEqual(names[0], "start")
+        leagues = len(initial[0][1]["leagues"])
+        self.assertGreaterEqual(leagues, 1)
+        self.assertEqual(names.count("card"), leagues)
+        self.assertIn("progress", names)
+        self.assertTrue(all(data["status"] == "ready" for name, data in initial if name == "card"))
+
+        db.execute("UPDATE players SET injury_status = 'ACTIVE' WHERE id = 'player-004'")
+        self.assertEqual(jobs.refresh_injuries(), ["player-004"])
+        pushed = read_until("done")
+        self.assertEqual(pushed[0], ("update", {"topics": ["injuries"]}))
+        self.assertEqual([name for name, _ in pushed].count("card"), leagues)
+        conn.close()
+
+    def test_stream_tickets_are_single_use(self) -> None:
+        token = self._post("/api/demo/login", {})["token"]
+        ticket = self._post("/api/dashboard/stream-ticket", {}, token)["ticket"]
+        self.assertIsNotNone(server.redeem_stream_ticket(ticket))
+        with self.assertRaises(HTTPError) as raised:
+            urllib.request.urlopen(f"{BASE_URL}/api/dashboard/stream?ticket={ticket}")
+        self.assertEqual(raised.exception.code, 400)
+        with self.assertRaises(HTTPError) as raised:
+            urllib.request.urlopen(f"{BASE_URL}/api/dashboard/stream?token={token}")
+        self.assertEqual(raised.exception.code, 400)
+
+    def test_open_streams_do_not_hold_request_workers(self) -> None:
+        streams = open_dashboard_streams(8890, 6)
+        try:
+            self.assertFalse(self._get("/api/me")["authenticated"])
+        finally:
+            for stream in streams:
+                stream.close()
 
     def test_league_lineup_optimizer(self) -> None:
         demo_payload = self._post("/api/demo/login", {})
@@ -105,6 +212,11 @@ class EndToEndTestCase(unittest.TestCase):
         roster = self._get(f"/api/leagues/{league_id}/roster", token)
         self.assertIn("lineup", roster)
         self.assertGreaterEqual(roster["lineup"]["total_projection"], 90)
+        report = self._get(f"/api/leagues/{league_id}/lineups", token)
+        totals = [team["total_projection"] for team in report["teams"]]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+        mine = next(team for team in report["teams"] if team["team_id"] == roster["team_id"])
+        self.assertEqual(mine["lineup"], roster["lineup"]["lineup"])
 
     def test_waiver_and_trade_recommendations(self) -> None:
         demo_payload = self._post("/api/demo/login", {})
@@ -115,6 +227,167 @@ class EndToEndTestCase(unittest.TestCase):
         trades = self._get(f"/api/leagues/{league_id}/trades", token)
         self.assertGreaterEqual(len(waivers["candidates"]), 1)
         self.assertGreaterEqual(len(trades["proposals"]), 1)
+        pending = [
+            {
+                "offer": [player["id"] for player in proposal["offer_players"]],
+                "request": [player["id"] for player in proposal["request_players"]],
+            }
+            for proposal in trades["proposals"]
+        ]
+        evaluated = self._post(f"/api/leagues/{league_id}/trades/evaluate", {"proposals": pending * 50}, token)
+        self.assertEqual(len(evaluated["evaluations"]), len(pending) * 50)
+        self.assertEqual(evaluated["evaluations"][: len(pending)], trades["proposals"])
+        self.assertEqual(evaluated["timing"]["proposals"], len(pending) * 50)
+        with self.assertRaises(HTTPError) as ctx:
+            self._post(f"/api/leagues/{league_id}/trades/evaluate", {"proposals": [{"offer": [], "request": []}]}, token)
+        self.assertEqual(ctx.exception.code, 400)
+
+    def test_matchup_distribution_queries(self) -> None:
+        token = self._post("/api/demo/login", {})["token"]
+        league_id = self._get("/api/dashboard", token)["leagues"][0]["league"]["id"]
+        payload = self._get(
+            f"/api/leagues/{league_id}/matchup/distribution?percentiles=5,95&above=100&margins=0,10&bins=5", token
+        )
+        matchup = self._get(f"/api/leagues/{league_id}/matchup", token)
+        self.assertEqual(payload["runs"], matchup["runs"])
+        self.assertLessEqual(payload["percentiles"]["p5"], payload["percentiles"]["p95"])
+        self.assertGreaterEqual(payload["prob_win_by"]["0"], payload["prob_win_by"]["10"])
+        self.assertIn("100", payload["prob_above"])
+        self.assertEqual(sum(bucket["count"] for bucket in payload["histogram"]), payload["runs"])
+        fixed = self._get(f"/api/leagues/{league_id}/matchup/distribution?runs=200&bins=4", token)
+        self.assertEqual(fixed["runs"], server.DISTRIBUTION_RUN_SIZES[0])
+        self.assertEqual(sum(bucket["count"] for bucket in fixed["histogram"]), fixed["runs"])
+        with self.assertRaises(HTTPError) as ctx:
+            self._get(f"/api/leagues/{league_id}/matchup/distribution?runs=100000", token)
+        self.assertEqual(ctx.exception.code, 400)
+        for bad in ("percentiles=nan", "above=inf", "margins=-inf"):
+            with self.assertRaises(HTTPError) as ctx:
+                self._get(f"/api/leagues/{league_id}/matchup/distribution?{bad}", token)
+            self.assertEqual(ctx.exception.code, 400)
+
+    def test_league_schedule_heatmap(self) -> None:
+        token = self._post("/api/demo/login", {})["token"]
+        league_id = self._get("/api/dashboard", token)["leagues"][0]["league"]["id"]
+        payload = self._get(f"/api/leagues/{league_id}/schedule", token)
+        self.assertEqual(payload["weeks"], server.analysis.schedule_heatmap(league_id))
+        self.assertGreaterEqual(len(payload["weeks"]), 1)
+
+    def test_budget_cut_matchup_is_not_cached(self) -> None:
+        token = self._post("/api/demo/login", {})["token"]
+        league_id = self._get("/api/dashboard", token)["leagues"][0]["league"]["id"]
+        with mock.patch.object(server.analysis, "reached_target", return_value=False):
+            conn = HTTPConnection("127.0.0.1", 8890, timeout=5)
+            conn.request("GET", f"/api/leagues/{league_id}/matchup", headers={"Authorization": f"Bearer {token}"})
+            response = conn.getresponse()
+            payload = json.loads(response.read())
+            conn.close()
+        self.assertTrue(payload["provisional"])
+        self.assertIsNone(response.getheader("ETag"))
+        self.assertEqual(response.getheader("Cache-Control"), "no-store")
+        self.assertFalse(self._get(f"/api/leagues/{league_id}/matchup", token)["provisional"])
+
+    def test_conditional_get_returns_not_modified(self) -> None:
+        token = self._post("/api/demo/login", {})["token"]
+        conn = HTTPConnection("127.0.0.1", 8890, timeout=5)
+        headers = {"Authorization": f"Bearer {token}"}
+        conn.request("GET", "/api/dashboard", headers=headers)
+        first = conn.getresponse()
+        first.read()
+        etag = first.getheader("ETag")
+        self.assertTrue(etag)
+        conn.close()
+        conn = HTTPConnection("127.0.0.1", 8890, timeout=5)
+        conn.request("GET", "/api/dashboard", headers={**headers, "If-None-Match": etag})
+        cached = conn.getresponse()
+        self.assertEqual(cached.status, 304)
+        self.assertEqual(cached.read(), b"")
+        conn.close()
+        db.execute("UPDATE projections SET floor = floor WHERE player_id = 'player-001'")
+        conn = HTTPConnection("127.0.0.1", 8890, timeout=5)
+        conn.request("GET", "/api/dashboard", headers={**headers, "If-None-Match": etag})
+        refreshed = conn.getresponse()
+        self.assertEqual(refreshed.status, 200)
+        self.assertNotEqual(refreshed.getheader("ETag"), etag)
+        refreshed.read()
+        conn.close()
+
+
+class AsyncLiveServer(threading.Thread):
+    def __init__(self, port: int) -> None:
+        super().__init__(daemon=True)
+        self.server = AsyncAppServer("127.0.0.1", port, max_concurrency=4, workers=4)
+
+    def run(self) -> None:  # pragma: no cover - server loop
+        asyncio.run(self.server.serve_forever())
+
+    def stop(self) -> None:
+        self.server.stop()
+        self.join(timeout=2)
+
+
+class AsyncServerTestCase(unittest.TestCase):
+    PORT = 8891
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        os.environ["DATABASE_URL"] = TEST_DB
+        config.reset_settings()
+        db.close_all()
+        db.run_migrations()
+        demo.seed_demo_content()
+        cls.server = AsyncLiveServer(cls.PORT)
+        cls.server.start()
+        time.sleep(0.2)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.stop()
+        db.close_all()
+        if os.path.exists(TEST_DB):
+            os.remove(TEST_DB)
+
+    def test_keep_alive_serves_api_and_static(self) -> None:
+        conn = HTTPConnection("127.0.0.1", self.PORT, timeout=5)
+        conn.request("POST", "/api/demo/login", body="{}", headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        token = json.loads(response.read())["token"]
+        self.assertEqual(response.version, 11)
+        sock = conn.sock
+        conn.request("GET", "/api/dashboard", headers={"Authorization": f"Bearer {token}"})
+        dashboard = json.loads(conn.getresponse().read())
+        self.assertGreaterEqual(len(dashboard["leagues"]), 1)
+        conn.request("GET", "/index.html")
+        static = conn.getresponse()
+        self.assertEqual(static.status, 200)
+        self.assertIn(b"<html", static.read().lower())
+        self.assertIs(conn.sock, sock)
+        conn.close()
+
+    def test_open_streams_do_not_hold_concurrency_slots(self) -> None:
+        streams = open_dashboard_streams(self.PORT, 6)
+        try:
+            conn = HTTPConnection("127.0.0.1", self.PORT, timeout=5)
+            conn.request("GET", "/api/me")
+            self.assertEqual(json.loads(conn.getresponse().read()), {"authenticated": False})
+            conn.close()
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def test_rejects_unframed_and_oversized_bodies(self) -> None:
+        for headers, status in (
+            ({"Content-Length": str(server.MAX_BODY_BYTES + 1)}, 413),
+            ({"Transfer-Encoding": "chunked"}, 501),
+        ):
+            conn = HTTPConnection("127.0.0.1", self.PORT, timeout=5)
+            conn.putrequest("POST", "/api/demo/login")
+            for name, value in headers.items():
+                conn.putheader(name, value)
+            conn.endheaders()
+            response = conn.getresponse()
+            self.assertEqual(response.status, status)
+            self.assertIn("error", json.loads(response.read()))
+            conn.close()
 
 
 if __name__ == "__main__":
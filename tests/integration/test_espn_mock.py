@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import json
 import unittest
 
-from backend import db, demo, espn
+from backend import analysis, db, demo, espn
 
 
 class ESPNMockTestCase(unittest.TestCase):
@@ -15,6 +16,7 @@ class ESPNMockTestCase(unittest.TestCase):
             "INSERT OR IGNORE INTO users (id, email, name, is_demo) VALUES (?, ?, ?, 0)",
             (cls.user_id, "test@example.com", "Test",),
         )
+        db.execute("DELETE FROM league_members WHERE user_id = ?", (cls.user_id,))
 
     def test_begin_and_complete_flow(self) -> None:
         state = espn.begin_connection(self.user_id, provider_name="mock")
@@ -33,6 +35,21 @@ class ESPNMockTestCase(unittest.TestCase):
         active = espn.active_leagues_for_user(self.user_id)
         self.assertEqual(len(active), 1)
 
+    def test_resync_keeps_computed_columns(self) -> None:
+        analysis.refresh_playoff_odds("league-001", runs=200)
+        before = db.query_one("SELECT playoff_odds, bye_odds, seed_odds FROM teams WHERE id = 'team-001'")
+        self.assertIsNotNone(before["seed_odds"])
+        db.execute("UPDATE leagues SET is_active = 0 WHERE id = 'league-001'")
+        demo.seed_demo_content()
+        after = db.query_one("SELECT playoff_odds, bye_odds, seed_odds FROM teams WHERE id = 'team-001'")
+        self.assertEqual(dict(after), dict(before))
+        league = db.query_one("SELECT is_active, playoff_teams, playoff_byes FROM leagues WHERE id = 'league-001'")
+        self.assertEqual(dict(league), {"is_active": 0, "playoff_teams": 1, "playoff_byes": 0})
+        slots = db.query_one("SELECT lineup_slots FROM leagues WHERE id = 'league-001'")["lineup_slots"]
+        self.assertEqual(analysis.lineup_layout(slots), analysis.DEFAULT_LINEUP_SLOTS)
+        self.assertEqual(json.loads(slots)["BE"], 6)
+        db.execute("UPDATE leagues SET is_active = 1 WHERE id = 'league-001'")
+
 
 if __name__ == "__main__":
     unittest.main()
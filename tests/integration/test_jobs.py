@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import unittest
+from datetime import datetime
 
-from backend import db, demo, jobs, notifications
+from backend import analysis, db, demo, events, jobs, notifications, schedule
 
 
 class JobsTestCase(unittest.TestCase):
@@ -25,6 +26,105 @@ class JobsTestCase(unittest.TestCase):
         notices = notifications.pending_notifications(self.user_id)
         self.assertGreaterEqual(len(notices), 1)
 
+    def test_refresh_injuries_writes_and_publishes_only_changes(self) -> None:
+        db.execute("UPDATE players SET injury_status = 'ACTIVE' WHERE id = 'player-004'")
+        with events.subscribe(events.INJURIES) as injuries:
+            self.assertEqual(jobs.refresh_injuries(), ["player-004"])
+            self.assertEqual(injuries.get(timeout=0).payload, {"player_ids": ["player-004"]})
+            version = db.data_version("players")
+            self.assertEqual(jobs.refresh_injuries(), [])
+            self.assertIsNone(injuries.get(timeout=0))
+            self.assertEqual(db.data_version("players"), version)
+        status = db.query_one("SELECT injury_status FROM players WHERE id = 'player-004'")["injury_status"]
+        self.assertEqual(status, "QUESTIONABLE")
+
+    def test_refresh_projections_materializes_changed_pairs(self) -> None:
+        jobs.refresh_projections()
+        row = db.query_one(
+            "SELECT * FROM blended_projections WHERE player_id = ? AND week = ?",
+            ("player-001", 8),
+        )
+        live = analysis.blend_projections("player-001", 8)
+        self.assertAlmostEqual(row["projected_points"], live.projected_points, places=2)
+        self.assertAlmostEqual(row["floor"], live.floor, places=2)
+        self.assertEqual(row["source_count"], 2)
+        # Same format as CURRENT_TIMESTAMP defaults, so text comparisons order correctly.
+        datetime.strptime(row["refreshed_at"], "%Y-%m-%d %H:%M:%S")
+        self.assertIsNone(db.query_one("SELECT 1 FROM projection_changes"))
+        self.assertEqual(jobs.refresh_projections(), 0)
+        db.execute(
+            "UPDATE projections SET projected_points = projected_points + 1 WHERE player_id = ? AND source = ?",
+            ("player-003", "nfldata"),
+        )
+        try:
+            changed = db.query_all("SELECT player_id, week FROM projection_changes")
+            self.assertEqual([tuple(row) for row in changed], [("player-003", 8)])
+            self.assertEqual(jobs.refresh_projections(), 1)
+        finally:
+            db.execute(
+                "UPDATE projections SET projected_points = projected_points - 1 WHERE player_id = ? AND source = ?",
+                ("player-003", "nfldata"),
+            )
+
+    def test_refresh_schedule_strength_indexes_team_position_weeks(self) -> None:
+        weekly = {"player-sos-1": {8: 10.0, 9: 15.0, 10: 5.0}, "player-sos-2": {8: 20.0, 9: 20.0, 10: 20.0}}
+        for player_id in weekly:
+            db.execute(
+                "INSERT INTO players (id, name, position, team, bye_week) VALUES (?, ?, 'WR', 'SOS', 12)",
+                (player_id, player_id),
+            )
+        db.executemany(
+            """
+            INSERT INTO blended_projections
+                (player_id, week, projected_points, floor, ceiling, source_count, source_signature)
+            VALUES (?, ?, ?, 0, 0, 1, 'test')
+            """,
+            [(player_id, week, points) for player_id, weeks in weekly.items() for week, points in weeks.items()],
+        )
+        try:
+            self.assertGreaterEqual(jobs.refresh_schedule_strength(), 3)
+            self.assertEqual(jobs.refresh_schedule_strength(), 0)
+            rows = db.query_all(
+                "SELECT week, factor, player_count FROM schedule_strength WHERE nfl_team = 'SOS' ORDER BY week"
+            )
+            # Player 1 averages 10 (ratios 1.0, 1.5, 0.5); player 2 is flat.
+            self.assertEqual(
+                [(row["week"], row["factor"], row["player_count"]) for row in rows],
+                [(8, 1.0, 2), (9, 1.25, 2), (10, 0.75, 2)],
+            )
+            index = schedule.ScheduleIndex()
+            index.refresh()
+            self.assertEqual(index.factor("SOS", "WR", 9), 1.25)
+            self.assertIsNone(index.factor("SOS", "RB", 9))
+            self.assertAlmostEqual(index.outlook("SOS", "WR", 8), 1.0)
+            self.assertAlmostEqual(index.outlook("SOS", "WR", 9, bye_week=10), 1.25)
+            self.assertEqual(index.outlook("SOS", "WR", 11), 1.0)
+
+            analysis.SCHEDULE_INDEX.refresh()
+            player = analysis.Player(
+                id="player-sos-1", name="player-sos-1", position="WR", team="SOS", bye_week=12, injury_status=None
+            )
+            ctx = analysis.LeagueContext.load("league-001", week=9)
+            self.assertEqual(ctx.schedule["player-sos-1"], index.outlook("SOS", "WR", 9, bye_week=12))
+            candidate = analysis._waiver_candidate(
+                player, analysis.blend_projections(player.id, 9), 9, ctx.schedule_outlook(player)
+            )
+            self.assertEqual(candidate.schedule_score, round(index.outlook("SOS", "WR", 9), 2))
+        finally:
+            db.execute("DELETE FROM blended_projections WHERE player_id IN ('player-sos-1', 'player-sos-2')")
+            db.execute("DELETE FROM players WHERE id IN ('player-sos-1', 'player-sos-2')")
+            jobs.refresh_schedule_strength()
+        self.assertIsNone(db.query_one("SELECT 1 FROM schedule_strength WHERE nfl_team = 'SOS'"))
+
+    def test_refresh_playoff_odds_writes_teams(self) -> None:
+        db.execute("UPDATE leagues SET is_active = 1 WHERE id = 'league-001'")
+        self.assertGreaterEqual(jobs.refresh_playoff_odds(), 1)
+        rows = db.query_all(
+            "SELECT playoff_odds, seed_odds, playoff_odds_updated_at FROM teams WHERE league_id = 'league-001'"
+        )
+        self.assertAlmostEqual(sum(row["playoff_odds"] for row in rows), 1.0, places=3)
+        self.assertTrue(all(row["seed_odds"] and row["playoff_odds_updated_at"] for row in rows))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -7,6 +7,12 @@ import unittest
 
 TEST_MODULES = [
     "tests.unit.test_analysis",
+    "tests.unit.test_analytics_pool",
+    "tests.unit.test_db",
+    "tests.unit.test_distribution",
+    "tests.unit.test_events",
+    "tests.unit.test_metrics",
+    "tests.unit.test_ros",
     "tests.integration.test_espn_mock",
     "tests.integration.test_jobs",
     "tests.e2e.test_flow",
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import itertools
+import random
+import threading
+import time
 import unittest
+from unittest import mock
 
 from backend import analysis, db, demo
+from backend.cache import SingleFlight
 
 
 class AnalysisTestCase(unittest.TestCase):
@@ -10,27 +16,353 @@ class AnalysisTestCase(unittest.TestCase):
     def setUpClass(cls) -> None:
         db.run_migrations()
         demo.seed_demo_content()
+        db.execute("DELETE FROM simulation_results")
 
     def test_blend_projections(self) -> None:
         projection = analysis.blend_projections("player-001", week=8)
         self.assertGreater(projection.projected_points, 0)
         self.assertAlmostEqual(projection.floor, 17.83, places=2)
 
+    def test_blend_projections_cached_until_write(self) -> None:
+        first = analysis.blend_projections("player-002", week=8)
+        hits = analysis.PROJECTION_CACHE.hits
+        self.assertIs(analysis.blend_projections("player-002", week=8), first)
+        self.assertEqual(analysis.PROJECTION_CACHE.hits, hits + 1)
+        db.execute(
+            "UPDATE projections SET floor = floor WHERE player_id = ? AND week = ?",
+            ("player-002", 8),
+        )
+        refreshed = analysis.blend_projections("player-002", week=8)
+        self.assertIsNot(refreshed, first)
+        self.assertEqual(refreshed, first)
+
     def test_start_sit_delta_positive(self) -> None:
         lineup = analysis.start_sit_for_roster("roster-001")
         self.assertIsNotNone(lineup)
         self.assertGreaterEqual(lineup.total_projection, 90)
         self.assertGreaterEqual(len(lineup.lineup), 1)
 
+    def test_lineup_optimizer_matches_brute_force(self) -> None:
+        layout = {"QB": 1, "RB": 1, "WR": 1, "FLEX": 1, "SUPERFLEX": 1}
+        slots = analysis._starting_slots(layout)
+        rng = random.Random(7)
+        for trial in range(25):
+            players = [
+                analysis.Player(f"p{i}", f"Player {i}", rng.choice("QB RB WR TE".split()), "FA", 0, "ACTIVE")
+                for i in range(6)
+            ]
+            projections = {
+                p.id: analysis.Projection(p.id, 8, "blended", round(rng.uniform(0, 30), 2), 0.0, 0.0) for p in players
+            }
+            spots = [analysis.RosterSpot(p, "Bench", "bench", 0.0, "", "") for p in players]
+            ctx = analysis.LeagueContext(
+                "synthetic", 8, {}, {"r": {}}, {"r": spots}, {p.id: p for p in players}, [], projections, (), layout
+            )
+            best = 0.0
+            for seating in itertools.product([None, *players], repeat=len(slots)):
+                chosen = [p for p in seating if p is not None]
+                if len({p.id for p in chosen}) == len(chosen) and all(
+                    p is None or p.position in analysis.SLOT_ELIGIBILITY[slot] for p, slot in zip(seating, slots)
+                ):
+                    best = max(best, sum(projections[p.id].projected_points for p in chosen))
+            lineup = analysis.start_sit_for_roster("r", ctx=ctx)
+            self.assertAlmostEqual(lineup.total_projection, round(best, 2), places=2, msg=f"trial {trial}")
+
+    def test_lineup_evaluator_what_if_matches_full_solve(self) -> None:
+        slots = analysis._starting_slots({"QB": 1, "RB": 2, "WR": 2, "TE": 1, "FLEX": 1, "SUPERFLEX": 1})
+        rng = random.Random(11)
+
+        def player(name: str) -> tuple[str, str, float]:
+            return name, rng.choice(["QB", "RB", "WR", "TE", "K"]), round(rng.uniform(0, 30), 1)
+
+        for trial in range(200):
+            roster = [player(f"p{i}") for i in range(rng.randint(0, 14))]
+            evaluator = analysis.LineupEvaluator(slots, roster)
+            for step in range(3):
+                drop = rng.sample([pid for pid, _, _ in roster], min(len(roster), rng.randint(0, 3)))
+                add = [player(f"n{trial}-{step}-{i}") for i in range(rng.randint(0, 3))]
+                after = evaluator.what_if(add, drop)
+                roster = [entry for entry in roster if entry[0] not in drop] + add
+                full = analysis.LineupEvaluator(slots, roster)
+                self.assertAlmostEqual(after.total, full.total, places=9, msg=f"trial {trial} step {step}")
+                self.assertEqual(after.delta(), 0.0)
+                evaluator = after
+
+    def test_lineup_layout_falls_back_on_bad_json(self) -> None:
+        self.assertEqual(analysis.lineup_layout('{"QB": 2, "BE": 6}'), {"QB": 2})
+        for raw in ("{not json", "[1, 2]", '{"QB": "two"}'):
+            self.assertEqual(analysis.lineup_layout(raw), analysis.DEFAULT_LINEUP_SLOTS)
+
+    def test_league_lineups_respect_slots_and_availability(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        lineups = analysis.optimize_league_lineups("league-001", ctx=ctx)
+        self.assertEqual(set(lineups), {"team-001", "team-002"})
+        mine = {entry["name"]: entry for entry in lineups["team-001"].lineup}
+        # Two QBs, one QB slot: the better one starts and FLEX cannot take a QB.
+        self.assertEqual(mine["Josh Allen"]["optimal_slot"], "QB")
+        self.assertEqual(mine["Jalen Hurts"]["recommendation"], "bench")
+        started = [entry["optimal_slot"] for entry in lineups["team-001"].lineup if entry["recommendation"] == "start"]
+        self.assertEqual(sorted(started), sorted(analysis._starting_slots(ctx.lineup_slots)))
+        self.assertEqual(lineups["team-002"].open_slots, ["RB", "WR", "FLEX"])
+        self.assertEqual(lineups["team-001"], analysis.start_sit_for_roster("roster-001", ctx=ctx))
+        allen = ctx.players["player-001"]
+        ctx.players["player-001"] = analysis.Player(allen.id, allen.name, "QB", allen.team, allen.bye_week, "OUT")
+        ctx.roster_spots["roster-001"] = [
+            analysis.RosterSpot(ctx.players[spot.player.id], spot.slot, spot.status, spot.projected_points, "", "")
+            for spot in ctx.roster_spots["roster-001"]
+        ]
+        injured = {entry["name"]: entry for entry in analysis.start_sit_for_roster("roster-001", ctx=ctx).lineup}
+        self.assertEqual(injured["Josh Allen"]["recommendation"], "ir")
+        self.assertEqual(injured["Jalen Hurts"]["optimal_slot"], "QB")
+
+    def test_league_lineups_are_stamped_with_the_context_version(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        analysis.LINEUP_CACHE.clear()
+        # A write lands between loading the context and solving from it.
+        db.execute("UPDATE players SET team = team WHERE id = 'player-001'")
+        analysis.optimize_league_lineups("league-001", ctx=ctx)
+        key = ("league-001", ctx.week)
+        self.assertIsNone(analysis.LINEUP_CACHE.get(key, db.data_version(*analysis.ANALYSIS_INPUT_TABLES, "leagues")))
+        self.assertIsNotNone(analysis.LINEUP_CACHE.get(key, ctx.version))
+
+    def test_waivers_only_include_league_free_agents(self) -> None:
+        rostered = {
+            row["player_id"]
+            for row in db.query_all(
+                "SELECT player_id FROM roster_spots JOIN rosters ON rosters.id = roster_spots.roster_id WHERE rosters.league_id = ?",
+                ("league-001",),
+            )
+        }
+        candidates = analysis.waiver_recommendations("league-001", "team-001", limit=2)
+        self.assertEqual(len(candidates), 2)
+        self.assertFalse(rostered & {c.player.id for c in candidates})
+        self.assertGreaterEqual(candidates[0].total_score, candidates[1].total_score)
+        db.execute(
+            "INSERT OR REPLACE INTO roster_spots (id, roster_id, player_id, slot, status) VALUES (?, ?, ?, 'Bench', 'bench')",
+            ("roster-002-player-016", "roster-002", "player-016"),
+        )
+        try:
+            free_agents = {player.id for player in analysis._free_agents("league-001")}
+            self.assertNotIn("player-016", free_agents)
+        finally:
+            db.execute("DELETE FROM roster_spots WHERE id = ?", ("roster-002-player-016",))
+        self.assertIn("player-016", {player.id for player in analysis._free_agents("league-001")})
+
     def test_trade_ideas_increase_lineup(self) -> None:
         proposals = analysis.trade_ideas("league-001", "team-001")
         self.assertTrue(all(proposal.lineup_delta > 0 for proposal in proposals))
 
+    def test_trade_ideas_rank_by_reoptimized_lineup(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        evaluator = analysis.LineupEvaluator.for_team(ctx, "team-001")
+        for proposal in analysis.trade_ideas("league-001", "team-001", ctx=ctx, max_give=3, max_receive=3):
+            offered = {player.id for player in proposal.offer_players}
+            roster = [p for p in ctx.team_players("team-001") if p.id not in offered] + list(proposal.request_players)
+            traded = analysis.LineupEvaluator(
+                evaluator.slots, [analysis._lineup_candidate(ctx, p) for p in roster]
+            )
+            self.assertAlmostEqual(proposal.lineup_delta, round(traded.total - evaluator.total, 2))
+
+    def test_evaluate_trades_scores_batches_like_trade_ideas(self) -> None:
+        ideas = analysis.trade_ideas("league-001", "team-001", limit=5, max_give=3, max_receive=3)
+        batch = [
+            ("team-001", [p.id for p in idea.offer_players], [p.id for p in idea.request_players]) for idea in ideas
+        ]
+        batch.append(("team-002", ["player-010"], ["player-007"]))
+        evaluation = analysis.evaluate_trades("league-001", batch)
+        for idea, scored in zip(ideas, evaluation.proposals):
+            self.assertEqual(scored.offer_players, idea.offer_players)
+            self.assertEqual(scored.request_players, idea.request_players)
+            self.assertEqual(
+                (scored.offer_value, scored.request_value, scored.lineup_delta, scored.playoff_odds_delta),
+                (idea.offer_value, idea.request_value, idea.lineup_delta, idea.playoff_odds_delta),
+            )
+        self.assertEqual(evaluation.timing["proposals"], len(batch))
+        self.assertGreaterEqual(evaluation.timing["total_ms"], evaluation.timing["score_ms"])
+        reverse = evaluation.proposals[-1]
+        self.assertEqual([p.name for p in reverse.request_players], ["Jalen Hurts"])
+        for bad in (
+            [("team-001", ["player-010"], ["player-002"])],
+            [("team-001", ["player-001"], ["player-001"])],
+            [("team-001", [], ["player-010"])],
+            [("team-009", ["player-001"], ["player-010"])],
+        ):
+            with self.assertRaises(ValueError):
+                analysis.evaluate_trades("league-001", bad)
+
+    def test_trade_ideas_bounded_search(self) -> None:
+        proposals = analysis.trade_ideas("league-001", "team-001", limit=5, max_give=3, max_receive=3)
+        deltas = [proposal.lineup_delta for proposal in proposals]
+        self.assertEqual(deltas, sorted(deltas, reverse=True))
+        self.assertLessEqual(len(proposals), 5)
+        self.assertTrue(all(len(p.offer_players) <= 3 and len(p.request_players) <= 3 for p in proposals))
+        budgeted = analysis.trade_ideas("league-001", "team-001", time_budget=0)
+        self.assertLessEqual(len(budgeted), 3)
+        with self.assertRaises(ValueError):
+            analysis.trade_ideas("league-001", "team-001", max_give=4)
+
     def test_simulation_reproducible(self) -> None:
         first = analysis.simulate_matchup("league-001", "team-001", "team-002", runs=50)
         second = analysis.simulate_matchup("league-001", "team-001", "team-002", runs=50)
         self.assertAlmostEqual(first.win_probability, second.win_probability)
 
+    def test_simulation_percentiles_ordered(self) -> None:
+        result = analysis.simulate_matchup("league-001", "team-001", "team-002", runs=20000)
+        self.assertEqual(result.runs, 20000)
+        self.assertLessEqual(result.percentiles["p10"], result.percentiles["p50"])
+        self.assertLessEqual(result.percentiles["p50"], result.percentiles["p90"])
+        self.assertEqual(result.median_score, result.percentiles["p50"])
+
+    def test_simulation_reports_batch_progress(self) -> None:
+        calls = []
+        runs = analysis.SIMULATION_BATCH_RUNS * 2 + 10
+        analysis.simulate_matchup("league-001", "team-001", "team-002", runs=runs, progress=lambda *c: calls.append(c))
+        batch = analysis.SIMULATION_BATCH_RUNS
+        self.assertEqual(calls, [(batch, runs), (batch * 2, runs), (runs, runs)])
+
+    def test_budget_cut_simulation_is_not_stored(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        options = {"runs": 40_000, "tolerance": 0.001, "time_budget": 0}
+        input_hash = analysis.simulation_input_hash(ctx, "team-001", "team-002", 40_000, 0.001)
+        summary = analysis.simulate_matchup("league-001", "team-001", "team-002", ctx=ctx, **options)
+        self.assertLess(summary.runs, 40_000)
+        self.assertIsNone(analysis.cached_simulation(input_hash))
+        self.assertIsNone(analysis.stored_distribution(input_hash))
+        converged = analysis.simulate_matchup("league-001", "team-001", "team-002", runs=40_000, tolerance=0.05, ctx=ctx)
+        stored_hash = analysis.simulation_input_hash(ctx, "team-001", "team-002", 40_000, 0.05)
+        self.assertEqual(analysis.cached_simulation(stored_hash), converged)
+
+    def test_adaptive_simulation_stops_at_tolerance(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        summary, _ = analysis.run_simulation(ctx, "team-001", "team-002", 50_000, tolerance=0.02)
+        low, high = summary.win_probability_interval
+        self.assertLessEqual((high - low) / 2, 0.02)
+        self.assertLess(summary.runs, 50_000)
+        self.assertEqual(summary.runs % analysis.ADAPTIVE_BATCH_RUNS, 0)
+        self.assertLessEqual(low, summary.win_probability)
+        self.assertLessEqual(summary.win_probability, high)
+        capped, _ = analysis.run_simulation(ctx, "team-001", "team-002", 300, tolerance=0.0001)
+        self.assertEqual(capped.runs, 300)
+        budgeted, _ = analysis.run_simulation(ctx, "team-001", "team-002", 10_000_000, tolerance=0.0001, time_budget=0)
+        self.assertEqual(budgeted.runs, analysis.ADAPTIVE_BATCH_RUNS)
+
+    def test_wilson_interval(self) -> None:
+        low, high = analysis.wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=3)
+        self.assertAlmostEqual(high, 0.5962, places=3)
+        self.assertEqual(analysis.wilson_interval(0, 0), (0.0, 1.0))
+
+    def test_concurrent_identical_simulations_share_one_run(self) -> None:
+        release = threading.Event()
+        calls = []
+        original = analysis.run_simulation
+
+        def slow_run(*args, **kwargs):
+            calls.append(args)
+            release.wait(5)
+            return original(*args, **kwargs)
+
+        results = []
+        with mock.patch.object(analysis, "run_simulation", slow_run):
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(analysis.simulate_matchup("league-001", "team-001", "team-002", runs=77))
+                )
+                for _ in range(4)
+            ]
+            shared = analysis.SIMULATION_FLIGHTS.shared
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + 5
+            while analysis.SIMULATION_FLIGHTS.shared - shared < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_simulation_results_are_reused_until_inputs_change(self) -> None:
+        first = analysis.simulate_matchup("league-001", "team-001", "team-002", runs=64)
+        with mock.patch.object(analysis, "run_simulation", side_effect=AssertionError("recomputed")):
+            self.assertEqual(analysis.simulate_matchup("league-001", "team-001", "team-002", runs=64), first)
+        ctx = analysis.LeagueContext.load("league-001")
+        original = analysis.simulation_input_hash(ctx, "team-001", "team-002", 64)
+        player_id = ctx.team_players("team-001")[0].id
+        projection = ctx.projections[player_id]
+        ctx.projections[player_id] = analysis.Projection(
+            player_id, projection.week, projection.source, projection.projected_points + 1, projection.floor, projection.ceiling
+        )
+        self.assertNotEqual(analysis.simulation_input_hash(ctx, "team-001", "team-002", 64), original)
+        self.assertNotEqual(analysis.simulation_input_hash(ctx, "team-001", "team-002", 65), original)
+
+    def test_prune_simulation_results_by_count_and_age(self) -> None:
+        for runs in (30, 31, 32):
+            analysis.simulate_matchup("league-001", "team-001", "team-002", runs=runs)
+        analysis.prune_simulation_results(max_rows=2, max_age_hours=24)
+        self.assertLessEqual(db.query_one("SELECT COUNT(*) AS n FROM simulation_results")["n"], 2)
+        db.execute("UPDATE simulation_results SET run_at = datetime('now', '-2 days')")
+        analysis.prune_simulation_results(max_rows=100, max_age_hours=24)
+        self.assertEqual(db.query_one("SELECT COUNT(*) AS n FROM simulation_results")["n"], 0)
+
+    def test_single_flight_shares_errors_and_forgets_finished_calls(self) -> None:
+        flight = SingleFlight("test-flight")
+        with self.assertRaises(ValueError):
+            flight.do("k", mock.Mock(side_effect=ValueError("boom")))
+        self.assertEqual(flight.do("k", lambda: 42), 42)
+        self.assertEqual(flight.stats()["leaders"], 2)
+
+    def test_season_strength_counts_starters_only(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        starters = {player_id for _, player_id in analysis.LineupEvaluator.for_team(ctx, "team-001").assignment() if player_id}
+        self.assertIn("player-001", starters)
+        self.assertNotIn("player-007", starters)  # Jalen Hurts sits behind Josh Allen
+        mean, _ = analysis._team_strength(ctx, ctx.teams["team-001"])
+        self.assertAlmostEqual(mean, sum(ctx.projection(player_id).projected_points for player_id in starters))
+
+    def test_simulate_season_probabilities_are_consistent(self) -> None:
+        teams = {
+            f"t{i}": analysis.Team(f"t{i}", "synthetic", f"Team {i}", wins, 7 - wins, 0, 100.0 * wins, 0.0, 0.0)
+            for i, wins in enumerate([7, 5, 4, 4, 3, 2, 2, 1])
+        }
+        schedule = [("t0", "t7"), ("t1", "t6"), ("t2", "t5"), ("t3", "t4"), ("t0", "t1"), ("t2", "t3"), ("t4", "t5"), ("t6", "t7")]
+        matchups = [
+            analysis.Matchup("synthetic", 8 + i // 4, home, away, 0.0, 0.0, None) for i, (home, away) in enumerate(schedule)
+        ]
+        ctx = analysis.LeagueContext("synthetic", 8, teams, {}, {}, {}, matchups, {}, ())
+        odds = analysis.simulate_season("synthetic", runs=4000, ctx=ctx, playoff_teams=4, byes=2)
+        self.assertAlmostEqual(sum(o.playoff for o in odds.values()), 4.0, places=2)
+        self.assertAlmostEqual(sum(o.bye for o in odds.values()), 2.0, places=2)
+        for seed in range(4):
+            self.assertAlmostEqual(sum(o.seeds[seed] for o in odds.values()), 1.0, places=2)
+        self.assertEqual(odds["t0"].playoff, 1.0)
+        self.assertEqual(odds["t7"].playoff, 0.0)
+        self.assertGreater(odds["t1"].bye, odds["t4"].bye)
+        self.assertEqual(analysis.playoff_format(12), (6, 2))
+        self.assertEqual(analysis.playoff_format(2), (1, 0))
+
+    def test_league_context_serves_analysis_without_queries(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        self.assertEqual(set(ctx.teams), {"team-001", "team-002"})
+        self.assertEqual(ctx.opponent_of("team-001"), "team-002")
+        failing = mock.Mock(side_effect=AssertionError("unexpected query"))
+        with mock.patch.object(db, "query_all", failing), mock.patch.object(db, "query_one", failing):
+            lineup = analysis.start_sit_for_roster("roster-001", ctx=ctx)
+            league_lineups = analysis.optimize_league_lineups("league-001", ctx=ctx)
+            waivers = analysis.waiver_recommendations("league-001", "team-001", ctx=ctx)
+            trades = analysis.trade_ideas("league-001", "team-001", ctx=ctx)
+            heatmap = analysis.schedule_heatmap("league-001", ctx=ctx)
+        # Simulations only read back their stored result by input hash.
+        with mock.patch.object(analysis.LeagueContext, "load", failing):
+            simulation = analysis.simulate_matchup("league-001", "team-001", "team-002", runs=50, ctx=ctx)
+        self.assertEqual(lineup, analysis.start_sit_for_roster("roster-001"))
+        self.assertEqual(league_lineups["team-001"], lineup)
+        self.assertEqual(waivers, analysis.waiver_recommendations("league-001", "team-001"))
+        self.assertEqual(trades, analysis.trade_ideas("league-001", "team-001"))
+        self.assertEqual(simulation.runs, 50)
+        self.assertEqual(heatmap, [{"week": 8, "pace": 218.1, "schedule": 1.0}])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pickle
+import time
+import unittest
+from unittest import mock
+
+from backend import analysis, analytics_pool, db, demo
+
+
+class AnalyticsPoolTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        db.run_migrations()
+        demo.seed_demo_content()
+        cls.executor = analytics_pool.AnalyticsExecutor(workers=1, max_queued=0)
+        cls.executor.warm()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.executor.shutdown()
+
+    def test_snapshot_is_compact_and_picklable(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        snapshot = pickle.loads(pickle.dumps(ctx.snapshot()))
+        self.assertEqual(snapshot.free_agents, ())
+        self.assertLess(len(snapshot.players), len(ctx.players))
+        self.assertEqual(snapshot.team_players("team-001"), ctx.team_players("team-001"))
+
+    def test_worker_results_match_inline(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        remote = self.executor.run(analysis.run_simulation, ctx.snapshot(), "team-001", "team-002", 300)
+        self.assertEqual(remote, analysis.run_simulation(ctx, "team-001", "team-002", 300))
+
+    def test_pooled_matchup_shares_the_cached_path(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        input_hash = analysis.simulation_input_hash(ctx, "team-001", "team-002", 321)
+        db.execute("DELETE FROM simulation_results WHERE id = ?", (input_hash,))
+        calls = []
+        with mock.patch.object(analytics_pool, "get_executor", return_value=self.executor):
+            summary = analytics_pool.simulate_matchup(
+                "league-001", "team-001", "team-002", 321, ctx=ctx, progress=lambda *c: calls.append(c)
+            )
+        self.assertEqual(summary, analysis.run_simulation(ctx, "team-001", "team-002", 321)[0])
+        self.assertEqual(calls, [(321, 321)])
+        self.assertEqual(analysis.cached_simulation(input_hash), summary)
+
+    def test_pooled_distribution_is_stored(self) -> None:
+        ctx = analysis.LeagueContext.load("league-001")
+        input_hash = analysis.simulation_input_hash(ctx, "team-001", "team-003", 400)
+        db.execute("DELETE FROM simulation_results WHERE id = ?", (input_hash,))
+        analysis.DISTRIBUTION_CACHE.clear()
+        with mock.patch.object(analytics_pool, "get_executor", return_value=self.executor):
+            distribution = analytics_pool.matchup_distribution("league-001", "team-001", "team-003", 400, ctx=ctx)
+        self.assertEqual(distribution.runs, 400)
+        self.assertEqual(analysis.stored_distribution(input_hash).runs, 400)
+
+    def test_pooled_playoff_odds_match_inline_and_are_stored(self) -> None:
+        inline = analysis.refresh_playoff_odds("league-001", runs=300)
+        db.execute("UPDATE teams SET playoff_odds = -1 WHERE league_id = 'league-001'")
+        with mock.patch.object(analytics_pool, "get_executor", return_value=self.executor):
+            pooled = analytics_pool.refresh_playoff_odds("league-001", runs=300)
+        self.assertEqual(pooled, inline)
+        stored = db.query_one("SELECT playoff_odds FROM teams WHERE id = 'team-001'")
+        self.assertEqual(stored["playoff_odds"], pooled["team-001"].playoff)
+
+    def test_full_queue_rejects_and_cancel_returns_early(self) -> None:
+        started = time.perf_counter()
+        with self.assertRaises(analytics_pool.AnalyticsCancelled):
+            self.executor.run(time.sleep, 0.5, cancelled=lambda: True)
+        self.assertLess(time.perf_counter() - started, 0.4)
+        # The abandoned task still occupies the only slot until it finishes.
+        with self.assertRaises(analytics_pool.AnalyticsBusy):
+            self.executor.submit(time.sleep, 0)
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                self.assertIsNone(self.executor.run(time.sleep, 0))
+                break
+            except analytics_pool.AnalyticsBusy:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from backend import config, db
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        db.run_migrations()
+
+    def test_each_thread_gets_its_own_connection(self) -> None:
+        main = db._ensure_connection()
+        self.assertIs(db._ensure_connection(), main)
+        self.assertIsNot(db._ensure_connection(readonly=True), main)
+        seen: list = []
+        worker = threading.Thread(target=lambda: seen.append(db._ensure_connection()))
+        worker.start()
+        worker.join()
+        self.assertIsNot(seen[0], main)
+
+    def test_wal_journal_and_pragmas(self) -> None:
+        conn = db._ensure_connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], db.BUSY_TIMEOUT_MS)
+        reader = db._ensure_connection(readonly=True)
+        self.assertEqual(reader.execute("PRAGMA query_only").fetchone()[0], 1)
+
+    def test_reads_do_not_wait_for_writers(self) -> None:
+        results: list = []
+        with db._write_lock():
+            reader = threading.Thread(target=lambda: results.append(db.query_one("SELECT 1 AS one")["one"]))
+            reader.start()
+            reader.join(timeout=2)
+        self.assertEqual(results, [1])
+
+
+class TransactionTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        db.run_migrations()
+
+    def setUp(self) -> None:
+        db.execute("DELETE FROM command_logs WHERE id LIKE 'tx-%'")
+
+    def _ids(self) -> set[str]:
+        return {row["id"] for row in db.query_all("SELECT id FROM command_logs WHERE id LIKE 'tx-%'")}
+
+    def test_commit_groups_statements_and_bumps_version_once(self) -> None:
+        before = db.data_version("command_logs")
+        with db.transaction():
+            db.execute("INSERT INTO command_logs (id, command) VALUES ('tx-1', 'a')")
+            db.executemany("INSERT INTO command_logs (id, command) VALUES (?, ?)", [("tx-2", "b"), ("tx-3", "c")])
+            self.assertEqual(self._ids(), {"tx-1", "tx-2", "tx-3"})
+            self.assertEqual(db.data_version("command_logs"), before)
+        self.assertNotEqual(db.data_version("command_logs"), before)
+        self.assertEqual(self._ids(), {"tx-1", "tx-2", "tx-3"})
+
+    def test_writes_from_another_connection_bump_version(self) -> None:
+        before = db.data_version("command_logs")
+        db.execute("UPDATE command_logs SET command = 'x' WHERE id = 'tx-missing'")
+        self.assertEqual(db.data_version("command_logs"), before)
+        # A plain connection stands in for another process (cron job, second server).
+        other = sqlite3.connect(config.get_settings().database_url)
+        try:
+            with other:
+                other.execute("INSERT INTO command_logs (id, command) VALUES ('tx-other', 'x')")
+        finally:
+            other.close()
+        self.assertNotEqual(db.data_version("command_logs"), before)
+
+    def test_rollback_discards_everything(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with db.transaction():
+                db.execute("INSERT INTO command_logs (id, command) VALUES ('tx-1', 'a')")
+                raise RuntimeError("boom")
+        self.assertEqual(self._ids(), set())
+        self.assertFalse(db.in_transaction())
+
+    def test_nested_block_rolls_back_to_savepoint(self) -> None:
+        with db.transaction():
+            db.execute("INSERT INTO command_logs (id, command) VALUES ('tx-1', 'a')")
+            with self.assertRaises(RuntimeError):
+                with db.transaction():
+                    db.execute("INSERT INTO command_logs (id, command) VALUES ('tx-2', 'b')")
+                    raise RuntimeError("inner")
+            with db.transaction():
+                db.execute("INSERT INTO command_logs (id, command) VALUES ('tx-3', 'c')")
+        self.assertEqual(self._ids(), {"tx-1", "tx-3"})
+
+
+class MigrationRunnerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.previous_url = os.environ.get("DATABASE_URL")
+        os.environ["DATABASE_URL"] = str(Path(self.tmp.name) / "migrations.db")
+        config.reset_settings()
+        self.migrations = Path(self.tmp.name) / "migrations"
+        self.migrations.mkdir()
+        (self.migrations / "0001_create.sql").write_text(
+            "CREATE TABLE probe (id INTEGER PRIMARY KEY, label TEXT);\nINSERT INTO probe (label) VALUES ('a');\n",
+            encoding="utf-8",
+        )
+
+    def tearDown(self) -> None:
+        db.close_all()
+        if self.previous_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = self.previous_url
+        config.reset_settings()
+        self.tmp.cleanup()
+
+    def test_only_pending_migrations_run(self) -> None:
+        first = db.run_migrations(self.migrations)
+        self.assertEqual([entry["version"] for entry in first], ["0001_create"])
+        self.assertEqual(db.run_migrations(self.migrations), [])
+        (self.migrations / "0002_backfill.sql").write_text("UPDATE probe SET label = 'b';\n", encoding="utf-8")
+        second = db.run_migrations(self.migrations)
+        self.assertEqual([entry["version"] for entry in second], ["0002_backfill"])
+        self.assertEqual(db.query_one("SELECT label FROM probe")["label"], "b")
+        self.assertEqual(set(db.applied_migrations()), {"0001_create", "0002_backfill"})
+
+    def test_dry_run_reports_and_rolls_back(self) -> None:
+        report = db.run_migrations(self.migrations, dry_run=True)
+        self.assertEqual(len(report), 1)
+        self.assertGreaterEqual(report[0]["duration_ms"], 0)
+        self.assertEqual(db.applied_migrations(), {})
+        self.assertIsNone(db.query_one("SELECT name FROM sqlite_master WHERE name = 'probe'"))
+
+    def test_failed_migration_is_not_recorded(self) -> None:
+        (self.migrations / "0002_broken.sql").write_text(
+            "INSERT INTO probe (label) VALUES ('c');\nINSERT INTO missing_table VALUES (1);\n", encoding="utf-8"
+        )
+        with self.assertRaises(Exception):
+            db.run_migrations(self.migrations)
+        self.assertEqual(set(db.applied_migrations()), {"0001_create"})
+        self.assertEqual(db.query_one("SELECT COUNT(*) AS n FROM probe")["n"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import random
+import unittest
+
+from backend import analysis, db, demo
+from backend.distribution import MAX_POINTS, ScoreDistribution
+
+
+class ScoreDistributionTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(7)
+        self.team = [rng.gauss(110, 15) for _ in range(1000)]
+        self.opponent = [rng.gauss(100, 15) for _ in range(1000)]
+        self.distribution = ScoreDistribution.from_samples(self.team, self.opponent)
+
+    def test_round_trip_is_compact_float32(self) -> None:
+        blob = self.distribution.to_bytes()
+        self.assertLess(len(blob), 1000 * 2 * 4 + 16)
+        self.assertEqual(ScoreDistribution.from_bytes(blob), self.distribution)
+
+    def test_queries_match_raw_samples(self) -> None:
+        ordered = sorted(self.team)
+        self.assertAlmostEqual(self.distribution.percentile(50), analysis._percentile_sorted(ordered, 50), places=3)
+        self.assertAlmostEqual(self.distribution.prob_above(110), sum(s > 110 for s in self.team) / 1000, places=3)
+        wins = sum(t > o for t, o in zip(self.team, self.opponent)) / 1000
+        self.assertAlmostEqual(self.distribution.prob_win_by(0), wins, places=3)
+        histogram = self.distribution.histogram(bins=10)
+        self.assertEqual(len(histogram), 10)
+        self.assertEqual(sum(bucket["count"] for bucket in histogram), 1000)
+
+    def test_large_runs_are_sketched(self) -> None:
+        rng = random.Random(3)
+        scores = [rng.uniform(0, 200) for _ in range(MAX_POINTS * 5)]
+        distribution = ScoreDistribution.from_samples(scores, scores)
+        self.assertEqual(distribution.runs, MAX_POINTS * 5)
+        self.assertEqual(len(distribution.scores), MAX_POINTS)
+        self.assertAlmostEqual(distribution.percentile(90), analysis._percentile(scores, 90), delta=0.5)
+        self.assertEqual(sum(bucket["count"] for bucket in distribution.histogram(bins=8)), MAX_POINTS * 5)
+
+
+class StoredDistributionTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        db.run_migrations()
+        demo.seed_demo_content()
+
+    def test_simulation_stores_its_distribution(self) -> None:
+        summary = analysis.simulate_matchup("league-001", "team-001", "team-002", runs=333)
+        analysis.DISTRIBUTION_CACHE.clear()
+        distribution = analysis.matchup_distribution("league-001", "team-001", "team-002", runs=333)
+        self.assertEqual(distribution.runs, 333)
+        self.assertAlmostEqual(distribution.percentile(50), summary.median_score, places=2)
+        self.assertAlmostEqual(distribution.prob_win_by(0), summary.win_probability, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
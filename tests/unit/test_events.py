@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import unittest
+
+from backend import events
+
+
+class EventsTestCase(unittest.TestCase):
+    def test_publish_reaches_matching_subscribers_only(self) -> None:
+        with events.subscribe(events.INJURIES) as injuries, events.subscribe() as everything:
+            events.publish(events.PROJECTIONS, refreshed=3)
+            events.publish(events.INJURIES, player_ids=["player-004"])
+            received = injuries.get(timeout=0)
+            self.assertEqual(received.topic, events.INJURIES)
+            self.assertEqual(received.payload, {"player_ids": ["player-004"]})
+            self.assertIsNone(injuries.get(timeout=0))
+            self.assertEqual([everything.get(timeout=0).topic for _ in range(2)], [events.PROJECTIONS, events.INJURIES])
+        self.assertEqual(events.publish(events.INJURIES), 0)
+
+    def test_slow_subscriber_keeps_newest_events(self) -> None:
+        with events.subscribe(events.PROJECTIONS) as subscription:
+            for index in range(events.MAX_PENDING_EVENTS + 5):
+                events.publish(events.PROJECTIONS, index=index)
+            first = subscription.get(timeout=0)
+            self.assertEqual(first.payload["index"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
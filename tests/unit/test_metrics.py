@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import unittest
+import urllib.request
+
+from backend import analysis, db, demo, metrics
+from backend.server import _route_label
+
+
+class MetricsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        db.run_migrations()
+        demo.seed_demo_content()
+
+    def test_histogram_renders_cumulative_buckets(self) -> None:
+        histogram = metrics.Histogram("ffa_test_seconds", "Test histogram.", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+        lines = histogram.render()
+        self.assertIn('ffa_test_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('ffa_test_seconds_bucket{route="/a",le="1.0"} 2', lines)
+        self.assertIn('ffa_test_seconds_bucket{route="/a",le="+Inf"} 3', lines)
+        self.assertIn('ffa_test_seconds_count{route="/a"} 3', lines)
+
+    def test_db_and_simulation_instrumentation(self) -> None:
+        reads = metrics.DB_QUERY_SECONDS.count("read")
+        runs = metrics.SIMULATION_RUNS.value()
+        db.query_all("SELECT 1")
+        analysis.simulate_matchup("league-001", "team-001", "team-002", runs=40)
+        self.assertGreater(metrics.DB_QUERY_SECONDS.count("read"), reads)
+        self.assertEqual(metrics.SIMULATION_RUNS.value(), runs + 40)
+
+    def test_route_labels_drop_ids(self) -> None:
+        self.assertEqual(_route_label("/api/leagues/league-001/waivers?x=1"), "/api/leagues/{id}/waivers")
+        self.assertEqual(_route_label("/api/dashboard"), "/api/dashboard")
+        self.assertEqual(_route_label("/styles.css"), "static")
+        self.assertEqual(
+            _route_label("/api/leagues/league-001/matchup/distribution"), "/api/leagues/{id}/matchup/distribution"
+        )
+        for probe in ("/api/wp-login.php", "/api/leagues/a/b/roster", "/api/leagues/league-001", "/api/me/x"):
+            self.assertEqual(_route_label(probe), "unmatched")
+
+    def test_exporter_serves_text_format(self) -> None:
+        server = metrics.start_metrics_server(0, host="127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as resp:
+                body = resp.read().decode()
+                self.assertTrue(resp.headers["Content-Type"].startswith("text/plain"))
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn("# TYPE ffa_db_query_duration_seconds histogram", body)
+        self.assertIn('ffa_cache_hit_ratio{cache="projections"}', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
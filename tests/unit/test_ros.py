@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import unittest
+
+from backend import analysis, db, demo
+from backend.ros import RosIndex
+
+PLAYER_ID = "player-ros-test"
+FINAL_WEEK = 17
+
+
+class RosIndexTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        db.run_migrations()
+        demo.seed_demo_content()
+
+    def setUp(self) -> None:
+        db.execute(
+            "INSERT INTO players (id, name, position, team, bye_week) VALUES (?, 'ROS Test', 'WR', 'DET', 11)",
+            (PLAYER_ID,),
+        )
+        self._write({9: 10.0, 10: 14.0, 13: 8.0}, stamp="2000-01-01 00:00:00")
+        self.index = RosIndex(final_week=FINAL_WEEK)
+
+    def tearDown(self) -> None:
+        db.execute("DELETE FROM projections WHERE player_id = ?", (PLAYER_ID,))
+        analysis.refresh_rest_of_season()
+        db.execute("DELETE FROM blended_projections WHERE player_id = ?", (PLAYER_ID,))
+        db.execute("DELETE FROM players WHERE id = ?", (PLAYER_ID,))
+
+    def _write(self, weeks: dict[int, float], stamp: str | None = None) -> None:
+        db.executemany(
+            """
+            INSERT INTO blended_projections
+                (player_id, week, projected_points, floor, ceiling, source_count, source_signature, refreshed_at)
+            VALUES (?, ?, ?, 0, 0, 1, 'test', COALESCE(?, CURRENT_TIMESTAMP))
+            ON CONFLICT(player_id, week) DO UPDATE SET
+                projected_points = excluded.projected_points, refreshed_at = excluded.refreshed_at
+            """,
+            [(PLAYER_ID, week, points, stamp) for week, points in weeks.items()],
+        )
+
+    def test_windows_match_naive_sums(self) -> None:
+        self.index.refresh()
+        # Weeks 1-9 take the earliest projection, later gaps carry forward and the bye scores zero.
+        expected = {week: 10.0 for week in range(1, 10)}
+        expected.update({10: 14.0, 11: 0.0, 12: 14.0, 13: 8.0, 14: 8.0, 15: 8.0, 16: 8.0, 17: 8.0})
+        for week, points in expected.items():
+            self.assertEqual(self.index.weekly(PLAYER_ID, week), points)
+        for start in range(1, FINAL_WEEK + 1):
+            for end in range(start, FINAL_WEEK + 3):
+                naive = sum(points for week, points in expected.items() if start <= week <= end)
+                self.assertAlmostEqual(self.index.window(PLAYER_ID, start, end), naive)
+        self.assertAlmostEqual(self.index.rest_of_season(PLAYER_ID, 9), 10 + 14 + 0 + 14 + 8 * 5)
+        self.assertEqual(self.index.window("player-unknown", 1, FINAL_WEEK), 0.0)
+
+    def test_refresh_rebuilds_only_changed_players(self) -> None:
+        self.index.refresh()
+        built = self.index.rebuilt_players
+        self.assertGreaterEqual(built, 1)
+        self.index.refresh()
+        self.assertEqual(self.index.rebuilt_players, built)
+
+        self._write({12: 20.0})
+        self.index.refresh()
+        self.assertEqual(self.index.rebuilt_players, built + 1)
+        self.assertEqual(self.index.weekly(PLAYER_ID, 12), 20.0)
+
+        db.execute("UPDATE players SET bye_week = 14 WHERE id = ?", (PLAYER_ID,))
+        self.index.refresh()
+        self.assertEqual(self.index.rebuilt_players, built + 2)
+        self.assertEqual(self.index.weekly(PLAYER_ID, 11), 14.0)
+        self.assertEqual(self.index.weekly(PLAYER_ID, 14), 0.0)
+
+        db.execute("DELETE FROM blended_projections WHERE player_id = ? AND week = 13", (PLAYER_ID,))
+        self.index.refresh()
+        self.assertEqual(self.index.weekly(PLAYER_ID, 13), 20.0)
+
+    def test_projection_writes_reach_the_index_before_the_nightly_job(self) -> None:
+        analysis.refresh_rest_of_season()
+        db.executemany(
+            """
+            INSERT INTO projections (id, player_id, week, source, projected_points, floor, ceiling)
+            VALUES (?, ?, 10, ?, ?, 0, 0)
+            """,
+            [(f"{PLAYER_ID}-{source}", PLAYER_ID, source, points) for source, points in (("espn", 30.0), ("fp", 20.0))],
+        )
+        analysis.refresh_rest_of_season()
+        live = analysis.blend_projections(PLAYER_ID, week=10)
+        self.assertEqual(analysis.ROS_INDEX.weekly(PLAYER_ID, 10), live.projected_points)
+        self.assertNotEqual(live.projected_points, 14.0)
+
+    def test_waiver_ros_value_averages_remaining_weeks(self) -> None:
+        player = analysis.Player(
+            id=PLAYER_ID, name="ROS Test", position="WR", team="DET", bye_week=11, injury_status=None
+        )
+        projection = analysis.blend_projections(PLAYER_ID, week=9)
+        analysis.ROS_INDEX.refresh()
+        candidate = analysis._waiver_candidate(player, projection, 9, 1.0)
+        remaining = analysis.SEASON_FINAL_WEEK - 9 + 1
+        ros_total = analysis.ROS_INDEX.rest_of_season(PLAYER_ID, 9)
+        self.assertEqual(candidate.ros_total, round(ros_total, 2))
+        self.assertEqual(candidate.ros_value, round(ros_total / remaining * 0.9 + projection.ceiling * 0.1, 2))
+        playoffs = analysis.ROS_INDEX.window(PLAYER_ID, analysis.PLAYOFF_START_WEEK, analysis.SEASON_FINAL_WEEK)
+        self.assertEqual(candidate.playoff_value, round(playoffs, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()